@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'fitness.middleware.QueryInstrumentationMiddleware',  # Inactive unless REQUEST_INSTRUMENTATION['ENABLED']
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -164,12 +165,115 @@ LOGOUT_REDIRECT_URL = 'root'
 # AI Provider Settings
 OPENAI_MODEL_NAME = "gpt-4o"
 ANTHROPIC_MODEL_NAME = "claude-3-opus-20240229"
+# Output limit per request: the model's maximum, enough for a compact weekly plan
+ANTHROPIC_MAX_TOKENS = int(os.getenv('ANTHROPIC_MAX_TOKENS', '4096'))
+# Mark the tool and system prompt prefix shared by every request as cacheable
+ANTHROPIC_PROMPT_CACHING = os.getenv('ANTHROPIC_PROMPT_CACHING', 'true').lower() == 'true'
 
 # AI Provider Settings
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 
+# AI provider HTTP clients: shared keep-alive pool, timeouts, retries and circuit breaker
+AI_PROVIDER_HTTP = {
+    'TIMEOUT': 120.0,  # seconds; weekly plans can take a minute to generate
+    'CONNECT_TIMEOUT': 10.0,
+    'MAX_CONNECTIONS': 50,
+    'MAX_KEEPALIVE_CONNECTIONS': 20,
+    'MAX_RETRIES': 3,  # retries on 429/5xx and connection errors
+    'BACKOFF_BASE': 1.0,  # seconds, doubled each retry with full jitter
+    'BACKOFF_MAX': 30.0,
+    'CIRCUIT_BREAKER_THRESHOLD': 5,  # consecutive failed calls before failing fast
+    'CIRCUIT_BREAKER_RESET': 60.0,  # seconds before a trial call is let through
+}
+
+# Record latency, token usage and errors of every AI call (see the ai_stats command)
+AI_METRICS_ENABLED = os.getenv('AI_METRICS_ENABLED', 'true').lower() == 'true'
+
+# Weekly plan prompt: 'compact' derives the response schema from the plan types, 'legacy' is the original worked example,
+# 'catalog' lets the model reference existing exercises by ID instead of writing them out
+AI_PLAN_PROMPT_VARIANT = os.getenv('AI_PLAN_PROMPT_VARIANT', 'compact')
+
+# Exercises offered to the model by the 'catalog' prompt variant
+AI_PLAN_CATALOG = {
+    'MAX_CANDIDATES': 80,  # entries in the prompt, ranked by use among users with the same goal
+    'CACHE_TTL': 3600,  # seconds candidates are reused for users with the same goal and equipment
+}
+
+# Weekly plan generation: 'single' requests the week in one completion, 'fan_out' requests
+# a short split first and then every day concurrently (lower latency, more calls)
+AI_PLAN_GENERATION = {
+    'STRATEGY': os.getenv('AI_PLAN_STRATEGY', 'single'),
+    'FAN_OUT_CONCURRENCY': 7,  # day completions in flight at once for one plan
+}
+
+# AI completion cache: identical prompts reuse one of VARIANTS stored responses
+AI_COMPLETION_CACHE = {
+    'ENABLED': os.getenv('AI_COMPLETION_CACHE_ENABLED', 'true').lower() == 'true',
+    'BACKEND': os.getenv('AI_COMPLETION_CACHE_BACKEND', 'database'),  # 'database' or 'memory'
+    'TTL': 7 * 24 * 3600,  # 1 week in seconds
+    'MAX_ENTRIES': 5000,
+    'VARIANTS': 3,
+}
+
+# Record/replay of AI completions for offline load tests, benchmarks and CI (the 'replay' provider)
+AI_REPLAY = {
+    'CASSETTE_DIR': os.getenv('AI_REPLAY_CASSETTE_DIR', os.path.join(BASE_DIR, 'cassettes')),
+    'RECORD': os.getenv('AI_REPLAY_RECORD', 'false').lower() == 'true',  # save real completions to CASSETTE_DIR
+    'LATENCY': os.getenv('AI_REPLAY_LATENCY', 'recorded'),  # 'none', 'fixed', 'normal' or 'recorded'
+    'LATENCY_MEAN': 8.0,  # seconds, for 'fixed' and 'normal'
+    'LATENCY_STDDEV': 2.0,  # seconds, for 'normal'
+    'LATENCY_SCALE': 1.0,  # multiplier on recorded latencies
+    'ON_MISS': os.getenv('AI_REPLAY_ON_MISS', 'error'),  # 'error', or 'random' to answer with any recording
+}
+
+# Hedged requests (the 'hedged' provider): a request still unanswered after the hedge delay
+# is also sent to BACKUP, and the first valid response wins
+AI_HEDGING = {
+    'PRIMARY': os.getenv('AI_HEDGING_PRIMARY', 'openai'),
+    'BACKUP': os.getenv('AI_HEDGING_BACKUP', 'anthropic'),
+    'DELAY': float(os.getenv('AI_HEDGING_DELAY', '20.0')),  # seconds, until enough latencies are known
+    'LATENCY_PERCENTILE': 95,  # then hedge past this percentile of primary latency; None keeps DELAY
+    'MIN_SAMPLES': 20,
+    'WINDOW': 200,  # recent primary latencies the percentile is taken over
+}
+
+# Single-flight plan generation: a user's queued or running job is the lock other requests attach to
+PLAN_GENERATION_LOCK = {
+    'STALE_AFTER': 600,  # seconds before a running job is presumed dead and its lock released
+    'WAIT_TIMEOUT': 300,  # seconds an attached caller waits for the running generation
+    'POLL_INTERVAL': 1.0,
+}
+
+# WHOOP recovery sync (see the sync_recovery command)
+WHOOP_API = {
+    'BASE_URL': os.getenv('WHOOP_API_BASE_URL', 'https://api.prod.whoop.com/developer/v1'),
+    'TIMEOUT': 30.0,  # seconds per request
+    'CONCURRENCY': 10,  # users synced at once, and the connection pool size
+    'MAX_RETRIES': 3,  # retries on 429/5xx and connection errors
+    'BACKOFF_BASE': 1.0,
+    'BACKOFF_MAX': 30.0,
+    'PAGE_SIZE': 25,  # the API's maximum
+    'BACKFILL_DAYS': 7,  # history fetched on a user's first sync
+}
+
+# Per-request query count, SQL time and wall time, sent as Server-Timing headers and logged
+REQUEST_INSTRUMENTATION = {
+    'ENABLED': os.getenv('REQUEST_INSTRUMENTATION_ENABLED', 'false').lower() == 'true',
+    'ENFORCE_BUDGETS': False,  # raise instead of logging when a view goes over its budget
+    'LOGGED_DUPLICATES': 3,  # repeated query fingerprints logged per request
+    # Limits per URL name: 'queries', 'duplicates', 'sql_ms' and 'wall_ms'
+    'BUDGETS': {
+        'workout_plan': {'queries': 6, 'duplicates': 0},
+        'daily_workout': {'queries': 6, 'duplicates': 0},
+        # Changelists count the filtered and the full result separately
+        'admin:fitness_dailyworkout_changelist': {'queries': 12, 'duplicates': 1},
+        'admin:fitness_workoutplan_changelist': {'queries': 12, 'duplicates': 1},
+        'admin:fitness_userprofile_changelist': {'queries': 12, 'duplicates': 1},
+    },
+}
+
 # Session Configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
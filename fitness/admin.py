@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, WorkoutPlan, DailyWorkout, Exercise, ExerciseSet
+from .models import UserProfile, WorkoutPlan, DailyWorkout, Exercise, ExerciseSet, PlanGenerationJob, RecoveryScore, WhoopAccount
 
 @admin.register(Exercise)
 class ExerciseAdmin(admin.ModelAdmin):
@@ -31,8 +31,46 @@ class ExerciseSetAdmin(admin.ModelAdmin):
             'daily_workout__workout_plan__user'
         )
 
-admin.site.register(UserProfile)
-admin.site.register(WorkoutPlan)
-admin.site.register(DailyWorkout)
+@admin.register(PlanGenerationJob)
+class PlanGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('user', 'status', 'attempts', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('user__email',)
+    list_select_related = ('user',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+@admin.register(RecoveryScore)
+class RecoveryScoreAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'score', 'resting_heart_rate', 'hrv_rmssd')
+    list_filter = ('date',)
+    search_fields = ('user__email',)
+    list_select_related = ('user',)
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(WhoopAccount)
+class WhoopAccountAdmin(admin.ModelAdmin):
+    list_display = ('user', 'synced_through', 'last_synced_at', 'last_error')
+    search_fields = ('user__email',)
+    list_select_related = ('user',)
+    exclude = ('access_token',)
+
+# Each model's __str__ reads the user's username, so the changelists join the user in
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_select_related = ('user',)
+
+@admin.register(WorkoutPlan)
+class WorkoutPlanAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'week_start_date', 'created_at')
+    search_fields = ('user__email',)
+    list_select_related = ('user',)
+
+@admin.register(DailyWorkout)
+class DailyWorkoutAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'date', 'focus', 'sent')
+    list_filter = ('sent',)
+    search_fields = ('workout_plan__user__email',)
+    list_select_related = ('workout_plan__user',)
 
 # Register your models here.
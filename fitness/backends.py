@@ -1,13 +1,14 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from .models import users_with_email
 
 class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        if password is None:
+        if username is None or password is None:
             return None
         UserModel = get_user_model()
         try:
-            user = UserModel.objects.get(email=username)
+            user = users_with_email(username).get()
             if user.check_password(password):
                 return user
         except UserModel.DoesNotExist:
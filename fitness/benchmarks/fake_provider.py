@@ -0,0 +1,117 @@
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import json
+import re
+import time
+
+from openai.types.chat import ChatCompletionMessageParam
+
+from ..constants import DAYS_OF_WEEK
+from ..services.plan_prompt import CHARS_PER_TOKEN, ExerciseData, WeeklyPlanResponse, WeeklySplitResponse, WorkoutData
+
+MUSCLE_GROUPS = ['chest', 'back', 'legs', 'shoulders', 'arms', 'core']
+
+# The day a fan-out day prompt asks for
+_REQUESTED_DAY = re.compile(r'^Day: (\w+)', re.MULTILINE)
+
+
+class FakeAIProvider:
+    """AIProvider returning a fixed-size weekly plan without any network calls.
+
+    Exercises are drawn from a pool of `catalog_size` names so repeated plans
+    hit the exercise catalog the way real plans do. An optional `latency` is
+    slept on every call to stand in for the model, plus `latency_per_token`
+    for every token of the response, since a model emits its output serially.
+
+    Split and day requests of fan-out generation (recognized by the response
+    schema's name) get a split or a single day instead of a whole plan.
+    """
+
+    def __init__(self, exercises_per_day: int = 6, catalog_size: int = 60, latency: float = 0.0, latency_per_token: float = 0.0):
+        self.exercises_per_day = exercises_per_day
+        self.catalog_size = catalog_size
+        self.latency = latency
+        self.latency_per_token = latency_per_token
+        self.calls = 0
+
+    def _exercise(self, index: int) -> ExerciseData:
+        number = index % self.catalog_size
+        return {
+            "name": f"Benchmark exercise {number}",
+            "description": "Controlled movement through the full range of motion.",
+            "muscle_groups": [MUSCLE_GROUPS[number % len(MUSCLE_GROUPS)]],
+            "equipment_needed": ["dumbbells"],
+            "difficulty_level": number % 5 + 1,
+            "instructions": "Brace, lower for three seconds, drive up.",
+            "tips": "Keep the spine neutral.",
+            "sets": 3,
+            "reps": "8-12",
+            "rest": "60 seconds",
+            "weight": "moderate",
+            "notes": "",
+        }
+
+    def _workout(self, day_index: int) -> WorkoutData:
+        first = (self.calls * len(DAYS_OF_WEEK) + day_index) * self.exercises_per_day
+        return {
+            "day": DAYS_OF_WEEK[day_index],
+            "focus": "Full Body",
+            "description": "Compound lifts followed by accessories.",
+            "duration": "45-60 minutes",
+            "intensity": day_index % 10 + 1,
+            "notes": "",
+            "exercises": [self._exercise(first + i) for i in range(self.exercises_per_day)],
+        }
+
+    def plan(self) -> WeeklyPlanResponse:
+        """The next plan; successive plans rotate through the exercise pool."""
+        response: WeeklyPlanResponse = {
+            "weekly_plan": [self._workout(index) for index in range(len(DAYS_OF_WEEK))],
+            "equipment_needed": ["dumbbells", "bench"],
+            "general_guidelines": ["Warm up for ten minutes", "Stop two reps short of failure"],
+        }
+        self.calls += 1
+        return response
+
+    def split(self) -> WeeklySplitResponse:
+        """The weekly split requested by the planning call of fan-out generation."""
+        return {
+            "weekly_split": [
+                {"day": day, "focus": "Full Body", "intensity": index % 10 + 1}
+                for index, day in enumerate(DAYS_OF_WEEK)
+            ],
+            "equipment_needed": ["dumbbells", "bench"],
+            "general_guidelines": ["Warm up for ten minutes", "Stop two reps short of failure"],
+        }
+
+    def _respond(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        name = (response_schema or {}).get('name')
+        if name == 'weekly_split':
+            return dict(self.split())
+        if name == 'daily_workout':
+            match = _REQUESTED_DAY.search(str(messages[-1].get('content', '')))
+            day_index = DAYS_OF_WEEK.index(match.group(1)) if match and match.group(1) in DAYS_OF_WEEK else 0
+            return dict(self._workout(day_index))
+        return dict(self.plan())
+
+    def _delay(self, response: Dict[str, Any]) -> float:
+        return self.latency + self.latency_per_token * len(json.dumps(response)) / CHARS_PER_TOKEN
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = self._respond(messages, response_schema)
+        delay = self._delay(response)
+        if delay:
+            time.sleep(delay)
+        return response
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = self._respond(messages, response_schema)
+        delay = self._delay(response)
+        if delay:
+            await asyncio.sleep(delay)
+        return response
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        text = json.dumps(self.generate_completion(messages, response_schema))
+        for start in range(0, len(text), 64):
+            yield text[start:start + 64]
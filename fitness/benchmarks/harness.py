@@ -0,0 +1,117 @@
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List
+import json
+import platform
+import time
+
+from django.db import connection
+from django.utils import timezone
+
+from ..services.stats import percentile
+
+BASELINE_DIR = Path(__file__).resolve().parent / 'baselines'
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one benchmark.
+
+    `value` is the figure compared against baselines: the median of the
+    samples. Timings are lower-is-better, throughputs higher-is-better.
+    """
+    name: str
+    unit: str
+    samples: List[float] = field(default_factory=list)
+    higher_is_better: bool = False
+
+    @property
+    def value(self) -> float:
+        return percentile(self.samples, 50)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.samples, 95)
+
+
+@dataclass
+class Regression:
+    """A benchmark that got worse than its baseline by more than the tolerance."""
+    name: str
+    baseline: float
+    value: float
+    unit: str
+
+    @property
+    def change(self) -> float:
+        """Relative change from the baseline, e.g. 0.4 for 40% slower or -0.4 for 40% less throughput."""
+        return (self.value - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+def time_calls(func: Callable[[], object], repeat: int, warmup: int = 1) -> List[float]:
+    """Wall time in seconds of `repeat` calls to func, after `warmup` untimed calls."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def default_baseline_path() -> Path:
+    """Baseline file for the current database vendor."""
+    return BASELINE_DIR / f'{connection.vendor}.json'
+
+
+def load_baseline(path: Path) -> Dict[str, float]:
+    """Baseline values keyed by benchmark name, or an empty dict if none were recorded."""
+    if not path.exists():
+        return {}
+    with path.open() as f:
+        data = json.load(f)
+    return {name: entry['value'] for name, entry in data.get('benchmarks', {}).items()}
+
+
+def save_baseline(path: Path, results: List[BenchmarkResult]) -> None:
+    """Record results as the new baseline, keeping entries for benchmarks that were not run."""
+    data = {'benchmarks': {}}
+    if path.exists():
+        with path.open() as f:
+            data = json.load(f)
+    benchmarks = data.setdefault('benchmarks', {})
+    for result in results:
+        benchmarks[result.name] = {
+            'value': round(result.value, 6),
+            'unit': result.unit,
+            'higher_is_better': result.higher_is_better,
+        }
+    data['recorded_at'] = timezone.now().isoformat()
+    data['python'] = platform.python_version()
+    data['database'] = connection.vendor
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(results: List[BenchmarkResult], baseline: Dict[str, float], tolerance: float) -> List[Regression]:
+    """Results worse than their baseline by more than `tolerance` (a fraction, e.g. 0.25)."""
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if expected is None:
+            continue
+        if result.higher_is_better:
+            regressed = result.value < expected * (1 - tolerance)
+        else:
+            regressed = result.value > expected * (1 + tolerance)
+        if regressed:
+            regressions.append(Regression(name=result.name, baseline=expected, value=result.value, unit=result.unit))
+    return regressions
+
+
+def result_to_dict(result: BenchmarkResult) -> Dict[str, object]:
+    """JSON-serializable form of a result, with its summary figures."""
+    return {**asdict(result), 'value': result.value, 'p95': result.p95}
@@ -0,0 +1,292 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import itertools
+import random
+import re
+import threading
+import time
+import uuid
+
+import aiohttp
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.urls import reverse
+
+from .fake_provider import FakeAIProvider
+from ..models import UserProfile
+from ..services.stats import percentile
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+# Requests a virtual user can make, weighted by DEFAULT_MIX unless configured
+URL_NAMES = ('signup', 'login', 'workout_plan', 'daily_workout')
+DEFAULT_MIX = {'signup': 1, 'login': 1, 'workout_plan': 10, 'daily_workout': 8}
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+_CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+@dataclass
+class LoadTestUser:
+    """A seeded account a virtual user logs in as."""
+    email: str
+    password: str
+    daily_workout_ids: List[int]
+
+
+@dataclass
+class UrlStats:
+    """Latencies and failures of the requests to one URL name."""
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def record(self, latency: float, error: Optional[str] = None) -> None:
+        self.latencies.append(latency)
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def to_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.error_count,
+            'error_rate': self.error_count / self.requests if self.requests else 0.0,
+            'errors_by_kind': dict(self.errors),
+            'requests_per_second': self.requests / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {
+                **{f'p{pct}': percentile(self.latencies, pct) * 1000 for pct in LATENCY_PERCENTILES},
+                'max': max(self.latencies, default=0.0) * 1000,
+            },
+        }
+
+
+@dataclass
+class StepResult:
+    """Outcome of running the mix at one concurrency level."""
+    concurrency: int
+    elapsed: float
+    stats: Dict[str, UrlStats] = field(default_factory=dict)
+
+    def total(self) -> UrlStats:
+        combined = UrlStats()
+        for stats in self.stats.values():
+            combined.latencies.extend(stats.latencies)
+            for kind, count in stats.errors.items():
+                combined.errors[kind] = combined.errors.get(kind, 0) + count
+        return combined
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'concurrency': self.concurrency,
+            'elapsed': self.elapsed,
+            'total': self.total().to_dict(self.elapsed),
+            'urls': {name: stats.to_dict(self.elapsed) for name, stats in sorted(self.stats.items())},
+        }
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse a request mix such as 'workout_plan=10,daily_workout=8,login=1'."""
+    mix = {}
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in URL_NAMES:
+            raise ValueError(f"Unknown URL name in mix: {name} (expected one of {', '.join(URL_NAMES)})")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise ValueError(f"Mix weight for {name} must be an integer") from None
+    if not any(mix.values()):
+        raise ValueError("The request mix has no positive weights")
+    return mix
+
+
+def seed_load_test_users(count: int, password: str, prefix: str, exercises_per_day: int = 6) -> List[LoadTestUser]:
+    """Create users with profiles and a generated plan, without any AI calls.
+
+    The password is hashed once and shared, since hashing it per user would
+    dominate seeding.
+    """
+    password_hash = make_password(password)
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}{i}@example.com', email=f'{prefix}{i}@example.com', password=password_hash)
+        for i in range(count)
+    ])
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(user=user, goal='strength', workouts_per_week=4, available_equipment=['dumbbells', 'bench'])
+        for user in users
+    ])
+    generator = WorkoutPlanGenerator(FakeAIProvider(exercises_per_day=exercises_per_day))
+    seeded = []
+    for profile in profiles:
+        plan = generator.generate_weekly_plan(profile)
+        seeded.append(LoadTestUser(
+            email=profile.user.email,
+            password=password,
+            daily_workout_ids=[day['id'] for day in plan.snapshot['days']],
+        ))
+    return seeded
+
+
+def delete_load_test_users(prefix: str) -> int:
+    """Remove seeded and signed-up load test users along with their plans."""
+    deleted, _ = User.objects.filter(username__startswith=prefix).delete()
+    return deleted
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request of the load test."""
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@contextmanager
+def local_server(host: str = '127.0.0.1') -> Iterator[str]:
+    """Serve the project on a free local port in a background thread and yield its base URL."""
+    server = ThreadedWSGIServer((host, 0), QuietRequestHandler)
+    server.set_app(WSGIHandler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class VirtualUser:
+    """One simulated browser, logged in as one seeded account."""
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str, account: LoadTestUser, step: StepResult, signup_prefix: str):
+        self.session = session
+        self.base_url = base_url
+        self.account = account
+        self.step = step
+        self.signup_prefix = signup_prefix
+
+    async def _csrf_token(self, session: aiohttp.ClientSession, name: str, path: str) -> Optional[str]:
+        """The CSRF token of the form at path, or None after recording the failure under name."""
+        started = time.perf_counter()
+        try:
+            async with session.get(self.base_url + path) as response:
+                match = _CSRF_TOKEN.search(await response.text())
+                error = None if match else f'No CSRF token (HTTP {response.status})'
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            match, error = None, type(e).__name__
+        if match is None:
+            self.step.stats.setdefault(name, UrlStats()).record(time.perf_counter() - started, error)
+            return None
+        return match.group(1)
+
+    async def _timed(
+        self,
+        session: aiohttp.ClientSession,
+        name: str,
+        method: str,
+        path: str,
+        data: Optional[Dict[str, Any]] = None,
+        expected: int = 200,
+    ) -> None:
+        """Make one request and record its latency and outcome under name."""
+        started = time.perf_counter()
+        error = None
+        try:
+            async with session.request(method, self.base_url + path, data=data, allow_redirects=False) as response:
+                await response.read()
+                if response.status != expected:
+                    error = f'HTTP {response.status}'
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = type(e).__name__
+        self.step.stats.setdefault(name, UrlStats()).record(time.perf_counter() - started, error)
+
+    async def login(self) -> None:
+        # Fetching the form is not timed; the POST through EmailBackend is
+        token = await self._csrf_token(self.session, 'login', reverse('login'))
+        if token is None:
+            return
+        data = {
+            'csrfmiddlewaretoken': token,
+            'username': self.account.email,
+            'password': self.account.password,
+        }
+        await self._timed(self.session, 'login', 'POST', reverse('login'), data, expected=302)
+
+    async def signup(self) -> None:
+        # A separate cookie jar, so signing up does not log this virtual user out
+        async with aiohttp.ClientSession(
+            connector=self.session.connector, connector_owner=False, cookie_jar=aiohttp.CookieJar(unsafe=True)
+        ) as session:
+            token = await self._csrf_token(session, 'signup', reverse('signup'))
+            if token is None:
+                return
+            data = {
+                'csrfmiddlewaretoken': token,
+                'email': f'{self.signup_prefix}{uuid.uuid4().hex[:12]}@example.com',
+                'password1': self.account.password,
+                'password2': self.account.password,
+                'goal': 'strength',
+                'workouts_per_week': 3,
+                'available_equipment': 'dumbbells',
+            }
+            await self._timed(session, 'signup', 'POST', reverse('signup'), data, expected=302)
+
+    async def run(self, mix: Dict[str, int], deadline: float, rng: random.Random) -> None:
+        """Log in, then make requests drawn from mix until the deadline."""
+        await self.login()
+        names = [name for name, weight in mix.items() if weight > 0]
+        weights = [mix[name] for name in names]
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            if name == 'login':
+                await self.login()
+            elif name == 'signup':
+                await self.signup()
+            elif name == 'workout_plan':
+                await self._timed(self.session, name, 'GET', reverse('workout_plan'))
+            else:
+                day_id = rng.choice(self.account.daily_workout_ids)
+                await self._timed(self.session, name, 'GET', reverse('daily_workout', args=[day_id]))
+
+
+async def run_step(
+    base_url: str,
+    accounts: List[LoadTestUser],
+    concurrency: int,
+    duration: float,
+    mix: Dict[str, int],
+    signup_prefix: str,
+    seed: Optional[int] = None,
+) -> StepResult:
+    """Run `concurrency` virtual users against base_url for `duration` seconds."""
+    step = StepResult(concurrency=concurrency, elapsed=0.0)
+    rng = random.Random(seed)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    started = time.perf_counter()
+    deadline = time.monotonic() + duration
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as pool:
+        async def virtual_user(account: LoadTestUser) -> None:
+            # Cookies are per virtual user; the connection pool is shared
+            async with aiohttp.ClientSession(
+                connector=pool.connector, connector_owner=False, timeout=timeout, cookie_jar=aiohttp.CookieJar(unsafe=True)
+            ) as session:
+                await VirtualUser(session, base_url, account, step, signup_prefix).run(mix, deadline, random.Random(rng.random()))
+
+        await asyncio.gather(*(virtual_user(account) for account in itertools.islice(itertools.cycle(accounts), concurrency)))
+    step.elapsed = time.perf_counter() - started
+    return step
+
+
+def new_run_prefix() -> str:
+    """Username prefix marking every account created by one load test run."""
+    return f'loadtest-{uuid.uuid4().hex[:8]}-'
@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import Callable, Dict, List
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from .fake_provider import FakeAIProvider
+from .harness import BenchmarkResult, time_calls
+from ..models import DailyWorkout, UserProfile, WorkoutPlan
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+DRY_RUN_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Simulated model speed for the generation benchmarks: a fixed overhead per call plus
+# serial output, scaled down roughly 100x from a real model so a run takes seconds
+SIMULATED_CALL_LATENCY = 0.01
+SIMULATED_TOKEN_LATENCY = 0.0002
+
+
+@dataclass
+class BenchmarkContext:
+    """Seeded users, each with a generated plan for the current week."""
+    profiles: List[UserProfile]
+    provider: FakeAIProvider
+    repeat: int
+    plans: Dict[int, WorkoutPlan] = field(default_factory=dict)
+
+
+def seed_benchmark_data(users: int, exercises_per_day: int, repeat: int) -> BenchmarkContext:
+    """Create users with profiles and persist a generated plan for each of them."""
+    seeded_users = User.objects.bulk_create([
+        User(username=f'bench-{i}@example.com', email=f'bench-{i}@example.com', password='!')
+        for i in range(users)
+    ])
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(user=user, goal='strength', workouts_per_week=4, available_equipment=['dumbbells', 'bench'])
+        for user in seeded_users
+    ])
+    provider = FakeAIProvider(exercises_per_day=exercises_per_day)
+    context = BenchmarkContext(profiles=profiles, provider=provider, repeat=repeat)
+    generator = WorkoutPlanGenerator(provider)
+    for profile in profiles:
+        context.plans[profile.user_id] = generator.generate_weekly_plan(profile)
+    return context
+
+
+def bench_plan_persistence(context: BenchmarkContext) -> BenchmarkResult:
+    """Time generate_weekly_plan end to end with the model call stubbed out."""
+    generator = WorkoutPlanGenerator(context.provider)
+    profile = context.profiles[0]
+    samples = time_calls(lambda: generator.generate_weekly_plan(profile), context.repeat)
+    # Each run replaced the user's plan for the week
+    context.plans[profile.user_id] = WorkoutPlan.objects.filter(user=profile.user).latest('week_start_date')
+    return BenchmarkResult('plan_persistence', 's', samples)
+
+
+def _bench_generation(context: BenchmarkContext, name: str, strategy: str) -> BenchmarkResult:
+    """Time generate_weekly_plan with a strategy against a provider that simulates model latency."""
+    provider = FakeAIProvider(
+        exercises_per_day=context.provider.exercises_per_day,
+        latency=SIMULATED_CALL_LATENCY,
+        latency_per_token=SIMULATED_TOKEN_LATENCY,
+    )
+    generator = WorkoutPlanGenerator(provider, strategy=strategy)
+    profile = context.profiles[0]
+    samples = time_calls(lambda: generator.generate_weekly_plan(profile), context.repeat)
+    context.plans[profile.user_id] = WorkoutPlan.objects.filter(user=profile.user).latest('week_start_date')
+    return BenchmarkResult(name, 's', samples)
+
+
+def bench_generation_single(context: BenchmarkContext) -> BenchmarkResult:
+    """Wall time of a plan requested in one completion."""
+    return _bench_generation(context, 'plan_generation_single', 'single')
+
+
+def bench_generation_fan_out(context: BenchmarkContext) -> BenchmarkResult:
+    """Wall time of a plan requested as a split followed by concurrent days."""
+    return _bench_generation(context, 'plan_generation_fan_out', 'fan_out')
+
+
+def _render_samples(context: BenchmarkContext, url_for: Callable[[WorkoutPlan], str]) -> List[float]:
+    """Time one GET per seeded user through the full middleware stack."""
+    client = Client()
+    samples = []
+    # Client requests use the 'testserver' host, which the test runner normally allows
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for _ in range(context.repeat):
+            for profile in context.profiles:
+                client.force_login(profile.user)
+                url = url_for(context.plans[profile.user_id])
+                started = time.perf_counter()
+                response = client.get(url)
+                samples.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise RuntimeError(f'GET {url} returned {response.status_code}')
+    return samples
+
+
+def bench_weekly_view(context: BenchmarkContext) -> BenchmarkResult:
+    samples = _render_samples(context, lambda plan: reverse('workout_plan'))
+    return BenchmarkResult('weekly_plan_view', 's', samples)
+
+
+def bench_daily_view(context: BenchmarkContext) -> BenchmarkResult:
+    def url_for(plan: WorkoutPlan) -> str:
+        daily_workout = DailyWorkout.objects.filter(workout_plan=plan).order_by('day_index').first()
+        return reverse('daily_workout', args=[daily_workout.pk])
+
+    samples = _render_samples(context, url_for)
+    return BenchmarkResult('daily_workout_view', 's', samples)
+
+
+def _dispatch_throughput(context: BenchmarkContext, command: str, *args: str) -> List[float]:
+    """Messages per second of a dry-run send command, including its queries and rendering."""
+    samples = []
+    for _ in range(context.repeat):
+        mail.outbox = []
+        started = time.perf_counter()
+        call_command(command, *args, '--dry-run', stdout=StringIO())
+        elapsed = time.perf_counter() - started
+        if not mail.outbox:
+            raise RuntimeError(f'{command} sent no messages')
+        samples.append(len(mail.outbox) / elapsed)
+    return samples
+
+
+def bench_send_workout(context: BenchmarkContext) -> BenchmarkResult:
+    week_start = context.plans[context.profiles[0].user_id].week_start_date
+    samples = _dispatch_throughput(context, 'send_workout', '--date', week_start.isoformat())
+    return BenchmarkResult('send_workout', 'messages/s', samples, higher_is_better=True)
+
+
+def bench_send_daily_workout(context: BenchmarkContext) -> BenchmarkResult:
+    # Dry runs leave workouts unsent, so every run sends the same queue
+    first_day = context.plans[context.profiles[0].user_id].week_start_date
+    samples = _dispatch_throughput(context, 'send_daily_workout', '--date', first_day.isoformat())
+    return BenchmarkResult('send_daily_workout', 'messages/s', samples, higher_is_better=True)
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], BenchmarkResult]] = {
+    'plan_persistence': bench_plan_persistence,
+    'plan_generation_single': bench_generation_single,
+    'plan_generation_fan_out': bench_generation_fan_out,
+    'weekly_plan_view': bench_weekly_view,
+    'daily_workout_view': bench_daily_view,
+    'send_workout': bench_send_workout,
+    'send_daily_workout': bench_send_daily_workout,
+}
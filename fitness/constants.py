@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 # Equipment choices used across models
 EQUIPMENT_CHOICES: List[Tuple[str, str]] = [
@@ -32,4 +32,25 @@ GOAL_CHOICES: List[Tuple[str, str]] = [
     ('flexibility', 'Flexibility'),
     ('weight_loss', 'Weight Loss'),
     ('general_fitness', 'General Fitness'),
-] 
\ No newline at end of file
+] 
+# Days of the week in plan order; weekly plans start on Sunday
+DAYS_OF_WEEK: List[str] = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+DAY_INDEX: Dict[str, int] = {day: index for index, day in enumerate(DAYS_OF_WEEK)}
+
+# Plan generation job states
+JOB_STATUS_PENDING = 'pending'
+JOB_STATUS_RUNNING = 'running'
+JOB_STATUS_SUCCEEDED = 'succeeded'
+JOB_STATUS_FAILED = 'failed'
+
+JOB_STATUS_CHOICES: List[Tuple[str, str]] = [
+    (JOB_STATUS_PENDING, 'Pending'),
+    (JOB_STATUS_RUNNING, 'Running'),
+    (JOB_STATUS_SUCCEEDED, 'Succeeded'),
+    (JOB_STATUS_FAILED, 'Failed'),
+]
+
+ACTIVE_JOB_STATUSES: List[str] = [JOB_STATUS_PENDING, JOB_STATUS_RUNNING]
+
+# Layout of WorkoutPlan.snapshot; bump when it changes so stored snapshots are rebuilt
+PLAN_SNAPSHOT_VERSION = 1
@@ -2,7 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from typing import Any, Dict
-from .models import UserProfile
+from .models import UserProfile, users_with_email
 from .constants import GOAL_CHOICES, EQUIPMENT_CHOICES
 
 class SignUpForm(UserCreationForm):
@@ -51,7 +51,7 @@ class SignUpForm(UserCreationForm):
         email = self.cleaned_data.get('email')
         if email is None:
             raise forms.ValidationError("Email is required.")
-        if User.objects.filter(email=email).exists():
+        if users_with_email(email).exists():
             raise forms.ValidationError("A user with this email already exists.")
         return email
 
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+from datetime import timedelta
+from fitness.models import AICallMetric
+from fitness.services.stats import percentile
+
+class Command(BaseCommand):
+    help = 'Summarizes recorded AI provider calls: latency percentiles, token usage and call rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Only include calls from the last N hours (default: 24)')
+        parser.add_argument('--provider', type=str, help='Only include calls to this provider')
+        parser.add_argument('--model', type=str, help='Only include calls to this model')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        calls = AICallMetric.objects.filter(started_at__gte=since)
+        if options['provider']:
+            calls = calls.filter(provider=options['provider'])
+        if options['model']:
+            calls = calls.filter(model=options['model'])
+
+        rows = list(calls.values(
+            'trace_id', 'started_at', 'wall_time', 'time_to_first_token',
+            'prompt_tokens', 'completion_tokens', 'retries', 'error_class'
+        ))
+        if not rows:
+            self.stdout.write(self.style.WARNING(f'No AI calls recorded in the last {options["hours"]:g} hours'))
+            return
+
+        succeeded = [row for row in rows if not row['error_class']]
+        wall_times = [row['wall_time'] for row in succeeded]
+        ttfts = [row['time_to_first_token'] for row in succeeded if row['time_to_first_token'] is not None]
+
+        span_minutes = max((timezone.now() - min(row['started_at'] for row in rows)).total_seconds() / 60, 1)
+
+        self.stdout.write(self.style.SUCCESS(f'AI calls in the last {options["hours"]:g} hours'))
+        self.stdout.write(f'  Calls: {len(rows)} ({len(rows) - len(succeeded)} failed, {sum(row["retries"] for row in rows)} retries)')
+        self.stdout.write(f'  Calls per minute: {len(rows) / span_minutes:.2f}')
+        self._write_percentiles('Wall time', wall_times)
+        self._write_percentiles('Time to first token', ttfts)
+
+        # Calls made for the same plan share a trace id
+        plans = {}
+        for row in succeeded:
+            if row['prompt_tokens'] is None:
+                continue
+            key = row['trace_id'] or id(row)
+            prompt, completion = plans.get(key, (0, 0))
+            plans[key] = (prompt + row['prompt_tokens'], completion + (row['completion_tokens'] or 0))
+        if plans:
+            prompt_tokens = [prompt for prompt, _ in plans.values()]
+            completion_tokens = [completion for _, completion in plans.values()]
+            self.stdout.write(f'  Tokens per plan ({len(plans)} plans):')
+            self.stdout.write(f'    prompt      avg {sum(prompt_tokens) / len(plans):.0f}  p95 {percentile(prompt_tokens, 95):.0f}')
+            self.stdout.write(f'    completion  avg {sum(completion_tokens) / len(plans):.0f}  p95 {percentile(completion_tokens, 95):.0f}')
+
+        errors = calls.exclude(error_class='').values('error_class').annotate(count=Count('id')).order_by('-count')
+        if errors:
+            self.stdout.write('  Errors:')
+            for error in errors:
+                self.stdout.write(f'    {error["error_class"]}: {error["count"]}')
+
+    def _write_percentiles(self, label, values):
+        if not values:
+            return
+        self.stdout.write(
+            f'  {label}: p50 {percentile(values, 50):.2f}s  p95 {percentile(values, 95):.2f}s  '
+            f'p99 {percentile(values, 99):.2f}s  max {max(values):.2f}s'
+        )
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from fitness.models import AICallMetric, UserProfile
+from fitness.services.ai_metrics import metrics_trace
+from fitness.services.ai_providers import get_ai_provider
+from fitness.services.plan_prompt import PROMPT_VARIANTS, PlanPromptBuilder
+from fitness.services.stats import percentile
+import time
+
+class Command(BaseCommand):
+    help = 'Compares input tokens, output tokens and latency of the weekly plan prompt variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-ids', type=int, nargs='+', help='Profiles to build prompts for (default: up to 20 profiles)')
+        parser.add_argument('--samples', type=int, default=50, help='Most recent recorded calls measured per variant (default: 50)')
+        parser.add_argument('--model', type=str, default='gpt-4', help='Model whose tokenizer is used for counting (default: gpt-4)')
+        parser.add_argument('--live', type=int, default=0, help='Send N uncached requests per variant first, so every variant has measured calls')
+        parser.add_argument('--provider', type=str, default='openai', help='Provider used with --live (default: openai)')
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.select_related('user').order_by('pk')
+        if options['user_ids']:
+            profiles = profiles.filter(user_id__in=options['user_ids'])
+        profiles = list(profiles[:20])
+        if not profiles:
+            raise CommandError('No user profiles to build prompts for')
+
+        if options['live']:
+            self._run_live(profiles, options)
+
+        self.stdout.write(self.style.SUCCESS(f'Prompt variants over {len(profiles)} profiles'))
+        for variant in PROMPT_VARIANTS:
+            builder = PlanPromptBuilder(variant)
+            counts = [builder.token_counts(profile, options['model']) for profile in profiles]
+            prompt_tokens = sum(count['messages'] for count in counts) / len(counts)
+            schema_tokens = counts[0]['schema']
+
+            self.stdout.write(f'{variant}:')
+            self.stdout.write(f'  Input tokens: {prompt_tokens:.0f} prompt + {schema_tokens} schema')
+            self._report_measured(variant, options['samples'])
+
+    def _report_measured(self, variant, samples):
+        """Report token usage and latency of recorded successful whole-week calls built with a variant."""
+        calls = list(
+            AICallMetric.objects.filter(prompt_variant=variant, error_class='', completion_tokens__isnull=False)
+            .order_by('-started_at')
+            .values_list('prompt_tokens', 'completion_tokens', 'wall_time')[:samples]
+        )
+        if not calls:
+            self.stdout.write(f'  No recorded calls (generate plans with AI_PLAN_PROMPT_VARIANT={variant}, or use --live)')
+            return
+        prompt_tokens = [tokens for tokens, _, _ in calls if tokens is not None]
+        completion_tokens = [tokens for _, tokens, _ in calls]
+        latencies = [wall_time for _, _, wall_time in calls]
+        self.stdout.write(f'  Measured over {len(calls)} recorded calls:')
+        if prompt_tokens:
+            self.stdout.write(
+                f'    Tokens: {sum(prompt_tokens) / len(prompt_tokens):.0f} input, '
+                f'{sum(completion_tokens) / len(completion_tokens):.0f} output'
+            )
+        else:
+            self.stdout.write(f'    Tokens: {sum(completion_tokens) / len(completion_tokens):.0f} output')
+        self.stdout.write(f'    Latency: p50 {percentile(latencies, 50):.1f}s  p95 {percentile(latencies, 95):.1f}s')
+
+    def _run_live(self, profiles, options):
+        """Send uncached requests per variant; they are recorded and measured with the other calls."""
+        if not settings.AI_METRICS_ENABLED:
+            raise CommandError('--live needs AI_METRICS_ENABLED so its calls are recorded')
+        provider = get_ai_provider(options['provider'], cache=False)
+        self.stdout.write(self.style.SUCCESS(f'Live requests to {options["provider"]} ({options["live"]} per variant)'))
+        for variant in PROMPT_VARIANTS:
+            builder = PlanPromptBuilder(variant)
+            for i in range(options['live']):
+                messages = builder.build_messages(profiles[i % len(profiles)])
+                with metrics_trace(prompt_variant=variant):
+                    started = time.perf_counter()
+                    try:
+                        provider.generate_completion(messages, response_schema=builder.response_schema())
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f'  {variant} request failed: {e}'))
+                        continue
+                self.stdout.write(f'  {variant} request {i + 1}: {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+from datetime import timedelta
+from fitness.models import CachedCompletion
+from fitness.services.completion_cache import DatabaseCompletionStore
+
+class Command(BaseCommand):
+    help = 'Reports statistics for the database-backed AI completion cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purge-expired', action='store_true', help='Delete entries older than the configured TTL')
+        parser.add_argument('--evict', action='store_true', help='Delete least recently used keys beyond the configured maximum')
+        parser.add_argument('--clear', action='store_true', help='Delete every cached completion')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = CachedCompletion.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} cached completions'))
+            return
+
+        if options['purge_expired']:
+            cutoff = timezone.now() - timedelta(seconds=settings.AI_COMPLETION_CACHE['TTL'])
+            deleted, _ = CachedCompletion.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired completions'))
+
+        if options['evict']:
+            evicted = DatabaseCompletionStore().evict(settings.AI_COMPLETION_CACHE['MAX_ENTRIES'])
+            self.stdout.write(self.style.SUCCESS(f'Evicted {evicted} least recently used keys'))
+
+        totals = CachedCompletion.objects.aggregate(
+            variants=Count('id'),
+            keys=Count('key', distinct=True),
+            hits=Sum('hits'),
+        )
+        hits = totals['hits'] or 0
+        # Every stored variant was produced by one cache miss
+        misses = totals['variants']
+        lookups = hits + misses
+
+        self.stdout.write(f'Keys: {totals["keys"]} (max {settings.AI_COMPLETION_CACHE["MAX_ENTRIES"]})')
+        self.stdout.write(f'Variants: {totals["variants"]}')
+        self.stdout.write(f'Hits: {hits}')
+        self.stdout.write(f'Misses: {misses}')
+        self.stdout.write(f'Hit rate: {hits / lookups if lookups else 0:.1%}')
+
+        for model, count in CachedCompletion.objects.values_list('model').annotate(count=Count('id')).order_by('-count'):
+            self.stdout.write(f'  {model or "unknown"}: {count} variants')
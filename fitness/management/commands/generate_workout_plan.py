@@ -1,23 +1,104 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from fitness.constants import GOAL_CHOICES
 from fitness.models import UserProfile, WorkoutPlan
+from fitness.services.batch_generation import GenerationResult
+from fitness.services.plan_jobs import acquire_jobs, generate_single_flight, process_jobs
 from fitness.services.workout_plan_generator import WorkoutPlanGenerator
-from fitness.services.ai_providers import OpenAIProvider
+from fitness.services.ai_providers import get_ai_provider
+from fitness.services.completion_cache import CachedAIProvider
+from fitness.services.hedged_provider import find_hedged_provider
 from datetime import datetime, timedelta
 import json
 
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = 'Generates a workout plan for a specified user'
+    help = 'Generates a workout plan for a specified user, or for many users concurrently'
 
     def add_arguments(self, parser):
-        parser.add_argument('email', type=str, help='Email of the user to generate workout plan for')
+        parser.add_argument('email', type=str, nargs='?', help='Email of the user to generate workout plan for')
         parser.add_argument('--days', type=int, default=7, help='Number of days to generate plan for (default: 7)')
         parser.add_argument('--debug', action='store_true', help='Print debug information')
+        parser.add_argument('--stream', action='store_true', help='Stream the completion and save each day as soon as it is generated')
+        parser.add_argument('--remaining', action='store_true', help="Only regenerate the rest of this week's plan, keeping past and already sent days")
+        parser.add_argument('--all', action='store_true', help='Generate plans for every user with a profile')
+        parser.add_argument('--user-ids', type=int, nargs='+', help='Generate plans for these user IDs')
+        parser.add_argument('--goal', type=str, choices=[choice[0] for choice in GOAL_CHOICES], help='Generate plans for users with this goal')
+        parser.add_argument('--concurrency', type=int, default=8, help='Maximum number of AI requests in flight in batch mode (default: 8)')
+        parser.add_argument('--provider', type=str, default='openai', help='AI provider to generate with, e.g. openai or hedged (default: openai)')
 
     def handle(self, *args, **options):
+        email = options['email']
+        batch_mode = options['all'] or options['user_ids'] or options['goal']
+
+        if email and batch_mode:
+            raise CommandError('Pass either an email or one of --all/--user-ids/--goal, not both')
+        if not email and not batch_mode:
+            raise CommandError('Pass an email or one of --all/--user-ids/--goal')
+        if options['remaining'] and batch_mode:
+            raise CommandError('--remaining is only supported for a single user')
+
+        if batch_mode:
+            self.handle_batch(options)
+        else:
+            self.handle_single(options)
+
+    def handle_batch(self, options):
+        profiles = UserProfile.objects.select_related('user').order_by('pk')
+        if options['user_ids']:
+            profiles = profiles.filter(user_id__in=options['user_ids'])
+        if options['goal']:
+            profiles = profiles.filter(goal=options['goal'])
+        profiles = list(profiles)
+
+        if not profiles:
+            self.stdout.write(self.style.WARNING('No user profiles matched the given filters'))
+            return
+
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(f'Generating workout plans for {len(profiles)} users with concurrency {concurrency}')
+
+        ai_provider = get_ai_provider(options['provider'])
+        generator = WorkoutPlanGenerator(ai_provider=ai_provider)
+
+        def report(result: GenerationResult) -> None:
+            email = result.profile.user.email
+            if result.succeeded:
+                self.stdout.write(self.style.SUCCESS(f'Created plan {result.plan.pk} for {email} in {result.latency:.1f}s'))
+            else:
+                self.stderr.write(self.style.ERROR(f'Error generating workout plan for {email}: {result.error}'))
+
+        # Users already being generated elsewhere are skipped rather than generated twice
+        jobs = acquire_jobs(profiles)
+        for profile in profiles:
+            if profile.user_id not in jobs:
+                self.stdout.write(self.style.WARNING(f'Skipping {profile.user.email}: a plan is already being generated'))
+        summary = process_jobs(list(jobs.values()), generator, concurrency=concurrency, on_result=report)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {summary.succeeded}/{len(profiles)} plans in {summary.elapsed:.1f}s '
+            f'({summary.plans_per_minute:.1f} plans/min, {summary.failed} failed)'
+        ))
+        self.stdout.write(
+            f'Latency p50: {summary.latency_percentile(50):.1f}s  '
+            f'p95: {summary.latency_percentile(95):.1f}s  '
+            f'max: {summary.latency_percentile(100):.1f}s'
+        )
+        if isinstance(ai_provider, CachedAIProvider):
+            stats = ai_provider.stats()
+            self.stdout.write(f'Completion cache: {stats["hits"]} hits, {stats["misses"]} misses ({stats["hit_rate"]:.0%} hit rate)')
+        hedged_provider = find_hedged_provider(ai_provider)
+        if hedged_provider is not None:
+            stats = hedged_provider.stats()
+            self.stdout.write(
+                f'Hedging: {stats["hedged"]}/{stats["requests"]} requests hedged ({stats["hedge_rate"]:.0%}), '
+                f'backup won {stats["backup_wins"]} ({stats["backup_win_rate"]:.0%} of hedges), '
+                f'delay now {stats["hedge_delay"]:.1f}s'
+            )
+
+    def handle_single(self, options):
         email = options['email']
         days = options['days']
         debug = options['debug']
@@ -42,13 +123,22 @@ class Command(BaseCommand):
             self.stdout.write(f'  Available equipment: {profile.available_equipment}')
             self.stdout.write(f'  Fitness level: {profile.fitness_level}')
 
-        # Initialize the workout plan generator with OpenAI provider
-        ai_provider = OpenAIProvider()
+        # Initialize the workout plan generator with the (cached) OpenAI provider
+        ai_provider = get_ai_provider(options['provider'])
         generator = WorkoutPlanGenerator(ai_provider=ai_provider)
 
-        # Generate the workout plan
+        def report_workout(workout):
+            self.stdout.write(f'Saved {workout.day}: {workout.focus}')
+
+        # Generate the workout plan, or wait for a generation already in flight for this user
         try:
-            plan = generator.generate_weekly_plan(user_profile=profile)
+            plan = generate_single_flight(
+                generator,
+                profile,
+                stream=options['stream'],
+                on_workout=report_workout if options['stream'] else None,
+                remaining_only=options['remaining']
+            )
 
             self.stdout.write(self.style.SUCCESS(f'Successfully created workout plan for {email}'))
             self.stdout.write(f'Plan ID: {plan.pk}')
@@ -0,0 +1,77 @@
+from asgiref.sync import async_to_sync
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand, CommandError
+from fitness.benchmarks.load_test import (
+    DEFAULT_MIX, delete_load_test_users, local_server, new_run_prefix, parse_mix, run_step, seed_load_test_users,
+)
+import json
+
+class Command(BaseCommand):
+    help = 'Drives the signup, login, weekly plan and daily workout pages over HTTP at rising concurrency and reports throughput, latency percentiles and error rates per URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', type=str, help='Server to load, e.g. http://127.0.0.1:8000 (default: serve this project on a free local port)')
+        parser.add_argument('--users', type=int, default=20, help='Number of accounts to seed with a fake-provider plan (default: 20)')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 5, 10, 20], help='Concurrent virtual users, one step per value (default: 1 5 10 20)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run each step (default: 10)')
+        parser.add_argument('--mix', type=str, help='Weighted request mix, e.g. "workout_plan=10,daily_workout=8,login=1,signup=1"')
+        parser.add_argument('--password', type=str, default='load-test-Passw0rd!', help='Password of the seeded accounts')
+        parser.add_argument('--seed', type=int, help='Random seed for the request mix')
+        parser.add_argument('--output', type=str, help='Write the report as JSON to this file')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the seeded and signed-up accounts afterwards')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] else DEFAULT_MIX
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['users'] < 1 or min(options['concurrency']) < 1:
+            raise CommandError('--users and --concurrency must be at least 1')
+
+        prefix = new_run_prefix()
+        accounts = seed_load_test_users(options['users'], options['password'], prefix)
+        self.stdout.write(f'Seeded {len(accounts)} accounts ({prefix}*)')
+
+        steps = []
+        try:
+            if options['base_url']:
+                server = nullcontext(options['base_url'].rstrip('/'))
+            else:
+                server = local_server()
+            with server as base_url:
+                for concurrency in options['concurrency']:
+                    step = async_to_sync(run_step)(
+                        base_url, accounts, concurrency, options['duration'], mix, prefix, options['seed']
+                    )
+                    steps.append(step)
+                    self._write_step(step)
+        finally:
+            if not options['keep_data']:
+                delete_load_test_users(prefix)
+
+        report = {
+            'base_url': options['base_url'] or 'local',
+            'users': len(accounts),
+            'duration': options['duration'],
+            'mix': mix,
+            'steps': [step.to_dict() for step in steps],
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Wrote the report to {options["output"]}'))
+
+    def _write_step(self, step):
+        total = step.to_dict()['total']
+        self.stdout.write(self.style.SUCCESS(
+            f'Concurrency {step.concurrency}: {total["requests_per_second"]:.1f} req/s, '
+            f'p50 {total["latency_ms"]["p50"]:.0f}ms  p99 {total["latency_ms"]["p99"]:.0f}ms, '
+            f'{total["error_rate"]:.1%} errors'
+        ))
+        for name, stats in sorted(step.stats.items()):
+            data = stats.to_dict(step.elapsed)
+            self.stdout.write(
+                f'  {name:<15} {data["requests"]:6d} req  {data["requests_per_second"]:7.1f}/s  '
+                f'p50 {data["latency_ms"]["p50"]:6.0f}ms  p99 {data["latency_ms"]["p99"]:6.0f}ms  '
+                f'errors {data["error_rate"]:.1%}'
+            )
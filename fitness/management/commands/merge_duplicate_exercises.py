@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from fitness.models import Exercise, ExerciseSet, WorkoutPlan
+
+class Command(BaseCommand):
+    help = 'Merges exercises that share a canonical key and repoints their exercise sets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report duplicates without changing anything')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        # Recompute every key: canonical_key is unique, but rows keyed before the
+        # normalization last changed can still be near-duplicates of each other
+        groups = {}
+        for exercise in Exercise.objects.only('id', 'name', 'muscle_groups', 'canonical_key').order_by('pk'):
+            key = Exercise.make_canonical_key(exercise.name, exercise.muscle_groups or [])
+            groups.setdefault(key, []).append(exercise)
+        # Only the row kept for each key is re-keyed, after its duplicates are gone
+        stale = []
+        for key, exercises in groups.items():
+            if exercises[0].canonical_key != key:
+                exercises[0].canonical_key = key
+                stale.append(exercises[0])
+        groups = {key: exercises for key, exercises in groups.items() if len(exercises) > 1}
+
+        if not groups:
+            if stale and not dry_run:
+                Exercise.objects.bulk_update(stale, ['canonical_key'], batch_size=500)
+                self.stdout.write(f'Refreshed {len(stale)} canonical keys')
+            self.stdout.write(self.style.SUCCESS('No duplicate exercises found'))
+            return
+
+        merged = 0
+        repointed = 0
+        affected_plan_ids = set()
+        with transaction.atomic():
+            for exercises in groups.values():
+                # Keep the oldest row so existing references stay stable
+                keeper, duplicates = exercises[0], exercises[1:]
+                duplicate_ids = [exercise.pk for exercise in duplicates]
+                self.stdout.write(
+                    f'{keeper.name} (#{keeper.pk}) <- ' +
+                    ', '.join(f'{exercise.name} (#{exercise.pk})' for exercise in duplicates)
+                )
+                if dry_run:
+                    continue
+                repointed_sets = ExerciseSet.objects.filter(exercise_id__in=duplicate_ids)
+                affected_plan_ids.update(repointed_sets.values_list('daily_workout__workout_plan_id', flat=True))
+                repointed += repointed_sets.update(exercise=keeper)
+                Exercise.objects.filter(pk__in=duplicate_ids).delete()
+                merged += len(duplicates)
+            if not dry_run:
+                Exercise.objects.bulk_update(stale, ['canonical_key'], batch_size=500)
+            # Snapshots embed exercise details, so plans using a merged exercise are rebuilt
+            WorkoutPlan.rebuild_snapshots(WorkoutPlan.objects.filter(pk__in=affected_plan_ids))
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run: {len(groups)} exercises have duplicates'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Merged {merged} duplicate exercises and repointed {repointed} exercise sets'))
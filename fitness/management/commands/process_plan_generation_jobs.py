@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from fitness.services.ai_providers import get_ai_provider
+from fitness.services.hedged_provider import find_hedged_provider
+from fitness.services.plan_jobs import claim_jobs, process_jobs
+from fitness.services.workout_plan_generator import WorkoutPlanGenerator
+import time
+
+class Command(BaseCommand):
+    help = 'Runs a worker that claims queued plan generation jobs in batches and processes them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Number of jobs to claim at a time (default: 10)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Maximum number of AI requests in flight (default: 8)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty (default: 2)')
+        parser.add_argument('--provider', type=str, default='openai', help='AI provider to generate with, e.g. openai or hedged (default: openai)')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        ai_provider = get_ai_provider(options['provider'])
+        hedged_provider = find_hedged_provider(ai_provider)
+        generator = WorkoutPlanGenerator(ai_provider=ai_provider)
+        batch_size = max(1, options['batch_size'])
+
+        self.stdout.write(f'Plan generation worker started (batch size {batch_size}, concurrency {options["concurrency"]})')
+        try:
+            while True:
+                jobs = claim_jobs(batch_size)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                summary = process_jobs(jobs, generator, concurrency=options['concurrency'])
+                self.stdout.write(
+                    f'Processed {len(jobs)} jobs in {summary.elapsed:.1f}s '
+                    f'({summary.succeeded} succeeded, {len(jobs) - summary.succeeded} failed)'
+                )
+                if hedged_provider is not None:
+                    stats = hedged_provider.stats()
+                    self.stdout.write(
+                        f'Hedging so far: {stats["hedge_rate"]:.0%} of {stats["requests"]} requests hedged, '
+                        f'backup won {stats["backup_win_rate"]:.0%} of hedges'
+                    )
+        except KeyboardInterrupt:
+            self.stdout.write('Worker stopped')
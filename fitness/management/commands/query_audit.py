@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from fitness.services.query_audit import FULL_SCAN_PATTERNS, audit_hot_queries, seed_audit_data
+
+class Command(BaseCommand):
+    help = 'EXPLAINs the hot queries against seeded data and fails if any of them scans a whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of users to seed (default: 200)')
+        parser.add_argument('--weeks', type=int, default=4, help='Weeks of plans to seed per user (default: 4)')
+        parser.add_argument('--exercises', type=int, default=1000, help='Number of catalog exercises to seed (default: 1000)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'Query audit does not support the {connection.vendor} database')
+
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            sample = seed_audit_data(users=options['users'], weeks=options['weeks'], exercises=options['exercises'])
+            with connection.cursor() as cursor:
+                if connection.vendor == 'sqlite':
+                    # Give the planner realistic statistics for the seeded tables
+                    cursor.execute('ANALYZE')
+                else:
+                    # Small tables are cheaper to scan; only flag queries that cannot use an index at all
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            audits = audit_hot_queries(sample)
+            transaction.set_rollback(True)
+
+        for audit in audits:
+            if audit.passed:
+                self.stdout.write(self.style.SUCCESS(f'OK    {audit.name}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'SCAN  {audit.name}: full scan of {", ".join(audit.full_scans)}'))
+            if options['verbose_plans'] or not audit.passed:
+                for line in audit.plan.splitlines():
+                    self.stdout.write(f'        {line}')
+
+        failed = [audit.name for audit in audits if not audit.passed]
+        if failed:
+            raise CommandError(f'{len(failed)} hot queries fall back to a full table scan: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(audits)} hot queries use an index'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from fitness.constants import PLAN_SNAPSHOT_VERSION
+from fitness.models import WorkoutPlan
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized snapshot that plan pages render from'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every snapshot, not only missing or outdated ones')
+        parser.add_argument('--user-id', type=int, help='Only rebuild plans of this user')
+        parser.add_argument('--batch-size', type=int, default=200, help='Plans loaded and saved per batch (default: 200)')
+
+    def handle(self, *args, **options):
+        plans = WorkoutPlan.objects.all()
+        if not options['all']:
+            plans = plans.filter(
+                Q(snapshot__isnull=True) | Q(snapshot__version__isnull=True) | ~Q(snapshot__version=PLAN_SNAPSHOT_VERSION)
+            )
+        if options['user_id']:
+            plans = plans.filter(user_id=options['user_id'])
+
+        rebuilt = WorkoutPlan.rebuild_snapshots(plans, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} plan snapshots'))
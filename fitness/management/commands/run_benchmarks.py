@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from fitness.benchmarks.harness import default_baseline_path, find_regressions, load_baseline, result_to_dict, save_baseline
+from fitness.benchmarks.suites import BENCHMARKS, seed_benchmark_data
+from pathlib import Path
+import json
+
+class Command(BaseCommand):
+    help = 'Times plan persistence, page rendering and email dispatch against seeded data and compares them with a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='Benchmarks to run (default: all)')
+        parser.add_argument('--users', type=int, default=50, help='Number of users to seed (default: 50)')
+        parser.add_argument('--exercises-per-day', type=int, default=6, help='Exercises in each generated day (default: 6)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per benchmark (default: 5)')
+        parser.add_argument('--baseline', type=str, help='Baseline JSON file (default: fitness/benchmarks/baselines/<database>.json)')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression before failing (default: 0.25)')
+        parser.add_argument('--update-baseline', action='store_true', help='Record this run as the new baseline instead of comparing')
+        parser.add_argument('--output', type=str, help='Also write every sample of this run to a JSON file')
+
+    def handle(self, *args, **options):
+        names = options['only'] or list(BENCHMARKS)
+        baseline_path = Path(options['baseline']) if options['baseline'] else default_baseline_path()
+
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            context = seed_benchmark_data(
+                users=options['users'], exercises_per_day=options['exercises_per_day'], repeat=options['repeat']
+            )
+            results = []
+            for name in names:
+                result = BENCHMARKS[name](context)
+                results.append(result)
+                self.stdout.write(f'{name:<24} median {result.value:10.4f} {result.unit:<11} p95 {result.p95:10.4f}')
+            transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump([result_to_dict(result) for result in results], f, indent=2)
+
+        if options['update_baseline']:
+            save_baseline(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f'Recorded {len(results)} benchmarks in {baseline_path}'))
+            return
+
+        baseline = load_baseline(baseline_path)
+        if not baseline:
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; run with --update-baseline to record one'))
+            return
+
+        regressions = find_regressions(results, baseline, options['tolerance'])
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'REGRESSION {regression.name}: {regression.value:.4f} {regression.unit} '
+                f'vs baseline {regression.baseline:.4f} ({regression.change:+.0%})'
+            ))
+        if regressions:
+            raise CommandError(f'{len(regressions)} benchmarks regressed beyond {options["tolerance"]:.0%} of the baseline')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} benchmarks within {options["tolerance"]:.0%} of the baseline'))
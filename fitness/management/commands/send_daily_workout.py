@@ -1,10 +1,11 @@
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
-from django.conf import settings
 from django.utils import timezone
 from datetime import datetime
-from typing import Dict, Any
 from fitness.models import DailyWorkout
+from fitness.services.email_dispatch import OutgoingEmail, dispatch_emails
+
+DRY_RUN_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+QUEUE_PAGE_SIZE = 2000
 
 class Command(BaseCommand):
     help = 'Sends daily workouts to users'
@@ -13,6 +14,10 @@ class Command(BaseCommand):
         parser.add_argument('--user-id', type=int, help='Specific user ID to send workout to')
         parser.add_argument('--plan-id', type=int, help='Specific workout plan ID to send from')
         parser.add_argument('--date', type=str, help='Specific date to send (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Messages sent per connection (default: 100)')
+        parser.add_argument('--workers', type=int, default=1, help='Connections used concurrently (default: 1)')
+        parser.add_argument('--backend', type=str, help='Email backend to send through (default: EMAIL_BACKEND)')
+        parser.add_argument('--dry-run', action='store_true', help='Send through the in-memory backend, report throughput and leave workouts unsent')
 
     def handle(self, *args, **options):
         today = timezone.now().date()
@@ -36,26 +41,39 @@ class Command(BaseCommand):
         if options['plan_id']:
             daily_workouts = daily_workouts.filter(workout_plan_id=options['plan_id'])
         
-        if not daily_workouts.exists():
+        queue = daily_workouts.select_related('workout_plan__user').prefetch_related('exercise_sets__exercise').order_by('pk')
+        if not queue.exists():
             self.stdout.write(self.style.WARNING(f'No unsent workouts found for {target_date}'))
             return
-        
-        for daily_workout in daily_workouts:
-            try:
-                user = daily_workout.workout_plan.user
-                
-                # Send daily workout email
-                send_mail(
-                    subject=f'Your Workout for {target_date.strftime("%A")}',
-                    message=daily_workout.workout_text,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=False,
-                )
-                
-                # Mark as sent
-                daily_workout.mark_as_sent()
-                
-                self.stdout.write(self.style.SUCCESS(f'Sent daily workout to {user.email}'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Failed to send daily workout to {user.email}: {str(e)}'))
+
+        subject = f'Your Workout for {target_date.strftime("%A")}'
+        # Rows are fetched (and their exercises prefetched) in pages as the dispatcher consumes them
+        emails = (
+            OutgoingEmail(
+                key=daily_workout.pk,
+                recipient=daily_workout.workout_plan.user.email,
+                subject=subject,
+                body=daily_workout.workout_text
+            )
+            for daily_workout in queue.iterator(chunk_size=QUEUE_PAGE_SIZE)
+        )
+        backend = options['backend'] or (DRY_RUN_BACKEND if options['dry_run'] else None)
+
+        def mark_chunk_sent(chunk_result):
+            # Flagged per chunk, so a run that dies partway is not re-sent in full
+            DailyWorkout.mark_all_as_sent(email.key for email in chunk_result.sent)
+
+        result = dispatch_emails(
+            emails,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            backend=backend,
+            on_chunk=None if options['dry_run'] else mark_chunk_sent
+        )
+
+        for failure in result.failures:
+            self.stdout.write(self.style.ERROR(f'Failed to send daily workout to {failure.recipient}: {failure.error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {len(result.sent)} daily workouts in {result.elapsed:.2f}s '
+            f'({result.messages_per_second:.1f} messages/s, {len(result.failures)} failed)'
+        ))
@@ -1,10 +1,10 @@
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
-from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
-from typing import Dict, Any
 from fitness.models import WorkoutPlan
+from fitness.services.email_dispatch import OutgoingEmail, dispatch_emails
+
+DRY_RUN_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
 class Command(BaseCommand):
     help = 'Sends weekly workout plans to users'
@@ -13,6 +13,10 @@ class Command(BaseCommand):
         parser.add_argument('--user-id', type=int, help='Specific user ID to send plan to')
         parser.add_argument('--plan-id', type=int, help='Specific workout plan ID to send')
         parser.add_argument('--date', type=str, help='Specific week start date (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Messages sent per connection (default: 100)')
+        parser.add_argument('--workers', type=int, default=1, help='Connections used concurrently (default: 1)')
+        parser.add_argument('--backend', type=str, help='Email backend to send through (default: EMAIL_BACKEND)')
+        parser.add_argument('--dry-run', action='store_true', help='Render and send through the in-memory backend and report throughput')
 
     def handle(self, *args, **options):
         today = timezone.now().date()
@@ -26,28 +30,30 @@ class Command(BaseCommand):
             week_start = today + timedelta(days=1)  # Next day
 
         # Get plans for the target week
-        plans = WorkoutPlan.objects.filter(week_start_date=week_start)
+        plans = WorkoutPlan.objects.filter(week_start_date=week_start).select_related('user').prefetch_related(
+            'daily_workouts__exercise_sets__exercise'
+        )
         
         if options['user_id']:
             plans = plans.filter(user_id=options['user_id'])
         if options['plan_id']:
             plans = plans.filter(id=options['plan_id'])
         
-        if not plans.exists():
+        plans = list(plans)
+        if not plans:
             self.stdout.write(self.style.WARNING(f'No plans found for week starting {week_start}'))
             return
-        
-        for plan in plans:
-            try:
-                # Send weekly plan email
-                send_mail(
-                    subject='Your Weekly Workout Plan',
-                    message=plan.plan_text,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[plan.user.email],
-                    fail_silently=False,
-                )
-                
-                self.stdout.write(self.style.SUCCESS(f'Sent weekly plan to {plan.user.email}'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Failed to send weekly plan to {plan.user.email}: {str(e)}')) 
\ No newline at end of file
+
+        emails = [
+            OutgoingEmail(key=plan.pk, recipient=plan.user.email, subject='Your Weekly Workout Plan', body=plan.plan_text)
+            for plan in plans
+        ]
+        backend = options['backend'] or (DRY_RUN_BACKEND if options['dry_run'] else None)
+        result = dispatch_emails(emails, chunk_size=options['chunk_size'], workers=options['workers'], backend=backend)
+
+        for failure in result.failures:
+            self.stdout.write(self.style.ERROR(f'Failed to send weekly plan to {failure.recipient}: {failure.error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {len(result.sent)} weekly plans in {result.elapsed:.2f}s '
+            f'({result.messages_per_second:.1f} messages/s, {len(result.failures)} failed)'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from fitness.models import WhoopAccount
+from fitness.services.whoop import sync_recovery
+
+class Command(BaseCommand):
+    help = 'Fetches new WHOOP recovery scores for every connected user and stores them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-ids', type=int, nargs='+', help='Only sync these user IDs')
+        parser.add_argument('--concurrency', type=int, help='Maximum number of users fetched at once (default: WHOOP_API CONCURRENCY)')
+
+    def handle(self, *args, **options):
+        accounts = WhoopAccount.objects.order_by('pk')
+        if options['user_ids']:
+            accounts = accounts.filter(user_id__in=options['user_ids'])
+        accounts = list(accounts)
+
+        if not accounts:
+            self.stdout.write(self.style.WARNING('No WHOOP accounts to sync'))
+            return
+
+        summary = sync_recovery(accounts, concurrency=options['concurrency'])
+
+        for result in summary.results:
+            if not result.succeeded:
+                self.stdout.write(self.style.ERROR(f'Failed to sync user {result.account.user_id}: {result.account.last_error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced {summary.succeeded}/{len(summary.results)} accounts in {summary.elapsed:.1f}s '
+            f'({summary.records} recovery scores, {summary.failed} failed)'
+        ))
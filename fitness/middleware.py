@@ -0,0 +1,137 @@
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# "IN (%s, %s, %s)" and "VALUES (%s, %s), (%s, %s)" vary in length with the parameters
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_REPEATED_TUPLES = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request exceeds its configured query budget and budgets are enforced."""
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with parameter lists collapsed, so queries differing only in parameters match."""
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    sql = _REPEATED_TUPLES.sub(r'\1', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+@dataclass
+class RequestQueries:
+    """SQL executed while handling one request."""
+    durations: List[float] = field(default_factory=list)
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def count(self) -> int:
+        return len(self.durations)
+
+    @property
+    def sql_time(self) -> float:
+        return sum(self.durations)
+
+    @property
+    def duplicates(self) -> Dict[str, int]:
+        """Fingerprints executed more than once, with how often; usually an N+1."""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+    @property
+    def duplicate_count(self) -> int:
+        """Queries that repeated an earlier fingerprint."""
+        return sum(count - 1 for count in self.duplicates.values())
+
+
+class QueryInstrumentationMiddleware:
+    """Records query count, SQL time, repeated queries and wall time per request.
+
+    The figures are sent back in a Server-Timing header and logged as one
+    line per request. Requests to a URL name listed in
+    REQUEST_INSTRUMENTATION['BUDGETS'] are checked against its limits; an
+    overrun is logged, or raised as QueryBudgetExceeded when 'ENFORCE_BUDGETS'
+    is set (as in tests). Disabled unless REQUEST_INSTRUMENTATION['ENABLED'].
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        if not settings.REQUEST_INSTRUMENTATION['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return settings.REQUEST_INSTRUMENTATION
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        queries = RequestQueries()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        wall_time = time.perf_counter() - started
+
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        response['Server-Timing'] = self._server_timing(queries, wall_time)
+        logger.info(
+            "request view=%s method=%s status=%d queries=%d sql_ms=%.1f duplicates=%d wall_ms=%.1f",
+            view_name or '-', request.method, response.status_code, queries.count,
+            queries.sql_time * 1000, queries.duplicate_count, wall_time * 1000,
+        )
+        for sql, count in list(queries.duplicates.items())[:self.config['LOGGED_DUPLICATES']]:
+            logger.debug("request view=%s repeated=%d sql=%s", view_name or '-', count, sql)
+
+        overruns = self._budget_overruns(view_name, queries, wall_time)
+        if overruns:
+            message = f"{view_name} exceeded its query budget: {'; '.join(overruns)}"
+            if self.config['ENFORCE_BUDGETS']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def _server_timing(self, queries: RequestQueries, wall_time: float) -> str:
+        return (
+            f'db;dur={queries.sql_time * 1000:.1f};desc="{queries.count} queries", '
+            f'dup;desc="{queries.duplicate_count} repeated", '
+            f'total;dur={wall_time * 1000:.1f}'
+        )
+
+    def _budget_overruns(self, view_name: Optional[str], queries: RequestQueries, wall_time: float) -> List[str]:
+        """Descriptions of every limit of the view's budget that the request went over."""
+        budget = self.config['BUDGETS'].get(view_name) if view_name else None
+        if not budget:
+            return []
+        measured = {
+            'queries': queries.count,
+            'duplicates': queries.duplicate_count,
+            'sql_ms': queries.sql_time * 1000,
+            'wall_ms': wall_time * 1000,
+        }
+        overruns = [
+            f"{name} {measured[name]:g} > {limit:g}"
+            for name, limit in budget.items()
+            if measured[name] > limit
+        ]
+        if overruns and queries.duplicates:
+            overruns.append(f"most repeated: {next(iter(queries.duplicates))}")
+        return overruns
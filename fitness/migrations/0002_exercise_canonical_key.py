@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:06
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def make_canonical_key(name, muscle_groups):
+    # Frozen copy of Exercise.make_canonical_key
+    normalized_name = ' '.join(name.lower().split())
+    normalized_groups = sorted({group.strip().lower() for group in muscle_groups})
+    payload = json.dumps([normalized_name, normalized_groups])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def backfill_canonical_keys(apps, schema_editor):
+    Exercise = apps.get_model('fitness', 'Exercise')
+    exercises = list(Exercise.objects.only('id', 'name', 'muscle_groups'))
+    for exercise in exercises:
+        exercise.canonical_key = make_canonical_key(exercise.name, exercise.muscle_groups or [])
+    Exercise.objects.bulk_update(exercises, ['canonical_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='canonical_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_canonical_keys, migrations.RunPython.noop),
+    ]
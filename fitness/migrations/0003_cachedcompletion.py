@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0002_exercise_canonical_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=64)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('response', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
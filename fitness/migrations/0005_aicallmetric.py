@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0004_plangenerationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICallMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('operation', models.CharField(max_length=20)),
+                ('trace_id', models.CharField(blank=True, max_length=32)),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('wall_time', models.FloatField()),
+                ('time_to_first_token', models.FloatField(blank=True, null=True)),
+                ('prompt_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('completion_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('retries', models.PositiveIntegerField(default=0)),
+                ('error_class', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:21
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Frozen copy of fitness.constants.DAY_INDEX
+DAY_INDEX = {
+    'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3,
+    'Thursday': 4, 'Friday': 5, 'Saturday': 6,
+}
+
+
+def backfill_dates(apps, schema_editor):
+    DailyWorkout = apps.get_model('fitness', 'DailyWorkout')
+    workouts = list(
+        DailyWorkout.objects.filter(day__in=list(DAY_INDEX))
+        .select_related('workout_plan')
+        .only('id', 'day', 'workout_plan__week_start_date')
+    )
+    for workout in workouts:
+        workout.date = workout.workout_plan.week_start_date + timedelta(days=DAY_INDEX[workout.day])
+    DailyWorkout.objects.bulk_update(workouts, ['date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0005_aicallmetric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyworkout',
+            name='date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dailyworkout',
+            name='sent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='dailyworkout',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dailyworkout',
+            index=models.Index(condition=models.Q(('sent', False)), fields=['date'], name='dailyworkout_unsent_date_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:22
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Frozen copy of fitness.constants.DAY_INDEX
+DAY_INDEX = {
+    'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3,
+    'Thursday': 4, 'Friday': 5, 'Saturday': 6,
+}
+
+
+def backfill_day_index(apps, schema_editor):
+    DailyWorkout = apps.get_model('fitness', 'DailyWorkout')
+    workouts = list(
+        DailyWorkout.objects.filter(day__isnull=False)
+        .select_related('workout_plan')
+        .only('id', 'day', 'date', 'workout_plan__week_start_date')
+    )
+    updated = []
+    for workout in workouts:
+        day_index = DAY_INDEX.get(workout.day.strip().title())
+        if day_index is None:
+            continue
+        workout.day_index = day_index
+        if workout.date is None:
+            workout.date = workout.workout_plan.week_start_date + timedelta(days=day_index)
+        updated.append(workout)
+    DailyWorkout.objects.bulk_update(updated, ['day_index', 'date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0006_dailyworkout_dispatch_queue'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dailyworkout',
+            options={'ordering': ['day_index', 'day']},
+        ),
+        migrations.AddField(
+            model_name='dailyworkout',
+            name='day_index',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_day_index, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dailyworkout',
+            index=models.Index(fields=['workout_plan', 'day_index'], name='dailyworkout_plan_day_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    # The unique index below cannot be built while case-insensitive duplicates exist
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.exclude(email='')
+        .annotate(email_lower=Lower('email'))
+        .values('email_lower')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('email_lower', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"Cannot add the case-insensitive unique email index; merge these accounts first: {', '.join(duplicates)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0007_dailyworkout_day_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user', '-week_start_date'], name='workoutplan_user_week_idx'),
+        ),
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # Login and signup look users up by email. Blank emails map to NULL, which
+        # unique indexes do not compare, so accounts without one remain valid
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_email_lower_uniq ON auth_user (NULLIF(LOWER(email), ''))",
+            reverse_sql="DROP INDEX auth_user_email_lower_uniq",
+        ),
+    ]
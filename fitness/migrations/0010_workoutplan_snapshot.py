@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0009_recovery_ingestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutplan',
+            name='snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
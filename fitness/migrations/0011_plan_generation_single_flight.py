@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:38
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # Keep each user's newest active job; the constraint below allows only one
+    PlanGenerationJob = apps.get_model('fitness', 'PlanGenerationJob')
+    seen = set()
+    duplicates = []
+    for job in PlanGenerationJob.objects.filter(status__in=['pending', 'running']).order_by('-created_at').only('id', 'user_id'):
+        if job.user_id in seen:
+            duplicates.append(job.pk)
+        seen.add(job.user_id)
+    PlanGenerationJob.objects.filter(pk__in=duplicates).update(
+        status='failed', error='Superseded by a newer request', finished_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0010_workoutplan_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='plangenerationjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('user',), name='planjob_one_active_per_user'),
+        ),
+    ]
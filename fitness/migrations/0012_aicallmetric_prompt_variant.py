@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0011_plan_generation_single_flight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aicallmetric',
+            name='prompt_variant',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
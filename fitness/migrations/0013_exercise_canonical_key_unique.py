@@ -0,0 +1,59 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:10
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def make_canonical_key(name, muscle_groups):
+    # Frozen copy of Exercise.make_canonical_key
+    normalized_name = ' '.join(name.lower().split())
+    normalized_groups = sorted({group.strip().lower() for group in muscle_groups})
+    payload = json.dumps([normalized_name, normalized_groups])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def merge_duplicate_exercises(apps, schema_editor):
+    # Same merge as the merge_duplicate_exercises command, so the unique constraint below can be added
+    Exercise = apps.get_model('fitness', 'Exercise')
+    ExerciseSet = apps.get_model('fitness', 'ExerciseSet')
+    WorkoutPlan = apps.get_model('fitness', 'WorkoutPlan')
+
+    keepers = {}
+    stale = []
+    duplicates = {}
+    for exercise in Exercise.objects.only('id', 'name', 'muscle_groups', 'canonical_key').order_by('pk'):
+        key = make_canonical_key(exercise.name, exercise.muscle_groups or [])
+        keeper = keepers.setdefault(key, exercise)
+        if keeper is not exercise:
+            duplicates.setdefault(keeper.pk, []).append(exercise.pk)
+        elif exercise.canonical_key != key:
+            exercise.canonical_key = key
+            stale.append(exercise)
+
+    affected_plan_ids = set()
+    for keeper_id, duplicate_ids in duplicates.items():
+        repointed_sets = ExerciseSet.objects.filter(exercise_id__in=duplicate_ids)
+        affected_plan_ids.update(repointed_sets.values_list('daily_workout__workout_plan_id', flat=True))
+        repointed_sets.update(exercise_id=keeper_id)
+        Exercise.objects.filter(pk__in=duplicate_ids).delete()
+    Exercise.objects.bulk_update(stale, ['canonical_key'], batch_size=500)
+    # Snapshots embed exercise details; plans without one are rendered from the tables until rebuilt
+    WorkoutPlan.objects.filter(pk__in=affected_plan_ids).update(snapshot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness', '0012_aicallmetric_prompt_variant'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_exercises, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exercise',
+            name='canonical_key',
+            field=models.CharField(default='', editable=False, max_length=64, unique=True),
+        ),
+    ]
@@ -1,17 +1,37 @@
 # fitness/models.py
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.db.models import F, Func, Q, prefetch_related_objects
 from django.utils import timezone
-from typing import List, Tuple, Dict, Any, TYPE_CHECKING
-from datetime import datetime, timedelta
-from .constants import EQUIPMENT_CHOICES, DIFFICULTY_CHOICES, GOAL_CHOICES
+from typing import Iterable, List, Optional, Tuple, Dict, Any, TYPE_CHECKING
+from datetime import date, timedelta
+import hashlib
+import json
+from .constants import (
+    EQUIPMENT_CHOICES, DIFFICULTY_CHOICES, GOAL_CHOICES, JOB_STATUS_CHOICES, ACTIVE_JOB_STATUSES,
+    JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED, DAY_INDEX, PLAN_SNAPSHOT_VERSION,
+)
 
 if TYPE_CHECKING:
     from django.db.models.manager import RelatedManager
     from django.db.models.query import QuerySet
 
+class EmailKey(Func):
+    """NULLIF(LOWER(email), ''): the expression indexed by auth_user_email_lower_uniq.
+
+    The empty string is inlined rather than bound as a parameter so databases
+    can match the expression to the index.
+    """
+    template = "NULLIF(LOWER(%(expressions)s), '')"
+    output_field = models.CharField()
+
+def users_with_email(email: str) -> 'QuerySet[User]':
+    """Users whose email matches, ignoring case, looked up through the unique email index."""
+    return User.objects.annotate(email_key=EmailKey('email')).filter(email_key=email.strip().lower())
+
 class Exercise(models.Model):
     """Model for storing reusable exercises."""
     name = models.CharField(max_length=100)
@@ -21,6 +41,8 @@ class Exercise(models.Model):
     difficulty_level = models.IntegerField(choices=DIFFICULTY_CHOICES)
     instructions = models.TextField()
     tips = models.TextField(blank=True)
+    # Hash of the normalized name and muscle groups; unique, so near-duplicate names share one row
+    canonical_key = models.CharField(max_length=64, unique=True, editable=False, default='')
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
@@ -31,6 +53,19 @@ class Exercise(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    @staticmethod
+    def make_canonical_key(name: str, muscle_groups: List[str]) -> str:
+        """Build the catalog key for an exercise.
+
+        Names are lowercased with whitespace collapsed and muscle groups are
+        lowercased and sorted, so "Push-ups" with ["triceps", "chest"] and
+        "push-ups" with ["chest", "triceps"] share a key.
+        """
+        normalized_name = ' '.join(name.lower().split())
+        normalized_groups = sorted({group.strip().lower() for group in muscle_groups})
+        payload = json.dumps([normalized_name, normalized_groups])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
     def get_equipment_display(self) -> List[str]:
         """Get human-readable equipment names."""
         if not self.equipment_needed:
@@ -49,6 +84,7 @@ class Exercise(models.Model):
 
     def save(self, *args, **kwargs) -> None:
         self.clean()
+        self.canonical_key = self.make_canonical_key(self.name, self.muscle_groups)
         self.updated_at = timezone.now()
         super().save(*args, **kwargs)
 
@@ -73,6 +109,28 @@ class ExerciseSet(models.Model):
     def __str__(self) -> str:
         return f"{self.exercise.name} - {self.sets}x{self.reps}"
 
+    @property
+    def summary_line(self) -> str:
+        line = f"{self.exercise.name}: {self.sets} x {self.reps}, rest {self.rest_time}"
+        return f"{line} @ {self.weight}" if self.weight else line
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            'sets': self.sets,
+            'reps': self.reps,
+            'rest_time': self.rest_time,
+            'weight': self.weight,
+            'notes': self.notes,
+            'exercise': {
+                'id': self.exercise_id,
+                'name': self.exercise.name,
+                'description': self.exercise.description,
+                'difficulty_level': self.exercise.difficulty_level,
+                'instructions': self.exercise.instructions,
+                'tips': self.exercise.tips,
+            },
+        }
+
     def save(self, *args, **kwargs) -> None:
         self.updated_at = timezone.now()
         super().save(*args, **kwargs)
@@ -126,9 +184,17 @@ class WorkoutPlan(models.Model):
     week_start_date = models.DateField()  # Remove null=True and blank=True
     equipment_needed = models.JSONField(default=list)
     general_guidelines = models.JSONField(default=dict)
+    # Denormalized days and sets the plan pages render from; the related tables stay authoritative
+    snapshot = models.JSONField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # A user's latest plan and the generator's current-week range both seek on this
+            models.Index(fields=['user', '-week_start_date'], name='workoutplan_user_week_idx'),
+        ]
+
     def get_equipment_display(self) -> List[str]:
         """Get human-readable equipment names."""
         if not self.equipment_needed:
@@ -149,6 +215,61 @@ class WorkoutPlan(models.Model):
     def __str__(self) -> str:
         return f"{self.user.username} - Week of {self.week_start_date or 'Unspecified'}"
 
+    @property
+    def plan_text(self) -> str:
+        """Plain-text rendering of the week's plan, used for email.
+
+        Prefetch daily_workouts__exercise_sets__exercise when rendering many plans.
+        """
+        lines = [f"Your workout plan for the week of {self.week_start_date:%B %d}", ""]
+        for daily_workout in self.daily_workouts.all():
+            lines.append(daily_workout.summary_line)
+            for exercise_set in daily_workout.exercise_sets.all():
+                lines.append(f"  - {exercise_set.summary_line}")
+            lines.append("")
+        if self.equipment_needed:
+            lines.append(f"Equipment: {', '.join(self.get_equipment_display())}")
+        if self.general_guidelines:
+            lines.append("Guidelines:")
+            lines.extend(f"  - {guideline}" for guideline in self.general_guidelines)
+        return "\n".join(lines).strip() + "\n"
+
+    def build_snapshot(self) -> Dict[str, Any]:
+        """Days, sets and exercise details of the plan as plain data, read from the related tables."""
+        # A no-op when the caller already prefetched them
+        prefetch_related_objects([self], 'daily_workouts__exercise_sets__exercise')
+        return {
+            'version': PLAN_SNAPSHOT_VERSION,
+            'days': [daily_workout.to_snapshot() for daily_workout in self.daily_workouts.all()],
+        }
+
+    def refresh_snapshot(self) -> None:
+        """Rebuild and save the snapshot after the plan's days or sets changed."""
+        self.snapshot = self.build_snapshot()
+        self.save(update_fields=['snapshot', 'updated_at'])
+
+    @classmethod
+    def rebuild_snapshots(cls, plans: 'QuerySet[WorkoutPlan]', batch_size: int = 200) -> int:
+        """Rebuild and save the snapshots of many plans, batch_size plans per round trip."""
+        plans = plans.order_by('pk')
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            batch = list(plans.filter(pk__gt=last_pk).prefetch_related('daily_workouts__exercise_sets__exercise')[:batch_size])
+            if not batch:
+                return rebuilt
+            for plan in batch:
+                plan.snapshot = plan.build_snapshot()
+            cls.objects.bulk_update(batch, ['snapshot'])
+            rebuilt += len(batch)
+            last_pk = batch[-1].pk
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """The stored snapshot, or one built on the fly if it is missing or outdated."""
+        if self.snapshot and self.snapshot.get('version') == PLAN_SNAPSHOT_VERSION:
+            return self.snapshot
+        return self.build_snapshot()
+
     if TYPE_CHECKING:
         daily_workouts: RelatedManager['DailyWorkout']
 
@@ -164,24 +285,302 @@ class DailyWorkout(models.Model):
         blank=True  # Temporarily allow null
     )
     notes = models.TextField(blank=True)
+    # Position in the plan's week (Sunday = 0) and calendar date, both derived from the day name
+    day_index = models.PositiveSmallIntegerField(null=True, blank=True)
+    date = models.DateField(null=True, blank=True)
+    sent = models.BooleanField(default=False)
+    sent_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ['workout_plan', 'day']
-        ordering = ['day']
+        ordering = ['day_index', 'day']
+        indexes = [
+            models.Index(fields=['workout_plan', 'day_index'], name='dailyworkout_plan_day_idx'),
+            # The daily dispatch queue: unsent workouts for a date
+            models.Index(fields=['date'], condition=models.Q(sent=False), name='dailyworkout_unsent_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.workout_plan.user.username} - {self.day or 'Unnamed Day'}"
 
+    @property
+    def summary_line(self) -> str:
+        details = ", ".join(filter(None, [self.duration, f"intensity {self.intensity}/10" if self.intensity else None]))
+        line = f"{self.day or 'Unnamed Day'}: {self.focus or 'Workout'}"
+        return f"{line} ({details})" if details else line
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            'id': self.pk,
+            'day': self.day,
+            'date': self.date.isoformat() if self.date else None,
+            'focus': self.focus,
+            'description': self.description,
+            'duration': self.duration,
+            'intensity': self.intensity,
+            'notes': self.notes,
+            'sets': [exercise_set.to_snapshot() for exercise_set in self.exercise_sets.all()],
+        }
+
+    @property
+    def workout_text(self) -> str:
+        """Plain-text rendering of the day's workout, used for email.
+
+        Prefetch exercise_sets__exercise when rendering many workouts.
+        """
+        lines = [self.summary_line]
+        if self.description:
+            lines.extend(["", self.description])
+        lines.extend(["", "Exercises:"])
+        for exercise_set in self.exercise_sets.all():
+            lines.append(f"  - {exercise_set.summary_line}")
+            if exercise_set.notes:
+                lines.append(f"    {exercise_set.notes}")
+        if self.notes:
+            lines.extend(["", f"Notes: {self.notes}"])
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def day_index_for(day: Optional[str]) -> Optional[int]:
+        """Position of a day name in the week (Sunday = 0), ignoring case and whitespace."""
+        if not day:
+            return None
+        return DAY_INDEX.get(day.strip().title())
+
+    @staticmethod
+    def date_for_day(week_start_date: Optional[date], day: Optional[str]) -> Optional[date]:
+        """Calendar date of a day name within the week starting week_start_date."""
+        day_index = DailyWorkout.day_index_for(day)
+        if week_start_date is None or day_index is None:
+            return None
+        return week_start_date + timedelta(days=day_index)
+
     def mark_as_sent(self) -> None:
         self.sent = True
-        self.sent_at = datetime.now()
-        self.save()
+        self.sent_at = timezone.now()
+        self.save(update_fields=['sent', 'sent_at', 'updated_at'])
+
+    @classmethod
+    def mark_all_as_sent(cls, pks: Iterable[int], batch_size: int = 1000) -> int:
+        """Flag many workouts as sent with one UPDATE per batch_size rows."""
+        pks = list(pks)
+        now = timezone.now()
+        updated = 0
+        for start in range(0, len(pks), batch_size):
+            updated += cls.objects.filter(pk__in=pks[start:start + batch_size]).update(sent=True, sent_at=now, updated_at=now)
+        return updated
 
     def save(self, *args, **kwargs) -> None:
+        if self.day_index is None:
+            self.day_index = self.day_index_for(self.day)
+        if self.date is None:
+            self.date = self.date_for_day(self.workout_plan.week_start_date, self.day)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'day_index', 'date'}
         self.updated_at = timezone.now()
         super().save(*args, **kwargs)
 
     if TYPE_CHECKING:
         exercise_sets: RelatedManager['ExerciseSet']
+
+class CachedCompletion(models.Model):
+    """One cached AI completion variant for a given request fingerprint."""
+    key = models.CharField(max_length=64, db_index=True)
+    model = models.CharField(max_length=100, blank=True)
+    response = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+    def __str__(self) -> str:
+        return f"{self.model or 'completion'} {self.key[:12]}"
+
+class PlanGenerationJob(models.Model):
+    """A queued request to generate a user's weekly plan in the background."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='plan_generation_jobs')
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default=JOB_STATUS_PENDING)
+    workout_plan = models.ForeignKey(WorkoutPlan, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='planjob_status_created_idx'),
+        ]
+        constraints = [
+            # The single-flight lock: at most one generation per user is queued or running
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=Q(status__in=ACTIVE_JOB_STATUSES),
+                name='planjob_one_active_per_user',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user.username} - {self.status}"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_JOB_STATUSES
+
+    @classmethod
+    def expire_stale(cls, user: Optional[User] = None) -> int:
+        """Fail running jobs whose worker has not finished within PLAN_GENERATION_LOCK['STALE_AFTER'].
+
+        This releases the lock of a generation whose process died, so the user
+        can generate again.
+        """
+        now = timezone.now()
+        stale = cls.objects.filter(
+            status=JOB_STATUS_RUNNING,
+            started_at__lt=now - timedelta(seconds=settings.PLAN_GENERATION_LOCK['STALE_AFTER'])
+        )
+        if user is not None:
+            stale = stale.filter(user=user)
+        return stale.update(status=JOB_STATUS_FAILED, error='Generation timed out', finished_at=now)
+
+    @classmethod
+    def _active_for(cls, user: User) -> Optional['PlanGenerationJob']:
+        return cls.objects.filter(user=user, status__in=ACTIVE_JOB_STATUSES).first()
+
+    @classmethod
+    def enqueue(cls, user: User) -> 'PlanGenerationJob':
+        """Queue a generation for user, reusing a job that is already pending or running."""
+        cls.expire_stale(user)
+        while True:
+            job = cls._active_for(user)
+            if job is not None:
+                return job
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(user=user)
+            except IntegrityError:
+                # Another request queued one first; attach to it
+                continue
+
+    @classmethod
+    def acquire(cls, user: User) -> Tuple['PlanGenerationJob', bool]:
+        """Take the user's generation lock for a caller that generates in-process.
+
+        Returns (job, True) when the caller now owns a running job and must
+        finish it with mark_succeeded or mark_failed. A pending job is claimed
+        from the queue, so whoever queued it sees this caller's result. If
+        another process is already generating, returns (that job, False).
+        """
+        cls.expire_stale(user)
+        while True:
+            job = cls._active_for(user)
+            if job is None:
+                try:
+                    with transaction.atomic():
+                        return cls.objects.create(
+                            user=user, status=JOB_STATUS_RUNNING, started_at=timezone.now(), attempts=1
+                        ), True
+                except IntegrityError:
+                    continue
+            if job.status == JOB_STATUS_RUNNING:
+                return job, False
+            now = timezone.now()
+            claimed = cls.objects.filter(pk=job.pk, status=JOB_STATUS_PENDING).update(
+                status=JOB_STATUS_RUNNING, started_at=now, attempts=F('attempts') + 1
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job, True
+
+    def refresh_lock(self) -> bool:
+        """Restart the stale timer of a running job as its generation actually begins.
+
+        Returns False if the job is no longer running, e.g. it waited in a
+        batch long enough to be expired and another generation took over.
+        """
+        now = timezone.now()
+        if not PlanGenerationJob.objects.filter(pk=self.pk, status=JOB_STATUS_RUNNING).update(started_at=now):
+            self.refresh_from_db()
+            return False
+        self.started_at = now
+        return True
+
+    def _finish(self, **fields: Any) -> bool:
+        """Record the outcome of a running job; a job that was expired meanwhile is left as it is."""
+        fields['finished_at'] = timezone.now()
+        if not PlanGenerationJob.objects.filter(pk=self.pk, status=JOB_STATUS_RUNNING).update(**fields):
+            self.refresh_from_db()
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+    def mark_succeeded(self, workout_plan: WorkoutPlan) -> bool:
+        return self._finish(status=JOB_STATUS_SUCCEEDED, workout_plan=workout_plan, error='')
+
+    def mark_failed(self, error: str) -> bool:
+        return self._finish(status=JOB_STATUS_FAILED, error=error)
+
+class AICallMetric(models.Model):
+    """Timing, token usage and outcome of one AI provider call."""
+    provider = models.CharField(max_length=50)
+    model = models.CharField(max_length=100, blank=True)
+    operation = models.CharField(max_length=20)  # "completion" or "stream"
+    trace_id = models.CharField(max_length=32, blank=True)  # Groups the calls made for one plan
+    prompt_variant = models.CharField(max_length=20, blank=True)  # Set on calls requesting a whole week's plan
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
+    wall_time = models.FloatField()  # seconds
+    time_to_first_token = models.FloatField(null=True, blank=True)  # seconds, streamed calls only
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    retries = models.PositiveIntegerField(default=0)
+    error_class = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self) -> str:
+        return f"{self.provider}/{self.model} {self.operation} {self.wall_time:.2f}s"
+
+class WhoopAccount(models.Model):
+    """A user's WHOOP connection and how far their recovery data has been synced."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='whoop_account')
+    access_token = models.TextField()
+    # Start of the next sync window; records created before it are already stored
+    synced_through = models.DateTimeField(null=True, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.user.username}'s WHOOP account"
+
+class RecoveryScore(models.Model):
+    """A daily WHOOP recovery score, stored so requests never wait on the WHOOP API."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recovery_scores')
+    date = models.DateField()
+    score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(100)])
+    resting_heart_rate = models.FloatField(null=True, blank=True)
+    hrv_rmssd = models.FloatField(null=True, blank=True)  # milliseconds
+    recorded_at = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='recoveryscore_user_date_uniq'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user.username} - {self.date}: {self.score:.0f}%"
+
+    @classmethod
+    def latest_for(cls, user: User, max_age_days: int = 2) -> Optional['RecoveryScore']:
+        """The user's most recent score, if it is at most max_age_days old."""
+        since = timezone.now().date() - timedelta(days=max_age_days)
+        return cls.objects.filter(user=user, date__gte=since).order_by('-date').first()
@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+import logging
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from openai.types.chat import ChatCompletionMessageParam
+
+from ..models import AICallMetric
+
+if TYPE_CHECKING:
+    from .ai_providers import AIProvider
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CallRecord:
+    """Measurements for a single AI provider call."""
+    provider: str
+    model: str
+    operation: str
+    trace_id: str = ''
+    prompt_variant: str = ''
+    started_at: Any = field(default_factory=timezone.now)
+    wall_time: float = 0.0
+    time_to_first_token: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+    error_class: str = ''
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+
+_current_call: ContextVar[Optional[CallRecord]] = ContextVar('ai_current_call', default=None)
+_current_trace: ContextVar[str] = ContextVar('ai_current_trace', default='')
+_current_prompt_variant: ContextVar[str] = ContextVar('ai_current_prompt_variant', default='')
+
+
+def record_usage(prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """Attach token usage reported by the provider to the call in progress."""
+    call = _current_call.get()
+    if call is not None:
+        call.prompt_tokens = prompt_tokens
+        call.completion_tokens = completion_tokens
+
+
+def record_retry(exc: BaseException) -> None:
+    """Count a retried attempt against the call in progress."""
+    call = _current_call.get()
+    if call is not None:
+        call.retries += 1
+
+
+def record_first_token() -> None:
+    """Mark the arrival of the first streamed token for the call in progress."""
+    call = _current_call.get()
+    if call is not None and call.time_to_first_token is None:
+        call.time_to_first_token = call.elapsed()
+
+
+@contextmanager
+def metrics_trace(trace_id: Optional[str] = None, prompt_variant: str = '') -> Iterator[str]:
+    """Group every AI call made inside the block, e.g. all calls for one plan.
+
+    prompt_variant tags the calls with the plan prompt variant they were
+    built from, so variants can be compared on measured calls.
+    """
+    token = _current_trace.set(trace_id or uuid.uuid4().hex)
+    variant_token = _current_prompt_variant.set(prompt_variant)
+    try:
+        yield _current_trace.get()
+    finally:
+        _current_prompt_variant.reset(variant_token)
+        _current_trace.reset(token)
+
+
+def error_class_name(exc: BaseException) -> str:
+    """Name of the underlying exception class, looking through provider wrappers."""
+    return type(exc.__cause__ or exc).__name__
+
+
+def save_call_record(call: CallRecord) -> None:
+    """Write a call record to the metrics store and the log."""
+    AICallMetric.objects.create(
+        provider=call.provider,
+        model=call.model,
+        operation=call.operation,
+        trace_id=call.trace_id,
+        prompt_variant=call.prompt_variant,
+        started_at=call.started_at,
+        wall_time=call.wall_time,
+        time_to_first_token=call.time_to_first_token,
+        prompt_tokens=call.prompt_tokens,
+        completion_tokens=call.completion_tokens,
+        retries=call.retries,
+        error_class=call.error_class,
+    )
+    logger.info(
+        "ai_call provider=%s model=%s operation=%s wall_time=%.3f ttft=%s prompt_tokens=%s completion_tokens=%s retries=%d error=%s",
+        call.provider, call.model, call.operation, call.wall_time, call.time_to_first_token,
+        call.prompt_tokens, call.completion_tokens, call.retries, call.error_class or '-',
+    )
+
+
+class InstrumentedProvider:
+    """AIProvider wrapper that records timing, token usage, retries and errors per call."""
+
+    def __init__(self, provider: 'AIProvider', name: str):
+        self.provider = provider
+        self.name = name
+        self.model = getattr(provider, 'model', '')
+
+    def _start(self, operation: str) -> CallRecord:
+        call = CallRecord(
+            provider=self.name,
+            model=self.model,
+            operation=operation,
+            trace_id=_current_trace.get(),
+            prompt_variant=_current_prompt_variant.get(),
+        )
+        _current_call.set(call)
+        return call
+
+    def _finish(self, call: CallRecord, exc: Optional[BaseException] = None) -> None:
+        call.wall_time = call.elapsed()
+        if exc is not None:
+            call.error_class = error_class_name(exc)
+        _current_call.set(None)
+
+    def _save(self, call: CallRecord) -> None:
+        try:
+            save_call_record(call)
+        except Exception:
+            # Metrics must never break plan generation
+            logger.exception("Failed to record AI call metrics")
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        call = self._start('completion')
+        try:
+            response = self.provider.generate_completion(messages, response_schema=response_schema)
+        except Exception as e:
+            self._finish(call, e)
+            self._save(call)
+            raise
+        self._finish(call)
+        self._save(call)
+        return response
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        call = self._start('completion')
+        try:
+            response = await self.provider.agenerate_completion(messages, response_schema=response_schema)
+        except Exception as e:
+            self._finish(call, e)
+            await sync_to_async(self._save)(call)
+            raise
+        self._finish(call)
+        await sync_to_async(self._save)(call)
+        return response
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        call = self._start('stream')
+        error: Optional[BaseException] = None
+        try:
+            for chunk in self.provider.stream_completion(messages, response_schema=response_schema):
+                record_first_token()
+                # The consumer runs between chunks and may make calls of its own
+                _current_call.set(None)
+                yield chunk
+                _current_call.set(call)
+        except BaseException as e:
+            # Includes GeneratorExit, so a stream the consumer stops early is recorded as incomplete
+            error = e
+            raise
+        finally:
+            self._finish(call, error)
+            self._save(call)
@@ -1,37 +1,162 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Protocol, cast
+from typing import Dict, Any, Iterator, List, Optional, Protocol, Tuple, cast
+import asyncio
+import threading
+import weakref
+import httpx
 import openai
 from django.conf import settings
 from openai.types.chat import ChatCompletionMessageParam
 import json
+from .ai_metrics import InstrumentedProvider, record_retry, record_usage
+from .resilience import CircuitBreaker, RetryPolicy, is_retryable_error
+
+class AIProviderError(ValueError):
+    """Raised when a provider call fails; the original exception is chained as __cause__."""
 
 class AIProvider(Protocol):
     """Protocol defining the interface for AI providers."""
     
-    def generate_completion(self, messages: List[ChatCompletionMessageParam]) -> Dict[str, Any]:
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate a completion from the AI model.
         
         Args:
             messages: List of chat messages to send to the model
+            response_schema: Optional {"name", "schema"} JSON schema the response
+                must follow, enforced by providers with a structured-output mode
             
         Returns:
             Dict containing the model's response
         """
         ...
 
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Asynchronous variant of generate_completion.
+        
+        Args:
+            messages: List of chat messages to send to the model
+            response_schema: Optional JSON schema the response must follow
+            
+        Returns:
+            Dict containing the model's response
+        """
+        ...
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream the raw text of a completion as it is generated.
+        
+        Args:
+            messages: List of chat messages to send to the model
+            response_schema: Optional JSON schema the response must follow
+            
+        Returns:
+            Iterator over chunks of the response text, which concatenate to
+            the same JSON document generate_completion would parse
+        """
+        ...
+
+_http_client: Optional[httpx.Client] = None
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_http_client_lock = threading.Lock()
+
+def _http_client_options() -> Dict[str, Any]:
+    """Timeout and pool limits shared by every provider's HTTP client."""
+    http_settings = settings.AI_PROVIDER_HTTP
+    return {
+        "timeout": httpx.Timeout(http_settings['TIMEOUT'], connect=http_settings['CONNECT_TIMEOUT']),
+        "limits": httpx.Limits(
+            max_connections=http_settings['MAX_CONNECTIONS'],
+            max_keepalive_connections=http_settings['MAX_KEEPALIVE_CONNECTIONS'],
+        ),
+    }
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide keep-alive HTTP client used by provider SDKs."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(**_http_client_options())
+        return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client for the running event loop.
+
+    Async connection pools are bound to the loop that opened them, so one
+    client is kept per loop and dropped together with the loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _http_client_lock:
+        client = _async_http_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**_http_client_options())
+            _async_http_clients[loop] = client
+        return client
+
+def _build_retry_policy(connection_errors: Tuple[type, ...]) -> RetryPolicy:
+    """Build a retry policy with its own circuit breaker from settings."""
+    http_settings = settings.AI_PROVIDER_HTTP
+    return RetryPolicy(
+        max_retries=http_settings['MAX_RETRIES'],
+        backoff_base=http_settings['BACKOFF_BASE'],
+        backoff_max=http_settings['BACKOFF_MAX'],
+        is_retryable=lambda exc: is_retryable_error(exc, connection_errors),
+        on_retry=record_retry,
+        breaker=CircuitBreaker(
+            failure_threshold=http_settings['CIRCUIT_BREAKER_THRESHOLD'],
+            reset_timeout=http_settings['CIRCUIT_BREAKER_RESET'],
+        ),
+    )
+
+# Model families that accept response_format={"type": "json_schema"}
+OPENAI_JSON_SCHEMA_MODELS = ("gpt-4o", "gpt-4.1", "o1", "o3", "o4")
+
 class OpenAIProvider:
     """Implementation of AIProvider using OpenAI's API."""
     
-    def __init__(self):
+    def __init__(self, model: Optional[str] = None):
         """Initialize the OpenAI client."""
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = "gpt-4-turbo-preview"  # Using GPT-4 Turbo for better JSON handling
+        # Retries are handled by retry_policy so they share one circuit breaker
+        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY, http_client=get_http_client(), max_retries=0)
+        self.model = model or settings.OPENAI_MODEL_NAME
+        self.supports_response_schema = self.model.startswith(OPENAI_JSON_SCHEMA_MODELS)
+        self.retry_policy = _build_retry_policy((openai.APIConnectionError,))
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """Async client bound to the running event loop's shared connection pool."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=get_async_http_client(), max_retries=0)
+            self._async_clients[loop] = client
+        return client
+
+    def _response_format(self, response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Strict JSON-schema output when the model supports it, plain JSON mode otherwise."""
+        if response_schema is None or not self.supports_response_schema:
+            return {"type": "json_object"}
+        return {"type": "json_schema", "json_schema": {**response_schema, "strict": True}}
+
+    def _parse_response(self, response: Any) -> Dict[str, Any]:
+        """Extract and parse the JSON content of a chat completion response."""
+        if response.usage is not None:
+            record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        content = response.choices[0].message.content
+        if content is None:
+            raise ValueError("OpenAI response content is None")
+        
+        try:
+            return json.loads(cast(str, content))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse OpenAI response as JSON: {e}")
         
-    def generate_completion(self, messages: List[ChatCompletionMessageParam]) -> Dict[str, Any]:
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate a completion from OpenAI's API.
         
         Args:
             messages: List of chat messages to send to the model
+            response_schema: Optional JSON schema enforced on models that support it
             
         Returns:
             Dict containing the model's response
@@ -40,56 +165,305 @@ class OpenAIProvider:
             ValueError: If the response is not valid JSON
         """
         try:
-            response = self.client.chat.completions.create(
+            response = self.retry_policy.call(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=0.7,  # Balanced between creativity and consistency
-                response_format={"type": "json_object"}  # Ensure JSON response
-            )
+                response_format=self._response_format(response_schema)  # Ensure JSON response
+            ))
+            return self._parse_response(response)
+                
+        except Exception as e:
+            raise AIProviderError(f"OpenAI API error: {str(e)}") from e
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate a completion from OpenAI's API without blocking the event loop.
+        
+        Args:
+            messages: List of chat messages to send to the model
+            response_schema: Optional JSON schema enforced on models that support it
             
-            # Extract the response content
-            content = response.choices[0].message.content
-            if content is None:
-                raise ValueError("OpenAI response content is None")
+        Returns:
+            Dict containing the model's response
             
-            # Parse the JSON response
-            try:
-                return json.loads(cast(str, content))
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Failed to parse OpenAI response as JSON: {e}")
+        Raises:
+            ValueError: If the response is not valid JSON
+        """
+        try:
+            response = await self.retry_policy.acall(lambda: self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format=self._response_format(response_schema)
+            ))
+            return self._parse_response(response)
                 
         except Exception as e:
-            raise ValueError(f"OpenAI API error: {str(e)}")
+            raise AIProviderError(f"OpenAI API error: {str(e)}") from e
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream a completion from OpenAI's API.
+        
+        Args:
+            messages: List of chat messages to send to the model
+            response_schema: Optional JSON schema enforced on models that support it
+            
+        Returns:
+            Iterator over chunks of the JSON response text
+        """
+        try:
+            # Only opening the stream is retried; a failure mid-stream is raised
+            stream = self.retry_policy.call(lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                response_format=self._response_format(response_schema),
+                stream=True,
+                stream_options={"include_usage": True}
+            ))
+            for chunk in stream:
+                if chunk.usage is not None:
+                    record_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                    
+        except Exception as e:
+            raise AIProviderError(f"OpenAI API error: {str(e)}") from e
+
+# Prefilled start of the assistant turn, so a reply without a response schema continues a JSON object
+ANTHROPIC_JSON_PREFILL = "{"
+# Most cache_control breakpoints a Messages API request may carry
+ANTHROPIC_CACHE_BREAKPOINTS = 4
 
 class AnthropicProvider(AIProvider):
-    """Anthropic (Claude) implementation of the AI provider."""
+    """Anthropic (Claude) implementation of the AI provider.
+
+    System messages become the system prompt. With a response_schema the
+    model is made to call a tool whose input schema is the response schema,
+    and the tool input is the result; without one, the assistant turn is
+    prefilled so the reply continues a JSON object. With prompt caching, each
+    system block is marked as the end of a cacheable prefix, so the tool
+    definition and the shared plan instructions ahead of the user's profile
+    can be reused. Anthropic only caches a prefix of at least 1024 tokens
+    (2048 on Haiku models): the compact plan prefix is about 500 tokens and
+    is sent uncached, while a full catalog exercise list (80 entries) takes
+    the catalog variant's prefix past the minimum.
+    """
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        prompt_caching: Optional[bool] = None,
+        base_url: Optional[str] = None
+    ):
         self.api_key = api_key or settings.ANTHROPIC_API_KEY
         self.model = model or settings.ANTHROPIC_MODEL_NAME
+        self.max_tokens = max_tokens or settings.ANTHROPIC_MAX_TOKENS
+        self.prompt_caching = settings.ANTHROPIC_PROMPT_CACHING if prompt_caching is None else prompt_caching
+        self.base_url = base_url
         # Import here to avoid dependency if not using Anthropic
         import anthropic
-        self.client = anthropic.Anthropic(api_key=self.api_key)
-    
-    def generate_completion(self, messages: List[Dict[str, str]], max_tokens: int = 500) -> str:
-        """Generate a completion using Anthropic's API."""
-        # Convert messages to Anthropic format
-        prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return str(response.content[0])
-
-def get_ai_provider(provider: str = "openai", **kwargs) -> AIProvider:
-    """Factory function to get the appropriate AI provider."""
+        self._anthropic = anthropic
+        self.client = anthropic.Anthropic(api_key=self.api_key, base_url=base_url, http_client=get_http_client(), max_retries=0)
+        self.retry_policy = _build_retry_policy((anthropic.APIConnectionError,))
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+    @property
+    def async_client(self) -> Any:
+        """Async client bound to the running event loop's shared connection pool."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._anthropic.AsyncAnthropic(
+                api_key=self.api_key, base_url=self.base_url, http_client=get_async_http_client(), max_retries=0
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def _request(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Keyword arguments of a Messages API request for chat messages."""
+        system = [str(message['content']) for message in messages if message['role'] == 'system']
+        conversation: List[Dict[str, Any]] = [
+            {"role": message['role'], "content": message.get('content')}
+            for message in messages if message['role'] != 'system'
+        ]
+        request: Dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": 0.7,
+            "messages": conversation,
+        }
+        if response_schema is not None:
+            request["tools"] = [{
+                "name": response_schema['name'],
+                "description": "Record the response. Its input must follow the schema exactly.",
+                "input_schema": response_schema['schema'],
+            }]
+            request["tool_choice"] = {"type": "tool", "name": response_schema['name']}
+        else:
+            conversation.append({"role": "assistant", "content": ANTHROPIC_JSON_PREFILL})
+
+        # Each marked block ends a cacheable prefix: tools, then the system blocks up to it.
+        # Only the last ANTHROPIC_CACHE_BREAKPOINTS system blocks are marked, the API's limit.
+        cache_control = {"type": "ephemeral"} if self.prompt_caching else None
+        if system:
+            marked = len(system) - ANTHROPIC_CACHE_BREAKPOINTS
+            request["system"] = [
+                {"type": "text", "text": text, **({"cache_control": cache_control} if cache_control and i >= marked else {})}
+                for i, text in enumerate(system)
+            ]
+        elif cache_control and "tools" in request:
+            request["tools"][0]["cache_control"] = cache_control
+        return request
+
+    def _record_usage(self, usage: Any) -> None:
+        # input_tokens excludes the prompt tokens read from or written to the cache
+        cached = (getattr(usage, 'cache_read_input_tokens', None) or 0) + (getattr(usage, 'cache_creation_input_tokens', None) or 0)
+        record_usage(usage.input_tokens + cached, usage.output_tokens)
+
+    def _parse_response(self, response: Any) -> Dict[str, Any]:
+        """Extract the JSON result of a message: the forced tool's input, or the prefilled text."""
+        self._record_usage(response.usage)
+        if response.stop_reason == 'max_tokens':
+            raise ValueError(f"Anthropic response was cut off at max_tokens={self.max_tokens}")
+        for block in response.content:
+            if block.type == 'tool_use':
+                return cast(Dict[str, Any], block.input)
+        text = "".join(block.text for block in response.content if block.type == 'text')
+        try:
+            return json.loads(ANTHROPIC_JSON_PREFILL + text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse Anthropic response as JSON: {e}")
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate a completion using Anthropic's API.
+        
+        Args:
+            messages: List of chat messages to send to the model
+            response_schema: Optional JSON schema the response must follow
+            
+        Returns:
+            Dict containing the model's response
+        """
+        request = self._request(messages, response_schema)
+        try:
+            response = self.retry_policy.call(lambda: self.client.messages.create(**request))
+            return self._parse_response(response)
+        except Exception as e:
+            raise AIProviderError(f"Anthropic API error: {str(e)}") from e
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Generate a completion using Anthropic's async API."""
+        request = self._request(messages, response_schema)
+        try:
+            response = await self.retry_policy.acall(lambda: self.async_client.messages.create(**request))
+            return self._parse_response(response)
+        except Exception as e:
+            raise AIProviderError(f"Anthropic API error: {str(e)}") from e
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream the JSON text of a completion using Anthropic's API."""
+        request = self._request(messages, response_schema)
+
+        def open_stream() -> Tuple[Any, Any]:
+            manager = self.client.messages.stream(**request)
+            return manager, manager.__enter__()
+
+        try:
+            # Only opening the stream is retried; a failure mid-stream is raised
+            manager, stream = self.retry_policy.call(open_stream)
+            try:
+                if response_schema is None:
+                    yield ANTHROPIC_JSON_PREFILL
+                for event in stream:
+                    if event.type != 'content_block_delta':
+                        continue
+                    if event.delta.type == 'input_json_delta':
+                        yield event.delta.partial_json
+                    elif event.delta.type == 'text_delta':
+                        yield event.delta.text
+                final_message = stream.get_final_message()
+                self._record_usage(final_message.usage)
+                if final_message.stop_reason == 'max_tokens':
+                    raise ValueError(f"Anthropic response was cut off at max_tokens={self.max_tokens}")
+            finally:
+                manager.__exit__(None, None, None)
+        except Exception as e:
+            raise AIProviderError(f"Anthropic API error: {str(e)}") from e
+
+_provider_registry: Dict[Tuple[Any, ...], AIProvider] = {}
+_provider_registry_lock = threading.Lock()
+
+def get_ai_provider(provider: str = "openai", cache: Optional[bool] = None, **kwargs) -> AIProvider:
+    """Return the process-wide AI provider for the given name and options.
+
+    Providers are built once and reused, so every caller shares their pooled
+    HTTP client, retry policy and circuit breaker. Calls that reach the
+    provider are recorded when settings.AI_METRICS_ENABLED is set, and unless
+    disabled (via `cache=False` or settings.AI_COMPLETION_CACHE), the provider
+    is wrapped in a completion cache. "replay" serves recorded completions
+    offline; with settings.AI_REPLAY['RECORD'] the other providers record
+    their completions for it. "hedged" sends slow requests to a second
+    provider as configured in settings.AI_HEDGING.
+    """
+    # Imported here because these modules depend on this one
+    from .hedged_provider import HedgedProvider
+    from .replay_provider import Cassette, RecordingProvider, ReplayProvider
     providers = {
         "openai": OpenAIProvider,
         "anthropic": AnthropicProvider,
+        "replay": ReplayProvider,
+        "hedged": HedgedProvider,
     }
     
     if provider not in providers:
         raise ValueError(f"Unsupported AI provider: {provider}")
-    
-    return providers[provider](**kwargs) 
\ No newline at end of file
+
+    if provider == "hedged" and not kwargs:
+        # Both sides are registered providers of their own, each instrumented under its name
+        hedging = settings.AI_HEDGING
+        kwargs = {
+            "primary": get_ai_provider(hedging['PRIMARY'], cache=False),
+            "backup": get_ai_provider(hedging['BACKUP'], cache=False),
+            "delay": hedging['DELAY'],
+            "latency_percentile": hedging['LATENCY_PERCENTILE'],
+            "min_samples": hedging['MIN_SAMPLES'],
+            "window": hedging['WINDOW'],
+        }
+
+    cache_settings = settings.AI_COMPLETION_CACHE
+    if cache is None:
+        # Replays are already local; caching them would skip their synthetic latency
+        cache = cache_settings['ENABLED'] and provider != "replay"
+
+    registry_key = (provider, cache, tuple(sorted(kwargs.items())))
+    with _provider_registry_lock:
+        if registry_key in _provider_registry:
+            return _provider_registry[registry_key]
+
+        instance: AIProvider = providers[provider](**kwargs)
+        # A hedged provider's calls are recorded by the providers it wraps
+        if settings.AI_REPLAY['RECORD'] and provider not in ("replay", "hedged"):
+            instance = RecordingProvider(instance, Cassette(settings.AI_REPLAY['CASSETTE_DIR']))
+        if settings.AI_METRICS_ENABLED and provider != "hedged":
+            instance = InstrumentedProvider(instance, provider)
+        if cache:
+            # Imported here because the cache module depends on this one
+            from .completion_cache import CachedAIProvider, get_completion_store
+            instance = CachedAIProvider(
+                instance,
+                store=get_completion_store(cache_settings['BACKEND']),
+                ttl=cache_settings['TTL'],
+                max_entries=cache_settings['MAX_ENTRIES'],
+                variants=cache_settings['VARIANTS'],
+            )
+
+        _provider_registry[registry_key] = instance
+        return instance
+
+def reset_ai_providers() -> None:
+    """Forget every registered provider, e.g. after changing provider settings."""
+    with _provider_registry_lock:
+        _provider_registry.clear()
@@ -0,0 +1,98 @@
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from .stats import percentile
+from .workout_plan_generator import WorkoutPlanGenerator
+from ..models import UserProfile, WorkoutPlan
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of generating a single user's plan."""
+    profile: UserProfile
+    latency: float
+    plan: Optional[WorkoutPlan] = None
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchSummary:
+    """Throughput and latency figures for a batch generation run."""
+    elapsed: float
+    results: List[GenerationResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.succeeded)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+
+    @property
+    def plans_per_minute(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.succeeded / self.elapsed * 60
+
+    def latency_percentile(self, pct: float) -> float:
+        return percentile([result.latency for result in self.results], pct)
+
+
+async def generate_plans_concurrently(
+    generator: WorkoutPlanGenerator,
+    profiles: Iterable[UserProfile],
+    concurrency: int = 8,
+    on_result: Optional[Callable[[GenerationResult], None]] = None,
+    on_start: Optional[Callable[[UserProfile], None]] = None,
+) -> BatchSummary:
+    """Generate plans for many profiles with at most `concurrency` requests in flight.
+
+    Each plan is persisted as soon as its completion lands, and `on_result` is
+    invoked for every finished profile so callers can report progress.
+    `on_start` is invoked when a profile's turn comes, just before its
+    generation; if it raises, the profile is skipped and recorded as failed.
+    Both callbacks run via sync_to_async, so they may use the ORM.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def generate(profile: UserProfile) -> GenerationResult:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if on_start:
+                    await sync_to_async(on_start)(profile)
+                plan = await generator.agenerate_weekly_plan(profile)
+                result = GenerationResult(profile=profile, latency=time.perf_counter() - started, plan=plan)
+            except Exception as e:
+                result = GenerationResult(profile=profile, latency=time.perf_counter() - started, error=e)
+        if on_result:
+            await sync_to_async(on_result)(result)
+        return result
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(generate(profile) for profile in profiles))
+    return BatchSummary(elapsed=time.perf_counter() - started, results=list(results))
+
+
+def run_batch(
+    generator: WorkoutPlanGenerator,
+    profiles: Iterable[UserProfile],
+    concurrency: int = 8,
+    on_result: Optional[Callable[[GenerationResult], None]] = None,
+    on_start: Optional[Callable[[UserProfile], None]] = None,
+) -> BatchSummary:
+    """Synchronous entry point for generate_plans_concurrently.
+
+    async_to_sync keeps thread-sensitive ORM work on the calling thread, so
+    persistence shares the caller's database connection and transaction.
+    """
+    return async_to_sync(generate_plans_concurrently)(generator, profiles, concurrency, on_result, on_start)
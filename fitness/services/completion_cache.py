@@ -0,0 +1,234 @@
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
+import hashlib
+import json
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, Max, Min
+from django.utils import timezone
+from openai.types.chat import ChatCompletionMessageParam
+
+from .ai_providers import AIProvider
+from ..models import CachedCompletion
+
+
+def make_cache_key(messages: List[ChatCompletionMessageParam], model: str, response_schema: Optional[Dict[str, Any]] = None) -> str:
+    """Fingerprint a completion request by its model, message list and response schema."""
+    request: Dict[str, Any] = {"model": model, "messages": messages}
+    if response_schema is not None:
+        request["response_schema"] = response_schema
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CompletionCacheStore(Protocol):
+    """Storage backend for cached completions.
+
+    A key maps to a list of response variants. Stores are responsible for
+    honouring the TTL and for evicting least recently used keys beyond
+    max_entries.
+    """
+
+    def get(self, key: str, ttl: int) -> List[Dict[str, Any]]:
+        """Return the live variants stored under key, marking the key as used."""
+        ...
+
+    def add(self, key: str, model: str, response: Dict[str, Any], max_entries: int) -> None:
+        """Store a new variant under key and evict old keys if over max_entries."""
+        ...
+
+    def record_hit(self, key: str) -> None:
+        """Count a cache hit against key."""
+        ...
+
+    def clear(self) -> None:
+        """Remove every cached completion."""
+        ...
+
+
+class InMemoryCompletionStore:
+    """Process-local LRU store, useful for tests and one-off commands."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, List[Tuple[float, Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, key: str, ttl: int) -> List[Dict[str, Any]]:
+        variants = self._entries.get(key)
+        if variants is None:
+            return []
+        cutoff = time.time() - ttl
+        live = [(created, response) for created, response in variants if created >= cutoff]
+        if not live:
+            del self._entries[key]
+            return []
+        self._entries[key] = live
+        self._entries.move_to_end(key)
+        return [response for _, response in live]
+
+    def add(self, key: str, model: str, response: Dict[str, Any], max_entries: int) -> None:
+        self._entries.setdefault(key, []).append((time.time(), response))
+        self._entries.move_to_end(key)
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+
+    def record_hit(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DatabaseCompletionStore:
+    """Store backed by the CachedCompletion table so entries survive restarts.
+
+    To keep hits and misses to a query or two, a key's last_used_at is only
+    rewritten once it is older than touch_fraction of the TTL, so LRU order
+    is that coarse, and the eviction scan runs only when the table holds
+    more rows than max_entries, at most once every eviction_interval seconds.
+    """
+
+    def __init__(self, touch_fraction: float = 0.1, eviction_interval: float = 60.0):
+        self.touch_fraction = touch_fraction
+        self.eviction_interval = eviction_interval
+        self._last_eviction: Optional[float] = None
+
+    def get(self, key: str, ttl: int) -> List[Dict[str, Any]]:
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=ttl)
+        rows = list(CachedCompletion.objects.filter(key=key).values_list('pk', 'response', 'created_at', 'last_used_at'))
+        expired = [pk for pk, _, created_at, _ in rows if created_at < cutoff]
+        if expired:
+            CachedCompletion.objects.filter(pk__in=expired).delete()
+        live = [(response, last_used_at) for _, response, created_at, last_used_at in rows if created_at >= cutoff]
+        if live and max(last_used_at for _, last_used_at in live) < now - timedelta(seconds=ttl * self.touch_fraction):
+            CachedCompletion.objects.filter(key=key).update(last_used_at=now)
+        return [response for response, _ in live]
+
+    def add(self, key: str, model: str, response: Dict[str, Any], max_entries: int) -> None:
+        CachedCompletion.objects.create(key=key, model=model, response=response)
+        # Every key has at least one row, so there is no overflow while rows fit the bound
+        if CachedCompletion.objects.count() > max_entries and self._eviction_due():
+            self.evict(max_entries)
+
+    def _eviction_due(self) -> bool:
+        now = time.monotonic()
+        if self._last_eviction is not None and now - self._last_eviction < self.eviction_interval:
+            return False
+        self._last_eviction = now
+        return True
+
+    def evict(self, max_entries: int) -> int:
+        """Delete whole keys, least recently used first, beyond max_entries. Returns the keys deleted."""
+        keys = CachedCompletion.objects.values('key').annotate(last_used=Max('last_used_at'))
+        overflow = keys.count() - max_entries
+        if overflow <= 0:
+            return 0
+        stale_keys = list(keys.order_by('last_used').values_list('key', flat=True)[:overflow])
+        CachedCompletion.objects.filter(key__in=stale_keys).delete()
+        return len(stale_keys)
+
+    def record_hit(self, key: str) -> None:
+        first = CachedCompletion.objects.filter(key=key).aggregate(pk=Min('pk'))['pk']
+        if first is not None:
+            CachedCompletion.objects.filter(pk=first).update(hits=F('hits') + 1)
+
+    def clear(self) -> None:
+        CachedCompletion.objects.all().delete()
+
+
+class CachedAIProvider:
+    """AIProvider wrapper that serves repeated requests from a completion cache.
+
+    Requests are keyed by a hash of the message list and the wrapped
+    provider's model. Up to `variants` distinct responses are collected per
+    key before the cache starts answering, so users with identical profiles
+    still see some variety between plans.
+    """
+
+    def __init__(
+        self,
+        provider: AIProvider,
+        store: Optional[CompletionCacheStore] = None,
+        ttl: int = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        variants: int = 1,
+    ):
+        self.provider = provider
+        self.store = store or InMemoryCompletionStore()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.variants = max(1, variants)
+        self.model = getattr(provider, 'model', '')
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process."""
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        cached = self.store.get(key, self.ttl)
+        if len(cached) < self.variants:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.store.record_hit(key)
+        return random.choice(cached)
+
+    def _remember(self, key: str, response: Dict[str, Any]) -> None:
+        self.store.add(key, self.model, response, self.max_entries)
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        key = make_cache_key(messages, self.model, response_schema)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.provider.generate_completion(messages, response_schema=response_schema)
+        self._remember(key, response)
+        return response
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        key = make_cache_key(messages, self.model, response_schema)
+        cached = await sync_to_async(self._lookup)(key)
+        if cached is not None:
+            return cached
+        response = await self.provider.agenerate_completion(messages, response_schema=response_schema)
+        await sync_to_async(self._remember)(key, response)
+        return response
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        key = make_cache_key(messages, self.model, response_schema)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield json.dumps(cached)
+            return
+        chunks = []
+        for chunk in self.provider.stream_completion(messages, response_schema=response_schema):
+            chunks.append(chunk)
+            yield chunk
+        try:
+            response = json.loads(''.join(chunks))
+        except json.JSONDecodeError:
+            return
+        self._remember(key, response)
+
+
+def get_completion_store(backend: str) -> CompletionCacheStore:
+    """Return the completion store for a configured backend name."""
+    stores = {
+        "memory": InMemoryCompletionStore,
+        "database": DatabaseCompletionStore,
+    }
+
+    if backend not in stores:
+        raise ValueError(f"Unsupported completion cache backend: {backend}")
+
+    return stores[backend]()
@@ -0,0 +1,145 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingEmail:
+    """A message to dispatch, tagged with the object it was rendered from."""
+    key: Any
+    recipient: str
+    subject: str
+    body: str
+
+    def to_message(self, connection: Any) -> EmailMessage:
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[self.recipient],
+            connection=connection,
+        )
+
+
+@dataclass
+class DispatchFailure:
+    """A message that could not be delivered."""
+    key: Any
+    recipient: str
+    error: str
+
+
+@dataclass
+class DispatchResult:
+    """Outcome of a dispatch run."""
+    elapsed: float = 0.0
+    sent: List[OutgoingEmail] = field(default_factory=list)
+    failures: List[DispatchFailure] = field(default_factory=list)
+
+    @property
+    def messages_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return len(self.sent) / self.elapsed
+
+
+def _chunked(emails: Iterable[OutgoingEmail], size: int) -> Iterator[List[OutgoingEmail]]:
+    chunk: List[OutgoingEmail] = []
+    for email in emails:
+        chunk.append(email)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _send_chunk(chunk: List[OutgoingEmail], backend: Optional[str]) -> DispatchResult:
+    """Send a chunk over a single backend connection.
+
+    The connection stays open for the whole chunk. Messages are handed to
+    send_messages one at a time so a refused recipient is recorded against
+    that message alone; after a failure the connection is dropped and
+    reopened for the next message in case the server closed it.
+    """
+    result = DispatchResult()
+    connection = get_connection(backend)
+    try:
+        for email in chunk:
+            try:
+                # A no-op while the connection is already open
+                connection.open()
+                if not connection.send_messages([email.to_message(connection)]):
+                    raise RuntimeError("The backend did not accept the message")
+            except Exception as e:
+                logger.warning("Failed to send email to %s: %s", email.recipient, e)
+                result.failures.append(DispatchFailure(email.key, email.recipient, str(e)))
+                connection.close()
+            else:
+                result.sent.append(email)
+    finally:
+        connection.close()
+    return result
+
+
+def dispatch_emails(
+    emails: Iterable[OutgoingEmail],
+    chunk_size: int = 100,
+    workers: int = 1,
+    backend: Optional[str] = None,
+    on_chunk: Optional[Callable[[DispatchResult], None]] = None,
+) -> DispatchResult:
+    """Send emails in chunks, each over one reused connection.
+
+    With workers > 1, chunks are sent concurrently on that many connections.
+    Only a bounded window of chunks is taken from `emails` ahead of the
+    senders, so a lazily rendered queue is never read into memory at once.
+    Failures are collected per recipient and never abort the run.
+
+    Args:
+        emails: Messages to send
+        chunk_size: Number of messages sent per connection
+        workers: Number of connections used concurrently
+        backend: Email backend import path; defaults to settings.EMAIL_BACKEND
+        on_chunk: Called on the calling thread with each chunk's result as
+            soon as that chunk is sent, e.g. to flag its messages as sent
+
+    Returns:
+        The sent messages, the failures and the elapsed time
+    """
+    started = time.perf_counter()
+    chunks = _chunked(emails, max(1, chunk_size))
+    result = DispatchResult()
+
+    def collect(chunk_result: DispatchResult) -> None:
+        result.sent.extend(chunk_result.sent)
+        result.failures.extend(chunk_result.failures)
+        if on_chunk:
+            on_chunk(chunk_result)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # One chunk queued per worker beyond those being sent keeps every connection busy
+            window = workers * 2
+            pending: Set[Future] = set()
+            for chunk in chunks:
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(executor.submit(_send_chunk, chunk, backend))
+            for future in wait(pending).done:
+                collect(future.result())
+    else:
+        for chunk in chunks:
+            collect(_send_chunk(chunk, backend))
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from ..constants import EQUIPMENT_CHOICES
+from ..models import Exercise, UserProfile
+
+# Equipment an exercise may list that every user has
+NO_EQUIPMENT = {'', 'bodyweight', 'bodyweight_only', 'body_weight', 'none'}
+# Exercises written by the model name equipment by its display label, e.g. "Pull-up Bar"
+EQUIPMENT_KEYS_BY_LABEL = {label.lower(): key for key, label in EQUIPMENT_CHOICES}
+# Profile equipment that covers anything an exercise may need
+ANY_EQUIPMENT = 'full_gym_access'
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """An existing exercise offered to the model by ID."""
+    id: int
+    name: str
+
+
+def equipment_key(equipment: str) -> str:
+    """The EQUIPMENT_CHOICES key for an equipment key or display label."""
+    equipment = equipment.strip().lower()
+    return EQUIPMENT_KEYS_BY_LABEL.get(equipment) or equipment.replace('-', '_').replace(' ', '_')
+
+
+def has_equipment_for(exercise_equipment: List[str], available: List[str]) -> bool:
+    """Whether a user with the available equipment can do an exercise needing exercise_equipment."""
+    if ANY_EQUIPMENT in available:
+        return True
+    needed = {equipment_key(equipment) for equipment in exercise_equipment} - NO_EQUIPMENT
+    return needed <= set(available)
+
+
+def catalog_candidates(user_profile: UserProfile, limit: Optional[int] = None) -> List[CatalogEntry]:
+    """Catalog exercises a user has the equipment for, best matches for their goal first.
+
+    Exercises are ranked by how often they appear in plans of users with the
+    same goal, then by overall use, so the model is offered proven choices.
+    Ties are broken by name, which keeps the list (and so the prompt) stable
+    between users with the same goal and equipment. Ranking reads the whole
+    catalog, so the result is cached per goal and equipment for CACHE_TTL.
+    """
+    limit = limit or settings.AI_PLAN_CATALOG['MAX_CANDIDATES']
+    equipment = sorted(user_profile.available_equipment or [])
+    cache_key = f"exercise_catalog:{user_profile.goal}:{','.join(equipment)}:{limit}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return [CatalogEntry(id=pk, name=name) for pk, name in cached]
+
+    ranked = Exercise.objects.annotate(
+        goal_uses=Count('sets', filter=Q(sets__daily_workout__workout_plan__user__userprofile__goal=user_profile.goal)),
+        uses=Count('sets'),
+    ).order_by('-goal_uses', '-uses', 'name', 'pk').values_list('pk', 'name', 'equipment_needed')
+
+    candidates: List[CatalogEntry] = []
+    for pk, name, equipment_needed in ranked.iterator():
+        if has_equipment_for(equipment_needed or [], equipment):
+            candidates.append(CatalogEntry(id=pk, name=name))
+            if len(candidates) >= limit:
+                break
+    cache.set(cache_key, [(entry.id, entry.name) for entry in candidates], settings.AI_PLAN_CATALOG['CACHE_TTL'])
+    return candidates
@@ -0,0 +1,175 @@
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from openai.types.chat import ChatCompletionMessageParam
+
+from .ai_providers import AIProvider, AIProviderError
+from .stats import percentile
+
+PRIMARY = 'primary'
+BACKUP = 'backup'
+
+
+def matches_schema(value: Any, schema: Optional[Dict[str, Any]]) -> bool:
+    """Whether value has the types and required keys of a JSON schema (as built by json_schema_for)."""
+    if not schema:
+        return True
+    expected = schema.get('type')
+    if expected == 'object':
+        if not isinstance(value, dict):
+            return False
+        properties = schema.get('properties', {})
+        return all(
+            key in value and matches_schema(value[key], properties.get(key))
+            for key in schema.get('required', [])
+        )
+    if expected == 'array':
+        return isinstance(value, list) and all(matches_schema(item, schema.get('items')) for item in value)
+    if expected == 'integer':
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == 'string':
+        return isinstance(value, str)
+    return True
+
+
+def is_valid_response(response: Any, response_schema: Optional[Dict[str, Any]]) -> bool:
+    """Whether a completion parsed to a JSON object that follows the requested schema, if any."""
+    if not isinstance(response, dict):
+        return False
+    return response_schema is None or matches_schema(response, response_schema.get('schema'))
+
+
+class HedgedProvider:
+    """AIProvider that backs slow requests to a primary provider up with a second one.
+
+    If the primary has not answered after the hedge delay, or fails or
+    returns an invalid response before then, the same request is sent to the
+    backup. The first valid response wins and the other request is cancelled.
+
+    The hedge delay is `delay` seconds until `min_samples` primary latencies
+    have been seen; with a `latency_percentile`, it then follows that
+    percentile of the last `window` primary latencies, so roughly
+    (100 - percentile)% of requests are hedged. A primary request cancelled
+    for losing counts as a sample of its elapsed time, a lower bound that
+    keeps slow tails from dropping out of the window.
+
+    Streams are not hedged: text already yielded cannot be taken back, so
+    stream_completion goes to the primary alone.
+    """
+
+    def __init__(
+        self,
+        primary: AIProvider,
+        backup: AIProvider,
+        delay: float = 10.0,
+        latency_percentile: Optional[float] = None,
+        min_samples: int = 20,
+        window: int = 200,
+        validate: Callable[[Any, Optional[Dict[str, Any]]], bool] = is_valid_response,
+    ):
+        self.primary = primary
+        self.backup = backup
+        self.delay = delay
+        self.latency_percentile = latency_percentile
+        self.min_samples = min_samples
+        self.validate = validate
+        self.model = getattr(primary, 'model', '')
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._counts = {'requests': 0, 'hedged': 0, PRIMARY: 0, BACKUP: 0, 'failures': 0}
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary before sending the backup request."""
+        with self._lock:
+            latencies = list(self._latencies)
+        if self.latency_percentile is None or len(latencies) < self.min_samples:
+            return self.delay
+        return percentile(latencies, self.latency_percentile)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge rate and wins for this process, for tuning the delay against the cost of extra requests."""
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "requests": counts['requests'],
+            "hedged": counts['hedged'],
+            "hedge_rate": counts['hedged'] / counts['requests'] if counts['requests'] else 0.0,
+            "primary_wins": counts[PRIMARY],
+            "backup_wins": counts[BACKUP],
+            # Of the hedged requests, how often the backup answered first
+            "backup_win_rate": counts[BACKUP] / counts['hedged'] if counts['hedged'] else 0.0,
+            "failures": counts['failures'],
+            "hedge_delay": self.hedge_delay(),
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _record_primary_latency(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    async def _attempt(self, provider: AIProvider, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        response = await provider.agenerate_completion(messages, response_schema=response_schema)
+        if not self.validate(response, response_schema):
+            raise AIProviderError("Completion did not match the requested response schema")
+        return response
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._count('requests')
+        started = time.perf_counter()
+        attempts: Dict[asyncio.Future, str] = {
+            asyncio.ensure_future(self._attempt(self.primary, messages, response_schema)): PRIMARY
+        }
+        errors: List[Tuple[str, BaseException]] = []
+        deadline: Optional[float] = self.hedge_delay()
+        try:
+            while attempts:
+                done, _ = await asyncio.wait(attempts, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = attempts.pop(task)
+                    if name == PRIMARY:
+                        self._record_primary_latency(time.perf_counter() - started)
+                    if task.exception() is None:
+                        self._count(name)
+                        return task.result()
+                    errors.append((name, task.exception()))
+                # Hedge once: on reaching the delay, or as soon as the primary has failed
+                if deadline is not None:
+                    deadline = None
+                    self._count('hedged')
+                    attempts[asyncio.ensure_future(self._attempt(self.backup, messages, response_schema))] = BACKUP
+        finally:
+            for task, name in attempts.items():
+                if task.done():
+                    # Finished alongside the winner; retrieve its outcome so asyncio does not warn
+                    if not task.cancelled():
+                        task.exception()
+                    continue
+                task.cancel()
+                if name == PRIMARY:
+                    self._record_primary_latency(time.perf_counter() - started)
+        self._count('failures')
+        summary = '; '.join(f"{name}: {error}" for name, error in errors)
+        raise AIProviderError(f"Hedged request failed ({summary})") from errors[0][1]
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # The async path can cancel the losing request, which a blocking call cannot
+        return async_to_sync(self.agenerate_completion)(messages, response_schema)
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        return self.primary.stream_completion(messages, response_schema=response_schema)
+
+
+def find_hedged_provider(provider: Any) -> Optional[HedgedProvider]:
+    """The HedgedProvider at the core of a stack of provider wrappers, if there is one."""
+    while provider is not None:
+        if isinstance(provider, HedgedProvider):
+            return provider
+        provider = getattr(provider, 'provider', None)
+    return None
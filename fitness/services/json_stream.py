@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional
+import json
+
+
+class JSONArrayStreamParser:
+    """Incrementally parse a streamed JSON object, yielding items of one array.
+
+    Chunks of the document are passed to `feed` as they arrive. Every element
+    of the top-level array stored under `key` is returned as soon as its
+    closing bracket has been seen, so callers can act on the first items long
+    before the whole document is complete. Once the stream is exhausted,
+    `document` parses and returns the full object.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._chunks: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string: Optional[List[str]] = None
+        self._last_key: Optional[str] = None
+        self._in_target = False
+        self._element: Optional[List[str]] = None
+
+    # Depth of the target array's elements: top-level object, then the array
+    _TARGET_DEPTH = 2
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk and return the array items it completed."""
+        self._chunks.append(chunk)
+        items: List[Any] = []
+        for char in chunk:
+            if self._element is not None:
+                self._element.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string is not None:
+                        self._last_key = ''.join(self._string)
+                        self._string = None
+                elif self._string is not None:
+                    self._string.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                # Only strings directly inside the top-level object can be the key we want
+                self._string = [] if self._stack == ['{'] else None
+            elif char in '{[':
+                if self._in_target and len(self._stack) == self._TARGET_DEPTH:
+                    self._element = [char]
+                self._stack.append(char)
+                if char == '[' and self._stack == ['{', '['] and self._last_key == self.key:
+                    self._in_target = True
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if self._element is not None and len(self._stack) == self._TARGET_DEPTH:
+                    items.append(json.loads(''.join(self._element)))
+                    self._element = None
+                elif self._in_target and len(self._stack) < self._TARGET_DEPTH:
+                    self._in_target = False
+        return items
+
+    def document(self) -> Dict[str, Any]:
+        """Parse the complete streamed document.
+
+        Raises:
+            ValueError: If the streamed text is not valid JSON
+        """
+        try:
+            return json.loads(''.join(self._chunks))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse streamed response as JSON: {e}")
@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, List, Optional
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .batch_generation import BatchSummary, GenerationResult, run_batch
+from .workout_plan_generator import WorkoutPlanGenerator
+from ..constants import JOB_STATUS_PENDING, JOB_STATUS_RUNNING
+from ..models import PlanGenerationJob, UserProfile, WorkoutPlan
+
+
+class PlanGenerationInProgress(Exception):
+    """Raised when an attached caller gives up waiting for another process's generation."""
+
+
+class PlanGenerationLockLost(Exception):
+    """Raised when a claimed job was expired before its generation started."""
+
+
+def claim_jobs(batch_size: int) -> List[PlanGenerationJob]:
+    """Atomically move up to batch_size pending jobs to running and return them.
+
+    On databases that support it, rows are locked with SKIP LOCKED so several
+    workers can claim disjoint batches concurrently.
+    """
+    # Release users whose previous worker died mid-generation
+    PlanGenerationJob.expire_stale()
+    with transaction.atomic():
+        jobs = list(
+            PlanGenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=JOB_STATUS_PENDING)
+            .order_by('created_at')[:batch_size]
+        )
+        if not jobs:
+            return []
+        now = timezone.now()
+        PlanGenerationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=JOB_STATUS_RUNNING,
+            started_at=now,
+            attempts=F('attempts') + 1
+        )
+        for job in jobs:
+            job.status = JOB_STATUS_RUNNING
+            job.started_at = now
+    return jobs
+
+
+def process_jobs(
+    jobs: List[PlanGenerationJob],
+    generator: WorkoutPlanGenerator,
+    concurrency: int = 8,
+    on_result: Optional[Callable[[GenerationResult], None]] = None,
+) -> BatchSummary:
+    """Generate plans for claimed jobs concurrently, recording each outcome as it lands.
+
+    Jobs are claimed up front but only `concurrency` generate at a time, so
+    each job's lock is refreshed when its generation starts; a job that
+    expired while waiting is skipped, since another generation owns the user.
+    """
+    profiles = {
+        profile.user_id: profile
+        for profile in UserProfile.objects.select_related('user').filter(user_id__in=[job.user_id for job in jobs])
+    }
+    jobs_by_user: Dict[int, PlanGenerationJob] = {}
+    for job in jobs:
+        if job.user_id in profiles:
+            jobs_by_user[job.user_id] = job
+        else:
+            job.mark_failed('User has no profile')
+
+    def start(profile: UserProfile) -> None:
+        if not jobs_by_user[profile.user_id].refresh_lock():
+            raise PlanGenerationLockLost(f"The generation lock for {profile.user} expired before it started")
+
+    def record(result: GenerationResult) -> None:
+        job = jobs_by_user[result.profile.user_id]
+        if result.succeeded:
+            job.mark_succeeded(result.plan)
+        else:
+            job.mark_failed(str(result.error))
+        if on_result:
+            on_result(result)
+
+    return run_batch(
+        generator,
+        [profiles[user_id] for user_id in jobs_by_user],
+        concurrency=concurrency,
+        on_result=record,
+        on_start=start
+    )
+
+
+def wait_for_job(job: PlanGenerationJob, timeout: Optional[float] = None) -> WorkoutPlan:
+    """Block until another process finishes job and return the plan it generated.
+
+    Raises:
+        PlanGenerationInProgress: If the job is still running after timeout seconds
+        RuntimeError: If the job failed
+    """
+    lock_settings = settings.PLAN_GENERATION_LOCK
+    deadline = time.monotonic() + (lock_settings['WAIT_TIMEOUT'] if timeout is None else timeout)
+    while job.is_active:
+        if time.monotonic() >= deadline:
+            raise PlanGenerationInProgress(f"A plan for {job.user} is still being generated (job {job.pk})")
+        time.sleep(lock_settings['POLL_INTERVAL'])
+        job.refresh_from_db()
+    if job.workout_plan is None:
+        raise RuntimeError(f"Plan generation failed: {job.error or 'no plan was saved'}")
+    return job.workout_plan
+
+
+def generate_single_flight(
+    generator: WorkoutPlanGenerator,
+    user_profile: UserProfile,
+    timeout: Optional[float] = None,
+    **kwargs: Any
+) -> WorkoutPlan:
+    """Generate a user's plan unless a generation is already in flight, then reuse its result.
+
+    The caller that takes the user's lock generates (passing kwargs on to
+    generate_weekly_plan) and records the outcome on the job; concurrent
+    callers wait for that job instead of paying for another completion.
+    """
+    job, owned = PlanGenerationJob.acquire(user_profile.user)
+    if not owned:
+        return wait_for_job(job, timeout)
+    try:
+        plan = generator.generate_weekly_plan(user_profile, **kwargs)
+    except Exception as e:
+        job.mark_failed(str(e))
+        raise
+    job.mark_succeeded(plan)
+    return plan
+
+
+def acquire_jobs(profiles: List[UserProfile]) -> Dict[int, PlanGenerationJob]:
+    """Take the generation lock of every profile's user that is not already generating.
+
+    Returns the owned running jobs keyed by user id; users with a generation
+    in flight elsewhere are left out.
+    """
+    jobs = {}
+    for profile in profiles:
+        job, owned = PlanGenerationJob.acquire(profile.user)
+        if owned:
+            jobs[profile.user_id] = job
+    return jobs
+
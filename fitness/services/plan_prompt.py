@@ -0,0 +1,408 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypedDict, get_args, get_origin, get_type_hints
+import json
+
+from openai.types.chat import ChatCompletionMessageParam
+
+from .exercise_catalog import CatalogEntry, catalog_candidates
+from ..models import DailyWorkout, UserProfile
+
+
+class ExerciseData(TypedDict):
+    name: str
+    description: str
+    muscle_groups: List[str]
+    equipment_needed: List[str]
+    difficulty_level: int
+    instructions: str
+    tips: str
+    sets: int
+    reps: str
+    rest: str
+    weight: str
+    notes: str
+
+class WorkoutData(TypedDict):
+    day: str
+    focus: str
+    description: str
+    duration: str
+    intensity: int
+    notes: str
+    exercises: List[ExerciseData]
+
+class WeeklyPlanResponse(TypedDict):
+    weekly_plan: List[WorkoutData]
+    equipment_needed: List[str]
+    general_guidelines: List[str]
+
+# The 'catalog' variant's response: existing exercises by ID, full definitions only for new ones
+class ExerciseDefinition(TypedDict):
+    name: str
+    description: str
+    muscle_groups: List[str]
+    equipment_needed: List[str]
+    difficulty_level: int
+    instructions: str
+    tips: str
+
+class ExerciseReference(TypedDict):
+    exercise_id: int
+    sets: int
+    reps: str
+    rest: str
+    weight: str
+    notes: str
+
+class CatalogWorkoutData(TypedDict):
+    day: str
+    focus: str
+    description: str
+    duration: str
+    intensity: int
+    notes: str
+    exercises: List[ExerciseReference]
+    new_exercises: List[ExerciseDefinition]
+
+class CatalogPlanResponse(TypedDict):
+    weekly_plan: List[CatalogWorkoutData]
+    equipment_needed: List[str]
+    general_guidelines: List[str]
+
+# The planning call of fan-out generation: the week's split without the exercises
+class DaySplit(TypedDict):
+    day: str
+    focus: str
+    intensity: int
+
+class WeeklySplitResponse(TypedDict):
+    weekly_split: List[DaySplit]
+    equipment_needed: List[str]
+    general_guidelines: List[str]
+
+
+# Valid ranges of integer fields, mirroring the model validators
+FIELD_RANGES: Dict[str, Tuple[int, int]] = {
+    'difficulty_level': (1, 5),
+    'intensity': (1, 10),
+}
+
+SYSTEM_PROMPT = "You are a professional personal trainer creating personalized workout plans. You must always respond with valid JSON."
+
+PROMPT_VARIANTS = ('compact', 'legacy', 'catalog')
+
+# Rough characters-per-token ratio for English text when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+# Per-message framing tokens added by the chat format
+TOKENS_PER_MESSAGE = 3
+
+
+def _is_typed_dict(tp: Any) -> bool:
+    return isinstance(tp, type) and issubclass(tp, dict) and hasattr(tp, '__annotations__')
+
+
+def json_schema_for(tp: Any) -> Dict[str, Any]:
+    """JSON schema for a TypedDict (or a field type within one).
+
+    Every key is required and no extra keys are allowed, which is what
+    strict structured-output modes expect.
+    """
+    if _is_typed_dict(tp):
+        hints = get_type_hints(tp)
+        properties = {}
+        for name, field_type in hints.items():
+            properties[name] = json_schema_for(field_type)
+            if name in FIELD_RANGES:
+                low, high = FIELD_RANGES[name]
+                properties[name]['description'] = f"{low}-{high}"
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": list(hints),
+            "additionalProperties": False,
+        }
+    if get_origin(tp) in (list, List):
+        return {"type": "array", "items": json_schema_for(get_args(tp)[0])}
+    if tp is int:
+        return {"type": "integer"}
+    if tp is str:
+        return {"type": "string"}
+    raise TypeError(f"Unsupported type in plan schema: {tp!r}")
+
+
+def missing_fields(tp: Any, data: Any, path: str = '') -> List[str]:
+    """Paths of the keys a TypedDict requires that data lacks, e.g. 'exercises[2].sets'."""
+    if _is_typed_dict(tp):
+        if not isinstance(data, dict):
+            return [path or '$']
+        missing = []
+        for name, field_type in get_type_hints(tp).items():
+            key = f'{path}.{name}' if path else name
+            if name in data:
+                missing.extend(missing_fields(field_type, data[name], key))
+            else:
+                missing.append(key)
+        return missing
+    if get_origin(tp) in (list, List):
+        if not isinstance(data, list):
+            return [path or '$']
+        return [key for index, item in enumerate(data) for key in missing_fields(get_args(tp)[0], item, f'{path}[{index}]')]
+    return []
+
+
+def compact_shape(tp: Any, field: Optional[str] = None) -> str:
+    """One-line outline of a TypedDict, e.g. {"day":str,"intensity":int 1-10}."""
+    if _is_typed_dict(tp):
+        fields = ','.join(f'"{name}":{compact_shape(field_type, name)}' for name, field_type in get_type_hints(tp).items())
+        return '{' + fields + '}'
+    if get_origin(tp) in (list, List):
+        return '[' + compact_shape(get_args(tp)[0]) + ']'
+    if tp is int:
+        if field in FIELD_RANGES:
+            low, high = FIELD_RANGES[field]
+            return f'int {low}-{high}'
+        return 'int'
+    if tp is str:
+        return 'str'
+    raise TypeError(f"Unsupported type in plan schema: {tp!r}")
+
+
+@lru_cache(maxsize=None)
+def _tiktoken_encoding(model: str) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text: str, model: str = 'gpt-4') -> int:
+    """Count the tokens in text with tiktoken, or estimate them if it is not installed."""
+    encoding = _tiktoken_encoding(model)
+    if encoding is None:
+        return max(1, round(len(text) / CHARS_PER_TOKEN))
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[ChatCompletionMessageParam], model: str = 'gpt-4') -> int:
+    """Approximate input tokens of a chat request, including message framing."""
+    return sum(count_tokens(str(message.get('content', '')), model) + TOKENS_PER_MESSAGE for message in messages) + TOKENS_PER_MESSAGE
+
+
+class PlanPromptBuilder:
+    """Builds the chat messages and response schema for a weekly plan request.
+
+    The 'compact' variant describes the response with a one-line outline
+    derived from WeeklyPlanResponse and asks for terse text, and offers the
+    full JSON schema to providers with a structured-output mode. 'legacy'
+    is the original prompt with a worked example, kept for comparison.
+    'catalog' is the compact prompt plus a list of existing exercises the
+    model refers to by ID, so it only writes out definitions for new ones.
+    The split and day prompts of fan-out generation are always compact.
+    """
+
+    def __init__(self, variant: str = 'compact'):
+        if variant not in PROMPT_VARIANTS:
+            raise ValueError(f"Unsupported prompt variant: {variant}")
+        self.variant = variant
+
+    def _profile_lines(self, user_profile: UserProfile) -> str:
+        return (
+            f"Goal: {user_profile.goal}\n"
+            f"Workouts per week: {user_profile.workouts_per_week}\n"
+            f"Available equipment: {', '.join(user_profile.get_available_equipment_display())}"
+        )
+
+    def _days_lines(self, days: Optional[Sequence[str]], completed: Sequence[DailyWorkout], key: str = 'weekly_plan') -> str:
+        """Which days to return and, for a partial week, a summary of the days already done."""
+        if days is None:
+            return f"Return exactly 7 days in {key}, one per day."
+        lines = [f"Return exactly {len(days)} days in {key}, one each for: {', '.join(days)}."]
+        if completed:
+            done = '; '.join(
+                f"{workout.day}: {workout.focus or 'Workout'} "
+                f"({', '.join(exercise_set.exercise.name for exercise_set in workout.exercise_sets.all()) or 'no exercises'})"
+                for workout in completed
+            )
+            lines.append(f"Already done this week, balance the remaining days around it: {done}")
+        return '\n'.join(lines)
+
+    def _request_prompt(self, user_profile: UserProfile, days: Optional[Sequence[str]], completed: Sequence[DailyWorkout]) -> str:
+        return (
+            f"Generate a weekly workout plan for this user:\n"
+            f"{self._profile_lines(user_profile)}\n"
+            f"{self._days_lines(days, completed)}"
+        )
+
+    def _instructions(self) -> str:
+        """The variant's fixed instructions and response outline, the same for every user."""
+        if self.variant == 'catalog':
+            return (
+                f"{SYSTEM_PROMPT}\n"
+                f"Keep every text field to one short sentence.\n"
+                f"Prefer the existing exercises in the list that follows, referenced by exercise_id. "
+                f"For an exercise not listed, use exercise_id 0 and add its definition to the day's new_exercises, "
+                f"in the same order.\n"
+                f"JSON shape: {compact_shape(CatalogPlanResponse)}"
+            )
+        return (
+            f"{SYSTEM_PROMPT}\n"
+            f"Keep every text field to one short sentence.\n"
+            f"JSON shape: {compact_shape(WeeklyPlanResponse)}"
+        )
+
+    def _legacy_prompt(self, user_profile: UserProfile, days: Optional[Sequence[str]], completed: Sequence[DailyWorkout]) -> str:
+        if days is None:
+            days_lines = "There must be 7 workouts in the weekly plan."
+        else:
+            days_lines = self._days_lines(days, completed)
+        return f"""Generate a weekly workout plan for a user with the following profile:
+        Goal: {user_profile.goal}
+        Workouts per week: {user_profile.workouts_per_week}
+        Available equipment: {', '.join(user_profile.get_available_equipment_display())}
+
+        Please provide a structured JSON response with the following format:
+        {days_lines}
+        {{
+            "weekly_plan": [
+                {{
+                    "day": "Monday",
+                    "focus": "Upper Body",
+                    "description": "Description of the workout",
+                    "duration": "45-60 minutes",
+                    "intensity": 4,
+                    "notes": "Additional notes",
+                    "exercises": [
+                        {{
+                            "name": "Exercise name",
+                            "description": "Detailed description of the exercise",
+                            "muscle_groups": ["list", "of", "muscle", "groups"],
+                            "equipment_needed": ["list", "of", "required", "equipment"],
+                            "difficulty_level": 1,
+                            "instructions": "Step-by-step instructions",
+                            "tips": "Tips for proper form",
+                            "sets": 3,
+                            "reps": "12-15",
+                            "rest": "60 seconds",
+                            "weight": "Optional weight",
+                            "notes": "Optional notes for this specific set"
+                        }}
+                        {{
+                            "name": "Exercise name",
+                            "description": "Detailed description of the exercise",
+                            "muscle_groups": ["list", "of", "muscle", "groups"],
+                            "equipment_needed": ["list", "of", "required", "equipment"],
+                            "difficulty_level": 1,
+                            "instructions": "Step-by-step instructions",
+                            "tips": "Tips for proper form",
+                            "sets": 3,
+                            "reps": "12-15",
+                            "rest": "60 seconds",
+                            "weight": "Optional weight",
+                            "notes": "Optional notes for this specific set"
+                        }}
+                        ...
+                    ]
+                }}
+            ],
+            "equipment_needed": ["list", "of", "equipment"],
+            "general_guidelines": ["list", "of", "guidelines"]
+        }}"""
+
+    def build_messages(
+        self,
+        user_profile: UserProfile,
+        days: Optional[Sequence[str]] = None,
+        completed: Sequence[DailyWorkout] = (),
+        catalog: Optional[Sequence[CatalogEntry]] = None,
+    ) -> List[ChatCompletionMessageParam]:
+        """Chat messages requesting a weekly plan for a user.
+
+        With days, only those days are requested and the completed workouts
+        (with exercise_sets__exercise prefetched) are summarized so the model
+        can plan around them. The 'catalog' variant offers the given catalog
+        entries, or looks up the user's candidates when none are given.
+        The instructions every user shares come first, as system messages,
+        so a provider's prompt cache can reuse them; the profile and days
+        follow in the user message.
+        """
+        if self.variant == 'legacy':
+            return [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": self._legacy_prompt(user_profile, days, completed)}
+            ]
+        messages: List[ChatCompletionMessageParam] = [{"role": "system", "content": self._instructions()}]
+        if self.variant == 'catalog':
+            if catalog is None:
+                catalog = catalog_candidates(user_profile)
+            entries = '\n'.join(f"{entry.id}: {entry.name}" for entry in catalog)
+            messages.append({"role": "system", "content": f"Existing exercises (exercise_id: name):\n{entries or '(none yet)'}"})
+        messages.append({"role": "user", "content": self._request_prompt(user_profile, days, completed)})
+        return messages
+
+    def response_schema(self) -> Optional[Dict[str, Any]]:
+        """Named JSON schema for providers with a structured-output mode, if the variant uses one."""
+        if self.variant == 'legacy':
+            return None
+        if self.variant == 'catalog':
+            return {"name": "weekly_plan", "schema": json_schema_for(CatalogPlanResponse)}
+        return {"name": "weekly_plan", "schema": json_schema_for(WeeklyPlanResponse)}
+
+    def build_split_messages(
+        self,
+        user_profile: UserProfile,
+        days: Optional[Sequence[str]] = None,
+        completed: Sequence[DailyWorkout] = (),
+    ) -> List[ChatCompletionMessageParam]:
+        """Chat messages requesting only the week's split, the first call of fan-out generation."""
+        prompt = (
+            f"Plan the split of a weekly workout plan for this user:\n"
+            f"{self._profile_lines(user_profile)}\n"
+            f"{self._days_lines(days, completed, 'weekly_split')} Rest days get the focus \"Rest\".\n"
+            f"JSON shape: {compact_shape(WeeklySplitResponse)}"
+        )
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def build_day_messages(self, user_profile: UserProfile, day: DaySplit, split: Sequence[DaySplit]) -> List[ChatCompletionMessageParam]:
+        """Chat messages requesting one day of a planned split.
+
+        Everything but the last line is the same for every day of a plan, so
+        providers with prompt caching can reuse the prefix across the calls.
+        """
+        week = '; '.join(f"{split_day['day']}: {split_day['focus']}" for split_day in split)
+        prompt = (
+            f"Generate one day of a weekly workout plan for this user:\n"
+            f"{self._profile_lines(user_profile)}\n"
+            f"Weekly split: {week}\n"
+            f"Keep every text field to one short sentence.\n"
+            f"JSON shape: {compact_shape(WorkoutData)}\n"
+            f"Day: {day['day']} ({day['focus']}, intensity {day['intensity']})"
+        )
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    def split_schema(self) -> Dict[str, Any]:
+        """Named JSON schema of the split requested by build_split_messages."""
+        return {"name": "weekly_split", "schema": json_schema_for(WeeklySplitResponse)}
+
+    def day_schema(self) -> Dict[str, Any]:
+        """Named JSON schema of the day requested by build_day_messages."""
+        return {"name": "daily_workout", "schema": json_schema_for(WorkoutData)}
+
+    def token_counts(self, user_profile: UserProfile, model: str = 'gpt-4') -> Dict[str, int]:
+        """Input token counts of the messages and, when used, the response schema."""
+        schema = self.response_schema()
+        counts = {
+            "messages": count_message_tokens(self.build_messages(user_profile), model),
+            "schema": count_tokens(json.dumps(schema), model) if schema else 0,
+        }
+        counts["total"] = counts["messages"] + counts["schema"]
+        return counts
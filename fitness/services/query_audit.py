@@ -0,0 +1,122 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from ..constants import DAYS_OF_WEEK, JOB_STATUS_PENDING, JOB_STATUS_SUCCEEDED
+from ..models import DailyWorkout, Exercise, PlanGenerationJob, WorkoutPlan, users_with_email
+
+# Plan lines that read a whole table, per database vendor
+FULL_SCAN_PATTERNS: Dict[str, re.Pattern] = {
+    # "SCAN fitness_workoutplan", with or without "USING INDEX": both visit every row
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+@dataclass
+class AuditSample:
+    """Seeded rows used as parameters for the audited queries."""
+    user: User
+    workout_plan: WorkoutPlan
+    dispatch_date: date
+    exercise_keys: List[str] = field(default_factory=list)
+
+
+@dataclass
+class QueryAudit:
+    """The query plan of one hot query and any full table scans in it."""
+    name: str
+    plan: str
+    full_scans: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return not self.full_scans
+
+
+def hot_queries(sample: AuditSample) -> Dict[str, QuerySet]:
+    """The lookups on the app's request and worker paths, keyed by a short name."""
+    week_start = sample.workout_plan.week_start_date
+    return {
+        'latest_plan': WorkoutPlan.objects.filter(user=sample.user).order_by('-week_start_date')[:1],
+        'current_week_plans': WorkoutPlan.objects.filter(
+            user=sample.user, week_start_date__gte=week_start, week_start_date__lte=week_start + timedelta(days=6)
+        ),
+        'user_by_email': users_with_email(sample.user.email.upper()),
+        'plan_days': DailyWorkout.objects.filter(workout_plan=sample.workout_plan).order_by('day_index', 'day'),
+        'unsent_workouts': DailyWorkout.objects.filter(date=sample.dispatch_date, sent=False),
+        'exercises_by_key': Exercise.objects.filter(canonical_key__in=sample.exercise_keys).order_by('pk'),
+        'pending_jobs': PlanGenerationJob.objects.filter(status=JOB_STATUS_PENDING).order_by('created_at')[:10],
+    }
+
+
+def full_table_scans(plan: str, vendor: str) -> List[str]:
+    """Tables read in full according to an EXPLAIN plan."""
+    pattern = FULL_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        raise ValueError(f"Query audit does not support the {vendor} database")
+    return pattern.findall(plan)
+
+
+def seed_audit_data(users: int = 200, weeks: int = 4, exercises: int = 1000) -> AuditSample:
+    """Bulk-create users with several weeks of plans, a catalog and job history.
+
+    Every week but the last is marked sent, so the dispatch queue only holds
+    the current week like it does in production.
+    """
+    today = timezone.now().date()
+    current_week = today - timedelta(days=(today.weekday() + 1) % 7)
+
+    seeded_users = User.objects.bulk_create([
+        User(username=f'audit-{i}@example.com', email=f'audit-{i}@example.com', password='!')
+        for i in range(users)
+    ])
+    catalog = Exercise.objects.bulk_create([
+        Exercise(
+            name=f'Audit exercise {i}', description='', muscle_groups=['legs'], difficulty_level=1,
+            instructions='', canonical_key=Exercise.make_canonical_key(f'Audit exercise {i}', ['legs'])
+        )
+        for i in range(exercises)
+    ])
+    plans = WorkoutPlan.objects.bulk_create([
+        WorkoutPlan(user=user, week_start_date=current_week - timedelta(weeks=week))
+        for user in seeded_users
+        for week in range(weeks)
+    ])
+    now = timezone.now()
+    DailyWorkout.objects.bulk_create([
+        DailyWorkout(
+            workout_plan=plan, day=day, day_index=index,
+            date=plan.week_start_date + timedelta(days=index),
+            sent=plan.week_start_date < current_week,
+            sent_at=now if plan.week_start_date < current_week else None,
+        )
+        for plan in plans
+        for index, day in enumerate(DAYS_OF_WEEK)
+    ], batch_size=1000)
+    PlanGenerationJob.objects.bulk_create([
+        PlanGenerationJob(user=plan.user, status=JOB_STATUS_SUCCEEDED, workout_plan=plan, finished_at=now)
+        for plan in plans
+    ], batch_size=1000)
+
+    return AuditSample(
+        user=seeded_users[-1],
+        workout_plan=plans[-weeks],
+        dispatch_date=today,
+        exercise_keys=[exercise.canonical_key for exercise in catalog[:10]],
+    )
+
+
+def audit_hot_queries(sample: AuditSample, queries: Callable[[AuditSample], Dict[str, QuerySet]] = hot_queries) -> List[QueryAudit]:
+    """EXPLAIN every hot query and report the full table scans in each plan."""
+    audits = []
+    for name, queryset in queries(sample).items():
+        plan = queryset.explain()
+        audits.append(QueryAudit(name=name, plan=plan, full_scans=full_table_scans(plan, connection.vendor)))
+    return audits
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+from typing import Optional
+
+from ..models import RecoveryScore
+
+WORKOUT_SUGGESTIONS = {
+    "cardio": {
+        "hard": "HIIT run, 5x800m intervals",
+        "moderate": "30 min steady state jog",
+        "light": "20 min walk or light cycling"
+    },
+    "strength": {
+        "hard": "Full body powerlifting circuit",
+        "moderate": "Push-pull split workout",
+        "light": "Bodyweight resistance routine"
+    },
+    "mixed": {
+        "hard": "CrossFit-style metcon",
+        "moderate": "Kettlebell circuit",
+        "light": "Yoga and mobility drills"
+    }
+}
+
+def get_recovery(user: User) -> Optional[RecoveryScore]:
+    """The user's latest stored recovery score, kept current by the sync_recovery command."""
+    return RecoveryScore.latest_for(user)
+
+def workout_for_score(score: float, preference: str) -> str:
+    level = "light"
+    if score >= 80:
+        level = "hard"
+    elif score >= 50:
+        level = "moderate"
+    return WORKOUT_SUGGESTIONS.get(preference, {}).get(level, "Rest day!")
+
+def suggest_workout(user: User, preference: str) -> str:
+    """Suggest a workout from the user's stored recovery score.
+
+    Without a recent score the light option is suggested.
+    """
+    recovery = get_recovery(user)
+    return workout_for_score(recovery.score if recovery else 0, preference)
+
+def send_workout_suggestion(user: User, preference: str) -> None:
+    recovery = get_recovery(user)
+    if recovery is None:
+        return
+    workout = workout_for_score(recovery.score, preference)
+    subject = "Your Personalized Workout Suggestion"
+    message = f"Based on your recovery score of {recovery.score:.0f}, here's your suggested workout:\n\n{workout}"
+
+    send_email(
+        to_email=user.email,
+        subject=subject,
+        message=message
+    )
+
+def send_email(to_email: str, subject: str, message: str) -> None:
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[to_email],
+        fail_silently=False,
+    )
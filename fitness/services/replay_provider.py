@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from openai.types.chat import ChatCompletionMessageParam
+
+from .ai_providers import AIProvider, AIProviderError
+from .completion_cache import make_cache_key
+
+LATENCY_MODES = ('none', 'fixed', 'normal', 'recorded')
+MISS_POLICIES = ('error', 'random')
+# Pieces a replayed completion is streamed in, with the latency spread between them
+STREAM_CHUNKS = 20
+
+
+def cassette_key(messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> str:
+    """Fingerprint of a request within a cassette; recordings from any model can be replayed."""
+    return make_cache_key(messages, '', response_schema)
+
+
+@dataclass
+class Recording:
+    """A captured completion and how long the real provider took to return it."""
+    response: Dict[str, Any]
+    latency: float
+
+
+class Cassette:
+    """Directory of recorded completions, one JSON file per request key.
+
+    Every recording is loaded into memory up front so replays never touch
+    the disk; new recordings are written through to their file.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._recordings: Dict[str, List[Recording]] = {}
+        self._lock = threading.Lock()
+        if self.directory.is_dir():
+            for path in sorted(self.directory.glob('*.json')):
+                with path.open() as f:
+                    entry = json.load(f)
+                self._recordings[entry['key']] = [Recording(**recording) for recording in entry['recordings']]
+
+    def __len__(self) -> int:
+        return sum(len(recordings) for recordings in self._recordings.values())
+
+    def get(self, key: str) -> List[Recording]:
+        return self._recordings.get(key, [])
+
+    def all(self) -> List[Recording]:
+        return [recording for recordings in self._recordings.values() for recording in recordings]
+
+    def add(self, key: str, messages: List[ChatCompletionMessageParam], model: str, recording: Recording) -> None:
+        """Append a recording under key and rewrite that key's file atomically."""
+        with self._lock:
+            recordings = self._recordings.setdefault(key, [])
+            recordings.append(recording)
+            entry = {
+                'key': key,
+                'model': model,
+                'messages': messages,
+                'updated_at': timezone.now().isoformat(),
+                'recordings': [{'response': r.response, 'latency': r.latency} for r in recordings],
+            }
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f'{key}.json'
+            tmp_path = path.with_suffix('.json.tmp')
+            with tmp_path.open('w') as f:
+                json.dump(entry, f, indent=2, default=str)
+            os.replace(tmp_path, path)
+
+
+class ReplayProvider:
+    """AIProvider serving recorded completions from a cassette, without any network.
+
+    Each reply is delayed by a synthetic latency: 'none', 'fixed' (the mean),
+    'normal' (a Gaussian around the mean) or 'recorded' (the real latency of
+    the recording, times latency_scale). A request with no recording raises
+    AIProviderError, or with on_miss='random' is answered with any recording
+    so load tests can use more distinct profiles than were recorded.
+    Options default to settings.AI_REPLAY.
+    """
+
+    def __init__(
+        self,
+        cassette_dir: Optional[str] = None,
+        latency: Optional[str] = None,
+        latency_mean: Optional[float] = None,
+        latency_stddev: Optional[float] = None,
+        latency_scale: Optional[float] = None,
+        on_miss: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        replay_settings = settings.AI_REPLAY
+        self.cassette = Cassette(cassette_dir or replay_settings['CASSETTE_DIR'])
+        self.latency = latency or replay_settings['LATENCY']
+        self.latency_mean = replay_settings['LATENCY_MEAN'] if latency_mean is None else latency_mean
+        self.latency_stddev = replay_settings['LATENCY_STDDEV'] if latency_stddev is None else latency_stddev
+        self.latency_scale = replay_settings['LATENCY_SCALE'] if latency_scale is None else latency_scale
+        self.on_miss = on_miss or replay_settings['ON_MISS']
+        if self.latency not in LATENCY_MODES:
+            raise ValueError(f"Unsupported replay latency: {self.latency}")
+        if self.on_miss not in MISS_POLICIES:
+            raise ValueError(f"Unsupported replay miss policy: {self.on_miss}")
+        self.model = 'replay'
+        self._random = random.Random(seed)
+
+    def _recording_for(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]]) -> Recording:
+        recordings = self.cassette.get(cassette_key(messages, response_schema))
+        if not recordings and self.on_miss == 'random':
+            recordings = self.cassette.all()
+        if not recordings:
+            raise AIProviderError(f"No recorded completion for this request in {self.cassette.directory}")
+        return self._random.choice(recordings)
+
+    def sample_latency(self, recording: Recording) -> float:
+        """Seconds to wait before answering with recording."""
+        if self.latency == 'fixed':
+            return self.latency_mean
+        if self.latency == 'normal':
+            return max(0.0, self._random.gauss(self.latency_mean, self.latency_stddev))
+        if self.latency == 'recorded':
+            return recording.latency * self.latency_scale
+        return 0.0
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        recording = self._recording_for(messages, response_schema)
+        time.sleep(self.sample_latency(recording))
+        return recording.response
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        recording = self._recording_for(messages, response_schema)
+        await asyncio.sleep(self.sample_latency(recording))
+        return recording.response
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        recording = self._recording_for(messages, response_schema)
+        text = json.dumps(recording.response)
+        size = max(1, -(-len(text) // STREAM_CHUNKS))
+        pause = self.sample_latency(recording) / STREAM_CHUNKS
+        for start in range(0, len(text), size):
+            time.sleep(pause)
+            yield text[start:start + size]
+
+
+class RecordingProvider:
+    """AIProvider wrapper that saves every real completion and its latency to a cassette."""
+
+    def __init__(self, provider: AIProvider, cassette: Cassette):
+        self.provider = provider
+        self.cassette = cassette
+        self.model = getattr(provider, 'model', '')
+
+    def _record(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]], response: Dict[str, Any], started: float) -> None:
+        recording = Recording(response=response, latency=time.perf_counter() - started)
+        self.cassette.add(cassette_key(messages, response_schema), messages, self.model, recording)
+
+    def generate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        response = self.provider.generate_completion(messages, response_schema=response_schema)
+        self._record(messages, response_schema, response, started)
+        return response
+
+    async def agenerate_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        response = await self.provider.agenerate_completion(messages, response_schema=response_schema)
+        self._record(messages, response_schema, response, started)
+        return response
+
+    def stream_completion(self, messages: List[ChatCompletionMessageParam], response_schema: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        started = time.perf_counter()
+        chunks = []
+        for chunk in self.provider.stream_completion(messages, response_schema=response_schema):
+            chunks.append(chunk)
+            yield chunk
+        try:
+            response = json.loads(''.join(chunks))
+        except json.JSONDecodeError:
+            return
+        self._record(messages, response_schema, response, started)
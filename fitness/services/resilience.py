@@ -0,0 +1,192 @@
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar
+import asyncio
+import random
+import threading
+import time
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is failing consistently."""
+
+
+def is_retryable_error(exc: BaseException, connection_errors: Tuple[Type[BaseException], ...] = ()) -> bool:
+    """Return True for rate limits, server errors and connection failures."""
+    if isinstance(exc, connection_errors):
+        return True
+    status_code = getattr(exc, 'status_code', None)
+    if status_code is None:
+        return False
+    return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header on the failed response, if any."""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Fail fast once an upstream has failed `failure_threshold` times in a row.
+
+    After `reset_timeout` seconds the breaker lets a single trial call through
+    (half-open); its success closes the circuit again, its failure re-opens it.
+    A trial that ends without an outcome, e.g. because it was cancelled, is
+    released so a later call can try again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call should not reach the upstream.
+
+        Returns True if the call is the half-open trial, which its caller must
+        end with record_success, record_failure or release_trial.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError('Upstream is unavailable; circuit breaker is open')
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up the trial call without an outcome; the circuit stays open but may be tried again."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class RetryPolicy:
+    """Retry transient upstream failures with full-jitter exponential backoff.
+
+    Only errors accepted by `is_retryable` are retried. Retryable failures that
+    survive every attempt count against the circuit breaker; other errors
+    (bad requests, invalid credentials) are raised immediately and do not.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        is_retryable: Callable[[BaseException], bool] = is_retryable_error,
+        breaker: Optional[CircuitBreaker] = None,
+        on_retry: Optional[Callable[[BaseException], None]] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.is_retryable = is_retryable
+        self.breaker = breaker
+        self.on_retry = on_retry
+
+    def backoff(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """Delay before retry number `attempt` (0-based)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(exc) if exc is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _before_attempt(self) -> bool:
+        """Check the breaker; True if this attempt is its half-open trial."""
+        return self.breaker.before_call() if self.breaker else False
+
+    def _release_trial(self, trial: bool) -> None:
+        if trial and self.breaker:
+            self.breaker.release_trial()
+
+    def _after_success(self) -> None:
+        if self.breaker:
+            self.breaker.record_success()
+
+    def _should_retry(self, exc: BaseException, attempt: int) -> bool:
+        if not self.is_retryable(exc):
+            # The upstream answered, so it is reachable even though the request failed
+            self._after_success()
+            return False
+        if attempt >= self.max_retries:
+            if self.breaker:
+                self.breaker.record_failure()
+            return False
+        if self.on_retry:
+            self.on_retry(exc)
+        return True
+
+    def call(self, func: Callable[[], T]) -> T:
+        """Call func, retrying transient failures."""
+        attempt = 0
+        while True:
+            trial = self._before_attempt()
+            try:
+                result = func()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                error = e
+            except BaseException:
+                # Interrupted without an outcome; a held trial would keep the circuit open for good
+                self._release_trial(trial)
+                raise
+            else:
+                self._after_success()
+                return result
+            # The retry asks the breaker again, so a trial is not held across the backoff
+            self._release_trial(trial)
+            time.sleep(self.backoff(attempt, error))
+            attempt += 1
+
+    async def acall(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Await func(), retrying transient failures without blocking the event loop."""
+        attempt = 0
+        while True:
+            trial = self._before_attempt()
+            try:
+                result = await func()
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                error = e
+            except BaseException:
+                # Cancelled, e.g. as the losing request of a hedge; a held trial would keep the circuit open for good
+                self._release_trial(trial)
+                raise
+            else:
+                self._after_success()
+                return result
+            self._release_trial(trial)
+            await asyncio.sleep(self.backoff(attempt, error))
+            attempt += 1
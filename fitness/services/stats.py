@@ -0,0 +1,21 @@
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile of values using linear interpolation.
+
+    Args:
+        values: Sample values, in any order
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The interpolated percentile, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
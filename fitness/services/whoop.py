@@ -0,0 +1,224 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import time
+
+import aiohttp
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .resilience import RETRYABLE_STATUS_CODES, RetryPolicy
+from ..models import RecoveryScore, WhoopAccount
+
+SCORED = 'SCORED'
+
+
+@dataclass
+class RecoveryRecord:
+    """A scored recovery parsed from the WHOOP API."""
+    date: date
+    score: float
+    resting_heart_rate: Optional[float]
+    hrv_rmssd: Optional[float]
+    recorded_at: datetime
+
+
+@dataclass
+class AccountSyncResult:
+    """Recoveries fetched for one account and where its next sync should start."""
+    account: WhoopAccount
+    records: List[RecoveryRecord] = field(default_factory=list)
+    cursor: Optional[datetime] = None
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class RecoverySyncSummary:
+    """Outcome of a sync run."""
+    elapsed: float
+    results: List[AccountSyncResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.succeeded)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.succeeded
+
+    @property
+    def records(self) -> int:
+        return sum(len(result.records) for result in self.results)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRYABLE_STATUS_CODES or exc.status >= 500
+    return False
+
+
+def _parse_record(record: Dict[str, Any]) -> Optional[RecoveryRecord]:
+    """Parse a recovery record, or return None if WHOOP has not scored it yet."""
+    score = record.get('score')
+    recorded_at = parse_datetime(record.get('created_at') or '')
+    if record.get('score_state') != SCORED or not score or recorded_at is None:
+        return None
+    return RecoveryRecord(
+        date=recorded_at.astimezone(dt_timezone.utc).date(),
+        score=score['recovery_score'],
+        resting_heart_rate=score.get('resting_heart_rate'),
+        hrv_rmssd=score.get('hrv_rmssd_milli'),
+        recorded_at=recorded_at,
+    )
+
+
+def _format_time(value: datetime) -> str:
+    """ISO 8601 in UTC with a Z suffix, which needs no escaping in a query string."""
+    return value.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _next_cursor(records: List[Dict[str, Any]], start: datetime) -> datetime:
+    """Where the next sync for an account should start.
+
+    Advances to the newest record fetched, but never past a record that is
+    still being scored, so it is fetched again once it has a score.
+    """
+    created = [(parse_datetime(record.get('created_at') or ''), record.get('score_state')) for record in records]
+    pending = [created_at for created_at, state in created if created_at and state != SCORED]
+    if pending:
+        return min(pending)
+    scored = [created_at for created_at, _ in created if created_at]
+    return max(scored, default=start)
+
+
+class WhoopClient:
+    """Minimal async client for the WHOOP recovery collection."""
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str, page_size: int, retry_policy: RetryPolicy):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.page_size = page_size
+        self.retry_policy = retry_policy
+
+    async def _get_page(self, access_token: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.session.get(
+            f"{self.base_url}/recovery",
+            params=params,
+            headers={"Authorization": f"Bearer {access_token}"},
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def fetch_recoveries(self, access_token: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Every recovery record created between start and end, following pagination."""
+        params: Dict[str, Any] = {
+            "start": _format_time(start),
+            "end": _format_time(end),
+            "limit": self.page_size,
+        }
+        records: List[Dict[str, Any]] = []
+        while True:
+            page = await self.retry_policy.acall(lambda: self._get_page(access_token, dict(params)))
+            records.extend(page.get('records', []))
+            next_token = page.get('next_token')
+            if not next_token:
+                return records
+            params['nextToken'] = next_token
+
+
+async def fetch_accounts(accounts: List[WhoopAccount], concurrency: int) -> List[AccountSyncResult]:
+    """Fetch new recoveries for every account over one pooled session.
+
+    At most `concurrency` accounts are fetched at once. A failing account is
+    reported in its result and does not affect the others.
+    """
+    api_settings = settings.WHOOP_API
+    retry_policy = RetryPolicy(
+        max_retries=api_settings['MAX_RETRIES'],
+        backoff_base=api_settings['BACKOFF_BASE'],
+        backoff_max=api_settings['BACKOFF_MAX'],
+        is_retryable=_is_retryable,
+    )
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    now = timezone.now()
+    backfill_start = now - timedelta(days=api_settings['BACKFILL_DAYS'])
+
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=max(1, concurrency)),
+        timeout=aiohttp.ClientTimeout(total=api_settings['TIMEOUT']),
+    ) as session:
+        client = WhoopClient(session, api_settings['BASE_URL'], api_settings['PAGE_SIZE'], retry_policy)
+
+        async def fetch(account: WhoopAccount) -> AccountSyncResult:
+            start = account.synced_through or backfill_start
+            async with semaphore:
+                try:
+                    raw_records = await client.fetch_recoveries(account.access_token, start, now)
+                except Exception as e:
+                    return AccountSyncResult(account=account, error=e)
+            records = [record for record in map(_parse_record, raw_records) if record is not None]
+            return AccountSyncResult(account=account, records=records, cursor=_next_cursor(raw_records, start))
+
+        return list(await asyncio.gather(*(fetch(account) for account in accounts)))
+
+
+def save_sync_results(results: List[AccountSyncResult]) -> None:
+    """Upsert fetched scores and advance each account's cursor in bulk."""
+    now = timezone.now()
+    scores = {
+        (result.account.user_id, record.date): RecoveryScore(
+            user_id=result.account.user_id,
+            date=record.date,
+            score=record.score,
+            resting_heart_rate=record.resting_heart_rate,
+            hrv_rmssd=record.hrv_rmssd,
+            recorded_at=record.recorded_at,
+            updated_at=now,
+        )
+        for result in results
+        for record in sorted(result.records, key=lambda record: record.recorded_at)
+    }
+    for result in results:
+        if result.succeeded:
+            result.account.synced_through = result.cursor
+            result.account.last_synced_at = now
+            result.account.last_error = ''
+        else:
+            result.account.last_error = f"{type(result.error).__name__}: {result.error}"
+
+    with transaction.atomic():
+        RecoveryScore.objects.bulk_create(
+            list(scores.values()),
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=['score', 'resting_heart_rate', 'hrv_rmssd', 'recorded_at', 'updated_at'],
+            batch_size=500,
+        )
+        WhoopAccount.objects.bulk_update(
+            [result.account for result in results],
+            ['synced_through', 'last_synced_at', 'last_error'],
+            batch_size=500,
+        )
+
+
+def sync_recovery(accounts: Iterable[WhoopAccount], concurrency: Optional[int] = None) -> RecoverySyncSummary:
+    """Fetch and store new recovery scores for many accounts.
+
+    Network calls run concurrently on one event loop; the database is only
+    touched before and after, from the calling thread.
+    """
+    accounts = list(accounts)
+    started = time.perf_counter()
+    results = async_to_sync(fetch_accounts)(accounts, concurrency or settings.WHOOP_API['CONCURRENCY'])
+    save_sync_results(results)
+    return RecoverySyncSummary(elapsed=time.perf_counter() - started, results=results)
@@ -1,124 +1,102 @@
-from typing import Dict, Any, List, Union, TypedDict, cast
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union, cast
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import transaction
 from openai.types.chat import ChatCompletionMessageParam
+from .ai_metrics import metrics_trace
 from .ai_providers import AIProvider
+from .json_stream import JSONArrayStreamParser
+from .plan_prompt import (
+    DaySplit, ExerciseData, PlanPromptBuilder, WeeklyPlanResponse, WeeklySplitResponse, WorkoutData, missing_fields,
+)
+from ..constants import DAYS_OF_WEEK
 from ..models import UserProfile, WorkoutPlan, DailyWorkout, Exercise, ExerciseSet
 from datetime import datetime, timedelta, date
+import asyncio
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 'single' requests the whole week in one completion; 'fan_out' plans the split, then generates the days concurrently
+PLAN_STRATEGIES = ('single', 'fan_out')
+
+@dataclass
+class RemainingWeek:
+    """The current week's plan, the days of it to regenerate and the days kept as they are."""
+    workout_plan: WorkoutPlan
+    days: List[str]
+    completed: List[DailyWorkout] = field(default_factory=list)
 
-class ExerciseData(TypedDict):
-    name: str
-    description: str
-    muscle_groups: List[str]
-    equipment_needed: List[str]
-    difficulty_level: int
-    instructions: str
-    tips: str
-    sets: int
-    reps: str
-    rest: str
-    weight: str
-    notes: str
-
-class WorkoutData(TypedDict):
-    day: str
-    focus: str
-    description: str
-    duration: str
-    intensity: int
-    notes: str
-    exercises: List[ExerciseData]
-
-class WeeklyPlanResponse(TypedDict):
-    weekly_plan: List[WorkoutData]
-    equipment_needed: List[str]
-    general_guidelines: List[str]
 
 class WorkoutPlanGenerator:
-    def __init__(self, ai_provider: AIProvider):
+    def __init__(
+        self,
+        ai_provider: AIProvider,
+        prompt_builder: Optional[PlanPromptBuilder] = None,
+        strategy: Optional[str] = None,
+        fan_out_concurrency: Optional[int] = None
+    ):
         self.ai_provider = ai_provider
+        self.prompt_builder = prompt_builder or PlanPromptBuilder(settings.AI_PLAN_PROMPT_VARIANT)
+        self.strategy = strategy or settings.AI_PLAN_GENERATION['STRATEGY']
+        if self.strategy not in PLAN_STRATEGIES:
+            raise ValueError(f"Unsupported plan generation strategy: {self.strategy}")
+        self.fan_out_concurrency = fan_out_concurrency or settings.AI_PLAN_GENERATION['FAN_OUT_CONCURRENCY']
+
+    def _exercise_key(self, exercise_data: ExerciseData) -> str:
+        """Canonical catalog key for the exercise described by exercise_data."""
+        return Exercise.make_canonical_key(
+            exercise_data.get('name', 'Unnamed Exercise'),
+            exercise_data.get('muscle_groups', [])
+        )
 
-    def _create_weekly_plan_prompt(self, user_profile: UserProfile) -> str:
-        """Create a prompt for generating a weekly workout plan."""
-        return f"""Generate a weekly workout plan for a user with the following profile:
-        Goal: {user_profile.goal}
-        Workouts per week: {user_profile.workouts_per_week}
-        Available equipment: {', '.join(user_profile.get_available_equipment_display())}
-        
-        Please provide a structured JSON response with the following format:
-        There must be 7 workouts in the weekly plan.
-        {{
-            "weekly_plan": [
-                {{
-                    "day": "Monday",
-                    "focus": "Upper Body",
-                    "description": "Description of the workout",
-                    "duration": "45-60 minutes",
-                    "intensity": 4,
-                    "notes": "Additional notes",
-                    "exercises": [
-                        {{
-                            "name": "Exercise name",
-                            "description": "Detailed description of the exercise",
-                            "muscle_groups": ["list", "of", "muscle", "groups"],
-                            "equipment_needed": ["list", "of", "required", "equipment"],
-                            "difficulty_level": 1,
-                            "instructions": "Step-by-step instructions",
-                            "tips": "Tips for proper form",
-                            "sets": 3,
-                            "reps": "12-15",
-                            "rest": "60 seconds",
-                            "weight": "Optional weight",
-                            "notes": "Optional notes for this specific set"
-                        }}
-                        {{
-                            "name": "Exercise name",
-                            "description": "Detailed description of the exercise",
-                            "muscle_groups": ["list", "of", "muscle", "groups"],
-                            "equipment_needed": ["list", "of", "required", "equipment"],
-                            "difficulty_level": 1,
-                            "instructions": "Step-by-step instructions",
-                            "tips": "Tips for proper form",
-                            "sets": 3,
-                            "reps": "12-15",
-                            "rest": "60 seconds",
-                            "weight": "Optional weight",
-                            "notes": "Optional notes for this specific set"
-                        }}
-                        ...
-                    ]
-                }}
-            ],
-            "equipment_needed": ["list", "of", "equipment"],
-            "general_guidelines": ["list", "of", "guidelines"]
-        }}"""
-
-    def _create_exercise(self, exercise_data: ExerciseData) -> Exercise:
-        """Create an Exercise instance from exercise data."""
-        # Extract required fields with defaults
-        name = exercise_data.get('name', 'Unnamed Exercise')
-        description = exercise_data.get('description', '')
-        muscle_groups = exercise_data.get('muscle_groups', [])
-        equipment_needed = exercise_data.get('equipment_needed', [])
-        difficulty_level = exercise_data.get('difficulty_level', 1)
-        instructions = exercise_data.get('instructions', '')
-        tips = exercise_data.get('tips', '')
-
-        exercise, created = Exercise.objects.get_or_create(
-            name=name,
-            muscle_groups=muscle_groups,
-            defaults={
-                'description': description,
-                'equipment_needed': equipment_needed,
-                'difficulty_level': difficulty_level,
-                'instructions': instructions,
-                'tips': tips
-            }
+    def _build_exercise(self, exercise_data: ExerciseData) -> Exercise:
+        """Build an unsaved Exercise instance from exercise data."""
+        exercise = Exercise(
+            name=exercise_data.get('name', 'Unnamed Exercise'),
+            description=exercise_data.get('description', ''),
+            muscle_groups=exercise_data.get('muscle_groups', []),
+            equipment_needed=exercise_data.get('equipment_needed', []),
+            difficulty_level=exercise_data.get('difficulty_level', 1),
+            instructions=exercise_data.get('instructions', ''),
+            tips=exercise_data.get('tips', '')
         )
+        # bulk_create bypasses save(), so apply the model's normalization here
+        exercise.clean()
+        exercise.canonical_key = self._exercise_key(exercise_data)
         return exercise
 
-    def _create_exercise_set(self, exercise: Exercise, daily_workout: DailyWorkout, set_data: ExerciseData) -> ExerciseSet:
-        """Create an ExerciseSet instance from set data."""
-        return ExerciseSet.objects.create(
+    def _resolve_exercises(self, exercises_data: List[ExerciseData]) -> Dict[str, Exercise]:
+        """Map every exercise in a plan to a saved Exercise, creating missing ones.
+
+        Existing exercises are fetched with one indexed canonical-key query and
+        missing ones are bulk-created, so the cost does not grow with the size
+        of the plan.
+        """
+        wanted: Dict[str, ExerciseData] = {}
+        for exercise_data in exercises_data:
+            wanted.setdefault(self._exercise_key(exercise_data), exercise_data)
+
+        def fetch(keys: List[str]) -> Dict[str, Exercise]:
+            return {exercise.canonical_key: exercise for exercise in Exercise.objects.filter(canonical_key__in=keys)}
+
+        resolved = fetch(list(wanted))
+        missing = [key for key in wanted if key not in resolved]
+        if missing:
+            # canonical_key is unique, so near-duplicates inserted concurrently by another plan
+            # are skipped here and picked up by the re-fetch
+            Exercise.objects.bulk_create(
+                [self._build_exercise(wanted[key]) for key in missing],
+                ignore_conflicts=True
+            )
+            resolved.update(fetch(missing))
+        return resolved
+
+    def _build_exercise_set(self, exercise: Exercise, daily_workout: DailyWorkout, set_data: ExerciseData) -> ExerciseSet:
+        """Build an unsaved ExerciseSet instance from set data."""
+        return ExerciseSet(
             exercise=exercise,
             daily_workout=daily_workout,
             sets=set_data['sets'],
@@ -128,67 +106,392 @@ class WorkoutPlanGenerator:
             notes=set_data.get('notes', '')
         )
 
-    def generate_weekly_plan(self, user_profile: UserProfile) -> WorkoutPlan:
-        """Generate a weekly workout plan for a user."""
-        prompt = self._create_weekly_plan_prompt(user_profile)
-        messages: List[ChatCompletionMessageParam] = [
-            {"role": "system", "content": "You are a professional personal trainer creating personalized workout plans. You must always respond with valid JSON."},
-            {"role": "user", "content": prompt}
-        ]
-        response = cast(WeeklyPlanResponse, self.ai_provider.generate_completion(messages))
-        
-        # Calculate the start of the current week (Sunday)
+    def _create_messages(self, user_profile: UserProfile, remaining: Optional[RemainingWeek] = None) -> List[ChatCompletionMessageParam]:
+        """Build the chat messages requesting a weekly plan, or only its remaining days, for a user."""
+        if remaining is None:
+            return self.prompt_builder.build_messages(user_profile)
+        return self.prompt_builder.build_messages(user_profile, remaining.days, remaining.completed)
+
+    def _remaining_week(self, user_profile: UserProfile) -> Optional[RemainingWeek]:
+        """The part of the user's current plan that is still ahead of them.
+
+        Days before today and days whose workout was already sent are kept.
+        Returns None when there is no plan for this week or nothing would be
+        kept, in which case the whole week is generated.
+        """
         today = datetime.now().date()
-        days_since_sunday = today.weekday() + 1  # +1 because weekday() returns 0-6 (Mon-Sun)
+        week_start_date, week_end_date = self._get_week_bounds(today)
+        workout_plan = WorkoutPlan.objects.filter(
+            user=user_profile.user,
+            week_start_date__gte=week_start_date,
+            week_start_date__lte=week_end_date
+        ).order_by('-week_start_date', '-pk').first()
+        if workout_plan is None:
+            return None
+
+        sent = set(workout_plan.daily_workouts.filter(sent=True).values_list('day_index', flat=True))
+        days = [
+            day for index, day in enumerate(DAYS_OF_WEEK)
+            if index not in sent and self._is_remaining_day(day, today)
+        ]
+        if len(days) == len(DAYS_OF_WEEK):
+            return None
+        completed = list(
+            workout_plan.daily_workouts.exclude(day__in=days).prefetch_related('exercise_sets__exercise')
+        )
+        return RemainingWeek(workout_plan=workout_plan, days=days, completed=completed)
+
+    def generate_weekly_plan(
+        self,
+        user_profile: UserProfile,
+        stream: bool = False,
+        on_workout: Optional[Callable[[DailyWorkout], None]] = None,
+        remaining_only: bool = False
+    ) -> WorkoutPlan:
+        """Generate a weekly workout plan for a user.
+
+        With stream=True the completion is streamed and each DailyWorkout is
+        persisted (and passed to on_workout) as soon as the model finishes it,
+        instead of waiting for the whole week.
+
+        With remaining_only=True and a plan for this week already in place,
+        only the days from today on that have not been sent are regenerated;
+        the model is told what the earlier days covered, and only the
+        regenerated days' rows are replaced. Raises ValueError if every day
+        left this week was already sent.
+
+        Streaming always requests the week in one completion, whatever the
+        generator's strategy.
+        """
+        remaining = self._remaining_week(user_profile) if remaining_only else None
+        if remaining is not None and not remaining.days:
+            raise ValueError("Every remaining day of this week's plan has already been sent")
+        whole_week = remaining is None and (stream or self.strategy != 'fan_out')
+        with metrics_trace(prompt_variant=self._metrics_variant(whole_week)):
+            if self.strategy == 'fan_out' and not stream:
+                response = async_to_sync(self._agenerate_fan_out)(user_profile, remaining)
+            else:
+                messages = self._create_messages(user_profile, remaining)
+                if stream:
+                    return self._stream_weekly_plan(user_profile, messages, on_workout, remaining)
+                schema = self.prompt_builder.response_schema()
+                response = cast(WeeklyPlanResponse, self.ai_provider.generate_completion(messages, response_schema=schema))
+        if remaining is None:
+            workout_plan = self._save_weekly_plan(user_profile, response)
+            daily_workouts = workout_plan.daily_workouts.all()
+        else:
+            workout_plan = self._save_remaining_days(remaining, response)
+            daily_workouts = workout_plan.daily_workouts.filter(day__in=remaining.days)
+        if on_workout:
+            for daily_workout in daily_workouts:
+                on_workout(daily_workout)
+        return workout_plan
+
+    def _metrics_variant(self, whole_week: bool) -> str:
+        """Prompt variant to tag AI call metrics with.
+
+        Only calls requesting the whole week in one completion are tagged,
+        since fan-out and partial-week calls are not comparable between variants.
+        """
+        return self.prompt_builder.variant if whole_week else ''
+
+    async def agenerate_weekly_plan(self, user_profile: UserProfile) -> WorkoutPlan:
+        """Generate a weekly workout plan without blocking the event loop.
+
+        The completion is awaited on the provider's async client and the plan is
+        persisted as soon as the response lands. The profile's user should be
+        loaded up front (e.g. with select_related) since the ORM is only touched
+        from the persistence step.
+        """
+        with metrics_trace(prompt_variant=self._metrics_variant(self.strategy != 'fan_out')):
+            if self.strategy == 'fan_out':
+                response = await self._agenerate_fan_out(user_profile)
+            else:
+                # The catalog prompt variant reads the exercise catalog
+                messages = await sync_to_async(self._create_messages)(user_profile)
+                schema = self.prompt_builder.response_schema()
+                response = cast(WeeklyPlanResponse, await self.ai_provider.agenerate_completion(messages, response_schema=schema))
+        return await sync_to_async(self._save_weekly_plan)(user_profile, response)
+
+    async def _agenerate_fan_out(self, user_profile: UserProfile, remaining: Optional[RemainingWeek] = None) -> WeeklyPlanResponse:
+        """Request the week's split, then each of its days concurrently, and merge them into one plan response.
+
+        At most fan_out_concurrency day completions are in flight at once.
+        Output tokens are generated per day in parallel, so the latency is
+        that of the split plus the slowest day rather than of the whole week.
+        If any day fails, the others are cancelled and the error is raised.
+        """
+        days = remaining.days if remaining is not None else DAYS_OF_WEEK
+        if remaining is None:
+            messages = self.prompt_builder.build_split_messages(user_profile)
+        else:
+            messages = self.prompt_builder.build_split_messages(user_profile, remaining.days, remaining.completed)
+        split = cast(WeeklySplitResponse, await self.ai_provider.agenerate_completion(
+            messages, response_schema=self.prompt_builder.split_schema()
+        ))
+        split_days = self._validate_split(split, days)
+        semaphore = asyncio.Semaphore(max(1, self.fan_out_concurrency))
+
+        async def generate_day(split_day: DaySplit) -> WorkoutData:
+            day_messages = self.prompt_builder.build_day_messages(user_profile, split_day, split_days)
+            async with semaphore:
+                workout = await self.ai_provider.agenerate_completion(
+                    day_messages, response_schema=self.prompt_builder.day_schema()
+                )
+            return self._merge_day(split_day, workout)
+
+        tasks = [asyncio.ensure_future(generate_day(split_day)) for split_day in split_days]
+        try:
+            workouts = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return {
+            'weekly_plan': list(workouts),
+            'equipment_needed': split.get('equipment_needed', []),
+            'general_guidelines': split.get('general_guidelines', []),
+        }
+
+    def _validate_split(self, split: WeeklySplitResponse, days: List[str]) -> List[DaySplit]:
+        """The split's entries for the requested days, canonically named and in week order.
+
+        Unrequested and repeated days are dropped; a requested day the split
+        does not cover is an error.
+        """
+        by_day: Dict[str, DaySplit] = {}
+        for split_day in split.get('weekly_split', []):
+            missing = missing_fields(DaySplit, split_day)
+            if missing:
+                raise ValueError(f"Weekly split entry is missing {', '.join(missing)}")
+            day = self._normalize_day(split_day['day'])
+            if day in days:
+                by_day.setdefault(day, cast(DaySplit, {**split_day, 'day': day}))
+        uncovered = [day for day in days if day not in by_day]
+        if uncovered:
+            raise ValueError(f"Weekly split does not cover {', '.join(uncovered)}")
+        return [by_day[day] for day in days]
+
+    def _merge_day(self, split_day: DaySplit, workout: Dict[str, Any]) -> WorkoutData:
+        """A day's workout, labelled with the day and focus of the split it was generated for."""
+        merged = {**workout, 'day': split_day['day'], 'focus': split_day['focus']}
+        missing = missing_fields(WorkoutData, merged)
+        if missing:
+            raise ValueError(f"{split_day['day']} workout is missing {', '.join(missing)}")
+        return cast(WorkoutData, merged)
+
+    def _get_week_bounds(self, today: Optional[date] = None) -> Tuple[date, date]:
+        """Return the start (Sunday) and end dates of the week containing today."""
+        today = today or datetime.now().date()
+        days_since_sunday = (today.weekday() + 1) % 7  # weekday() returns 0-6 (Mon-Sun)
         week_start_date = today - timedelta(days=days_since_sunday)
-        week_end_date = week_start_date + timedelta(days=6)
-        
-        # Delete any existing workout plans for this week
+        return week_start_date, week_start_date + timedelta(days=6)
+
+    def _replace_weekly_plan(self, user_profile: UserProfile, response: Dict[str, Any]) -> WorkoutPlan:
+        """Delete the user's plan for the current week and create an empty new one."""
+        week_start_date, week_end_date = self._get_week_bounds()
         WorkoutPlan.objects.filter(
             user=user_profile.user,
             week_start_date__gte=week_start_date,
             week_start_date__lte=week_end_date
         ).delete()
-        
-        # Create the new workout plan
-        workout_plan = WorkoutPlan.objects.create(
+
+        return WorkoutPlan.objects.create(
             user=user_profile.user,
             week_start_date=week_start_date,
             equipment_needed=response.get('equipment_needed', []),
             general_guidelines=response.get('general_guidelines', [])
         )
 
-        # Create daily workouts for the full week
-        for workout_data in response.get('weekly_plan', []):
-            daily_workout = DailyWorkout.objects.create(
+    def _expand_catalog_references(self, workouts_data: List[Dict[str, Any]]) -> List[WorkoutData]:
+        """Turn the exercise IDs of a 'catalog' response into full exercise data.
+
+        A reference with exercise_id 0 takes the next definition from the
+        day's new_exercises. References to unknown IDs, and to definitions
+        the model left out, are dropped with a warning. Workouts without
+        references are returned unchanged.
+        """
+        ids = {
+            reference['exercise_id']
+            for workout_data in workouts_data
+            for reference in workout_data.get('exercises', [])
+            if reference.get('exercise_id')
+        }
+        if not ids and not any('new_exercises' in workout_data for workout_data in workouts_data):
+            return cast(List[WorkoutData], workouts_data)
+        catalog = Exercise.objects.in_bulk(ids)
+
+        expanded = []
+        for workout_data in workouts_data:
+            new_exercises = iter(workout_data.get('new_exercises', []))
+            exercises = []
+            for reference in workout_data.get('exercises', []):
+                if 'exercise_id' not in reference:
+                    exercises.append(reference)
+                    continue
+                set_data = {key: reference[key] for key in ('sets', 'reps', 'rest', 'weight', 'notes') if key in reference}
+                if not reference['exercise_id']:
+                    definition = next(new_exercises, None)
+                    if definition is None:
+                        logger.warning("Dropping a new exercise without a definition from %s", workout_data.get('day'))
+                        continue
+                    exercises.append({**definition, **set_data})
+                    continue
+                exercise = catalog.get(reference['exercise_id'])
+                if exercise is None:
+                    logger.warning("Dropping unknown exercise ID %s from %s", reference['exercise_id'], workout_data.get('day'))
+                    continue
+                exercises.append({
+                    'name': exercise.name,
+                    'description': exercise.description,
+                    'muscle_groups': exercise.muscle_groups,
+                    'equipment_needed': exercise.equipment_needed,
+                    'difficulty_level': exercise.difficulty_level,
+                    'instructions': exercise.instructions,
+                    'tips': exercise.tips,
+                    **set_data,
+                })
+            workout = {key: value for key, value in workout_data.items() if key != 'new_exercises'}
+            workout['exercises'] = exercises
+            expanded.append(cast(WorkoutData, workout))
+        return expanded
+
+    def _save_daily_workouts(self, workout_plan: WorkoutPlan, workouts_data: List[WorkoutData]) -> List[DailyWorkout]:
+        """Bulk-create daily workouts and their exercise sets for a plan."""
+        workouts_data = self._expand_catalog_references(cast(List[Dict[str, Any]], workouts_data))
+        daily_workouts = DailyWorkout.objects.bulk_create([
+            DailyWorkout(
                 workout_plan=workout_plan,
-                day=workout_data['day'],
+                day=self._normalize_day(workout_data['day']),
                 focus=workout_data['focus'],
                 description=workout_data['description'],
                 duration=workout_data['duration'],
                 intensity=workout_data['intensity'],
-                notes=workout_data.get('notes', '')
+                notes=workout_data.get('notes', ''),
+                day_index=DailyWorkout.day_index_for(workout_data['day']),
+                date=DailyWorkout.date_for_day(workout_plan.week_start_date, workout_data['day'])
             )
+            for workout_data in workouts_data
+        ])
+
+        exercises = self._resolve_exercises([
+            exercise_data
+            for workout_data in workouts_data
+            for exercise_data in workout_data['exercises']
+        ])
 
-            for exercise_data in workout_data['exercises']:
-                exercise = self._create_exercise(exercise_data)
-                self._create_exercise_set(exercise, daily_workout, exercise_data)
+        ExerciseSet.objects.bulk_create([
+            self._build_exercise_set(exercises[self._exercise_key(exercise_data)], daily_workout, exercise_data)
+            for daily_workout, workout_data in zip(daily_workouts, workouts_data)
+            for exercise_data in workout_data['exercises']
+        ])
+        return daily_workouts
 
+    def _save_weekly_plan(self, user_profile: UserProfile, response: WeeklyPlanResponse) -> WorkoutPlan:
+        """Persist a weekly plan response, replacing any plan for the current week."""
+        # Replace the week's plan atomically so a failure never leaves a half-written plan
+        with transaction.atomic():
+            workout_plan = self._replace_weekly_plan(user_profile, cast(Dict[str, Any], response))
+            self._save_daily_workouts(workout_plan, response.get('weekly_plan', []))
+            workout_plan.refresh_snapshot()
         return workout_plan
 
-    def _is_remaining_day(self, day: str, today: date, week_end_date: date) -> bool:
-        """Check if a given day falls within the remaining days of the week."""
-        day_mapping = {
-            'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3,
-            'Thursday': 4, 'Friday': 5, 'Saturday': 6
-        }
-        day_num = day_mapping.get(day)
-        if day_num is None:
+    def _remaining_workouts(self, remaining: RemainingWeek, workouts_data: List[WorkoutData]) -> List[WorkoutData]:
+        """The workouts of a partial response that fall on the days being regenerated."""
+        return [
+            workout_data for workout_data in workouts_data
+            if self._normalize_day(workout_data.get('day', '')) in remaining.days
+        ]
+
+    def _clear_days(self, workout_plan: WorkoutPlan, workouts_data: List[WorkoutData]) -> None:
+        """Delete the plan's rows for the days of workouts_data, cascading to their exercise sets."""
+        days = [self._normalize_day(workout_data['day']) for workout_data in workouts_data]
+        DailyWorkout.objects.filter(workout_plan=workout_plan, day__in=days).delete()
+
+    def _save_remaining_days(self, remaining: RemainingWeek, response: WeeklyPlanResponse) -> WorkoutPlan:
+        """Replace the regenerated days of the current plan, keeping every other day.
+
+        A response that leaves out a requested day is an error, raised before
+        anything is deleted.
+        """
+        workout_plan = remaining.workout_plan
+        workouts_data = self._remaining_workouts(remaining, response.get('weekly_plan', []))
+        covered = {self._normalize_day(workout_data['day']) for workout_data in workouts_data}
+        uncovered = [day for day in remaining.days if day not in covered]
+        if uncovered:
+            raise ValueError(f"Plan response does not cover {', '.join(uncovered)}")
+        with transaction.atomic():
+            self._clear_days(workout_plan, workouts_data)
+            self._save_daily_workouts(workout_plan, workouts_data)
+            workout_plan.equipment_needed = response.get('equipment_needed') or workout_plan.equipment_needed
+            workout_plan.general_guidelines = response.get('general_guidelines') or workout_plan.general_guidelines
+            workout_plan.snapshot = workout_plan.build_snapshot()
+            workout_plan.save(update_fields=['equipment_needed', 'general_guidelines', 'snapshot', 'updated_at'])
+        return workout_plan
+
+    def _stream_weekly_plan(
+        self,
+        user_profile: UserProfile,
+        messages: List[ChatCompletionMessageParam],
+        on_workout: Optional[Callable[[DailyWorkout], None]] = None,
+        remaining: Optional[RemainingWeek] = None
+    ) -> WorkoutPlan:
+        """Stream a weekly plan, persisting each day as soon as it is complete.
+
+        The previous plan stays in place until the first day arrives. Days are
+        committed one at a time so they become visible immediately; the plan's
+        equipment and guidelines follow the rest of the week and are filled in
+        once the stream ends. If the stream fails midway, the days already
+        received are kept.
+
+        For a partial week, each regenerated day replaces that day's row as it
+        arrives instead of replacing the whole plan, so a day the model leaves
+        out keeps its previous workout.
+        """
+        parser = JSONArrayStreamParser('weekly_plan')
+        workout_plan: Optional[WorkoutPlan] = None
+
+        for chunk in self.ai_provider.stream_completion(messages, response_schema=self.prompt_builder.response_schema()):
+            for workout_data in parser.feed(chunk):
+                workouts_data = [cast(WorkoutData, workout_data)]
+                if remaining is not None:
+                    workouts_data = self._remaining_workouts(remaining, workouts_data)
+                    if not workouts_data:
+                        continue
+                with transaction.atomic():
+                    if remaining is not None:
+                        workout_plan = remaining.workout_plan
+                        self._clear_days(workout_plan, workouts_data)
+                    elif workout_plan is None:
+                        workout_plan = self._replace_weekly_plan(user_profile, {})
+                    daily_workouts = self._save_daily_workouts(workout_plan, workouts_data)
+                if on_workout:
+                    for daily_workout in daily_workouts:
+                        on_workout(daily_workout)
+
+        response = parser.document()
+        if workout_plan is None:
+            # The response contained no days, so there was nothing to persist incrementally
+            if remaining is not None:
+                return self._save_remaining_days(remaining, cast(WeeklyPlanResponse, response))
+            return self._save_weekly_plan(user_profile, cast(WeeklyPlanResponse, response))
+
+        workout_plan.equipment_needed = response.get('equipment_needed') or workout_plan.equipment_needed
+        workout_plan.general_guidelines = response.get('general_guidelines') or workout_plan.general_guidelines
+        # Until now the plan pages rendered the days straight from the tables
+        workout_plan.snapshot = workout_plan.build_snapshot()
+        workout_plan.save(update_fields=['equipment_needed', 'general_guidelines', 'snapshot', 'updated_at'])
+        return workout_plan
+
+    def _normalize_day(self, day: str) -> str:
+        """Canonical capitalization of a day name, or the name unchanged if unrecognized."""
+        day_index = DailyWorkout.day_index_for(day)
+        return DAYS_OF_WEEK[day_index] if day_index is not None else day
+
+    def _is_remaining_day(self, day: str, today: date) -> bool:
+        """Check if a given day falls within the remaining days of today's week."""
+        week_start_date, week_end_date = self._get_week_bounds(today)
+        day_date = DailyWorkout.date_for_day(week_start_date, day)
+        if day_date is None:
             return False
-            
-        # Calculate the date for this day
-        days_since_sunday = today.weekday() + 1
-        week_start = today - timedelta(days=days_since_sunday)
-        day_date = week_start + timedelta(days=day_num)
-        
         return today <= day_date <= week_end_date 
\ No newline at end of file
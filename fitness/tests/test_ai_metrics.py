@@ -0,0 +1,81 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from io import StringIO
+from unittest.mock import Mock, patch
+import httpx
+from ..models import AICallMetric
+from ..services import ai_providers
+from ..services.ai_metrics import InstrumentedProvider, metrics_trace
+from ..services.ai_providers import AIProvider, AIProviderError, OpenAIProvider
+from .test_ai_providers import FAST_RETRIES, chat_completion
+
+@override_settings(AI_PROVIDER_HTTP=FAST_RETRIES, OPENAI_API_KEY='test-key')
+class TestInstrumentedProvider(TestCase):
+    def setUp(self) -> None:
+        self.statuses = []
+        transport = httpx.MockTransport(self._handle)
+        patcher = patch.object(ai_providers, '_http_client', httpx.Client(transport=transport))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = InstrumentedProvider(OpenAIProvider(), 'openai')
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        status = self.statuses.pop(0)
+        if status == 200:
+            body = chat_completion({"ok": True})
+            body["usage"] = {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150}
+            return httpx.Response(200, json=body)
+        return httpx.Response(status, json={"error": {"message": "failure"}})
+
+    def test_records_usage_and_retries(self):
+        self.statuses = [503, 200]
+        with metrics_trace('plan-1'):
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+
+        metric = AICallMetric.objects.get()
+        self.assertEqual(metric.provider, 'openai')
+        self.assertEqual(metric.model, 'gpt-4o')
+        self.assertEqual(metric.trace_id, 'plan-1')
+        self.assertEqual(metric.prompt_tokens, 120)
+        self.assertEqual(metric.completion_tokens, 30)
+        self.assertEqual(metric.retries, 1)
+        self.assertEqual(metric.error_class, '')
+        self.assertGreaterEqual(metric.wall_time, 0)
+
+    def test_records_underlying_error_class(self):
+        self.statuses = [400]
+        with self.assertRaises(AIProviderError):
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+
+        metric = AICallMetric.objects.get()
+        self.assertEqual(metric.error_class, 'BadRequestError')
+        self.assertIsNone(metric.prompt_tokens)
+
+    def test_stream_stopped_early_is_recorded(self):
+        provider = Mock(spec=AIProvider)
+        provider.stream_completion.return_value = iter(['{"a"', ': 1', '}'])
+        stream = InstrumentedProvider(provider, 'mock').stream_completion([{"role": "user", "content": "hi"}])
+
+        self.assertEqual(next(stream), '{"a"')
+        stream.close()
+
+        metric = AICallMetric.objects.get()
+        self.assertEqual(metric.operation, 'stream')
+        self.assertEqual(metric.error_class, 'GeneratorExit')
+        self.assertIsNotNone(metric.time_to_first_token)
+
+    def test_ai_stats_command(self):
+        self.statuses = [200, 200, 400]
+        with metrics_trace():
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+        with self.assertRaises(AIProviderError):
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+
+        out = StringIO()
+        call_command('ai_stats', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Calls: 3 (1 failed, 0 retries)', output)
+        self.assertIn('Tokens per plan (1 plans)', output)
+        self.assertIn('prompt      avg 240', output)
+        self.assertIn('BadRequestError: 1', output)
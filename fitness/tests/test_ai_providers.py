@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase, override_settings
+from django.conf import settings
+from unittest.mock import patch
+import httpx
+import json
+from ..services import ai_providers
+from ..services.ai_providers import OpenAIProvider, get_ai_provider, reset_ai_providers
+from ..services.resilience import CircuitBreaker, CircuitOpenError
+
+FAST_RETRIES = {
+    **settings.AI_PROVIDER_HTTP,
+    'MAX_RETRIES': 2,
+    'BACKOFF_BASE': 0,
+    'CIRCUIT_BREAKER_THRESHOLD': 2,
+    'CIRCUIT_BREAKER_RESET': 60.0,
+}
+
+def chat_completion(content: dict) -> dict:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4-turbo-preview",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": json.dumps(content)}}],
+    }
+
+@override_settings(AI_PROVIDER_HTTP=FAST_RETRIES, OPENAI_API_KEY='test-key')
+class TestOpenAIProviderResilience(SimpleTestCase):
+    def setUp(self) -> None:
+        self.statuses = []
+        transport = httpx.MockTransport(self._handle)
+        patcher = patch.object(ai_providers, '_http_client', httpx.Client(transport=transport))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = OpenAIProvider()
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        status = self.statuses.pop(0)
+        if status == 200:
+            return httpx.Response(200, json=chat_completion({"ok": True}))
+        return httpx.Response(status, json={"error": {"message": "unavailable"}})
+
+    def test_retries_server_errors(self) -> None:
+        self.statuses = [503, 429, 200]
+
+        self.assertEqual(self.provider.generate_completion([{"role": "user", "content": "hi"}]), {"ok": True})
+        self.assertEqual(self.statuses, [])
+
+    def test_does_not_retry_client_errors(self) -> None:
+        self.statuses = [400, 200]
+
+        with self.assertRaises(ValueError):
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+        self.assertEqual(self.statuses, [200])
+
+    def test_circuit_opens_after_repeated_failures(self) -> None:
+        self.statuses = [503] * 6
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.provider.generate_completion([{"role": "user", "content": "hi"}])
+        self.assertEqual(self.statuses, [])
+
+        with self.assertRaisesMessage(ValueError, 'circuit breaker is open'):
+            self.provider.generate_completion([{"role": "user", "content": "hi"}])
+
+class TestCircuitBreaker(SimpleTestCase):
+    def test_half_open_trial(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        breaker.before_call()
+        self.assertFalse(breaker.is_open)
+
+@override_settings(OPENAI_API_KEY='test-key')
+class TestProviderRegistry(SimpleTestCase):
+    def setUp(self) -> None:
+        reset_ai_providers()
+        self.addCleanup(reset_ai_providers)
+
+    def test_providers_are_reused(self) -> None:
+        self.assertIs(get_ai_provider('openai', cache=False), get_ai_provider('openai', cache=False))
+        self.assertIsNot(get_ai_provider('openai', cache=False), get_ai_provider('openai', cache=True))
@@ -0,0 +1,169 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+from ..models import DailyWorkout, UserProfile
+from ..services.ai_providers import AIProviderError, AnthropicProvider
+from ..services.plan_prompt import PlanPromptBuilder
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+from .test_streaming import build_plan
+
+def message(content, stop_reason='end_turn'):
+    return {
+        "id": "msg_1",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-test",
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": 40, "output_tokens": 300, "cache_read_input_tokens": 900, "cache_creation_input_tokens": 0},
+    }
+
+def tool_use(name, data):
+    return {"type": "tool_use", "id": "toolu_1", "name": name, "input": data}
+
+class StubMessagesHandler(BaseHTTPRequestHandler):
+    """Serves POST /v1/messages, recording request bodies and answering with queued messages."""
+    server: 'StubMessagesServer'
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        reply = self.server.replies.pop(0)
+        if body.get('stream'):
+            self._stream(reply)
+        else:
+            self._respond(200, reply)
+
+    def _respond(self, status, body) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, reply) -> None:
+        """Replay a tool_use message as server-sent events, its input in small JSON deltas."""
+        text = json.dumps(reply['content'][0]['input'])
+        events = [
+            {"type": "message_start", "message": {**reply, "content": [], "stop_reason": None}},
+            {"type": "content_block_start", "index": 0, "content_block": {**reply['content'][0], "input": {}}},
+            *(
+                {"type": "content_block_delta", "index": 0, "delta": {"type": "input_json_delta", "partial_json": text[i:i + 32]}}
+                for i in range(0, len(text), 32)
+            ),
+            {"type": "content_block_stop", "index": 0},
+            {"type": "message_delta", "delta": {"stop_reason": reply['stop_reason'], "stop_sequence": None}, "usage": {"output_tokens": 300}},
+            {"type": "message_stop"},
+        ]
+        payload = "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args) -> None:
+        pass
+
+class StubMessagesServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubMessagesHandler)
+        self.requests = []
+        self.replies = []
+
+@override_settings(ANTHROPIC_MAX_TOKENS=4096, ANTHROPIC_PROMPT_CACHING=True)
+class TestAnthropicProvider(TestCase):
+    def setUp(self) -> None:
+        self.server = StubMessagesServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.provider = AnthropicProvider(
+            api_key='test-key', model='claude-test', base_url=f'http://127.0.0.1:{self.server.server_port}'
+        )
+
+        user = User.objects.create_user(username='claude@example.com', email='claude@example.com', password='pw')
+        self.user_profile = UserProfile.objects.create(user=user, available_equipment=['bodyweight'])
+        self.builder = PlanPromptBuilder('compact')
+
+    def test_schema_is_forced_as_a_cached_tool(self) -> None:
+        plan = build_plan(["Monday", "Tuesday"])
+        self.server.replies.append(message([tool_use("weekly_plan", plan)], stop_reason='tool_use'))
+
+        result = self.provider.generate_completion(
+            self.builder.build_messages(self.user_profile), response_schema=self.builder.response_schema()
+        )
+
+        self.assertEqual(result, plan)
+        request = self.server.requests[0]
+        self.assertEqual(request['max_tokens'], 4096)
+        self.assertEqual(request['tool_choice'], {"type": "tool", "name": "weekly_plan"})
+        self.assertEqual(request['tools'][0]['input_schema'], self.builder.response_schema()['schema'])
+        # The shared instructions close the cached prefix and the profile follows the breakpoint
+        self.assertEqual(request['system'][-1]['cache_control'], {"type": "ephemeral"})
+        self.assertIn('JSON shape:', request['system'][-1]['text'])
+        self.assertNotIn('Goal:', request['system'][-1]['text'])
+        self.assertEqual([m['role'] for m in request['messages']], ['user'])
+        self.assertIn('Goal:', request['messages'][0]['content'])
+
+    def test_catalog_list_gets_its_own_breakpoint(self) -> None:
+        builder = PlanPromptBuilder('catalog')
+        self.server.replies.append(message([tool_use("weekly_plan", {})], stop_reason='tool_use'))
+
+        self.provider.generate_completion(
+            builder.build_messages(self.user_profile, catalog=[]), response_schema=builder.response_schema()
+        )
+
+        system = self.server.requests[0]['system']
+        self.assertEqual(len(system), 2)
+        self.assertIn('exercise_id 0', system[0]['text'])
+        self.assertIn('Existing exercises', system[1]['text'])
+        self.assertTrue(all(block['cache_control'] == {"type": "ephemeral"} for block in system))
+
+    def test_prefills_json_without_a_schema(self) -> None:
+        self.server.replies.append(message([{"type": "text", "text": '"ok": true}'}]))
+
+        result = self.provider.generate_completion([{"role": "user", "content": "Reply with JSON"}])
+
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(self.server.requests[0]['messages'][-1], {"role": "assistant", "content": "{"})
+        self.assertNotIn('system', self.server.requests[0])
+
+    def test_truncated_response_is_an_error(self) -> None:
+        self.server.replies.append(message([tool_use("weekly_plan", {})], stop_reason='max_tokens'))
+
+        with self.assertRaises(AIProviderError):
+            self.provider.generate_completion([{"role": "user", "content": "hi"}], response_schema=self.builder.response_schema())
+
+    def test_truncated_stream_is_an_error(self) -> None:
+        self.server.replies.append(message([tool_use("weekly_plan", build_plan(["Monday"]))], stop_reason='max_tokens'))
+
+        chunks = []
+        with self.assertRaisesMessage(AIProviderError, 'cut off at max_tokens=4096'):
+            for chunk in self.provider.stream_completion([{"role": "user", "content": "hi"}], response_schema=self.builder.response_schema()):
+                chunks.append(chunk)
+        self.assertTrue(chunks)
+
+    def test_async_and_streamed_plans_are_saved(self) -> None:
+        plan = build_plan(["Monday", "Tuesday", "Wednesday"])
+        self.server.replies.append(message([tool_use("weekly_plan", plan)], stop_reason='tool_use'))
+        result = async_to_sync(self.provider.agenerate_completion)(
+            [{"role": "user", "content": "hi"}], response_schema=self.builder.response_schema()
+        )
+        self.assertEqual(result, plan)
+
+        self.server.replies.append(message([tool_use("weekly_plan", plan)], stop_reason='tool_use'))
+        generator = WorkoutPlanGenerator(self.provider, prompt_builder=self.builder)
+        workout_plan = generator.generate_weekly_plan(self.user_profile, stream=True)
+
+        self.assertTrue(self.server.requests[-1]['stream'])
+        self.assertEqual(
+            list(DailyWorkout.objects.filter(workout_plan=workout_plan).order_by('day_index').values_list('day', flat=True)),
+            ["Monday", "Tuesday", "Wednesday"],
+        )
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from io import StringIO
+from unittest.mock import patch
+import asyncio
+from ..models import UserProfile, WorkoutPlan
+from ..services.batch_generation import BatchSummary, GenerationResult, run_batch
+from ..services.stats import percentile
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+from .test_plan_generation_jobs import PLAN_RESPONSE
+
+class ConcurrentProvider:
+    """Async provider that tracks requests in flight and fails the calls listed in fail_calls."""
+
+    def __init__(self, fail_calls=()):
+        self.fail_calls = set(fail_calls)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def agenerate_completion(self, messages, response_schema=None):
+        self.calls += 1
+        call = self.calls
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.in_flight -= 1
+        if call in self.fail_calls:
+            raise ValueError('Provider unavailable')
+        return PLAN_RESPONSE
+
+class TestPercentile(SimpleTestCase):
+    def test_interpolates_between_samples(self) -> None:
+        values = [4.0, 1.0, 3.0, 2.0]
+
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile(values, 50), 2.5)
+        self.assertAlmostEqual(percentile(values, 95), 3.85)
+        self.assertEqual(percentile(values, 100), 4.0)
+
+    def test_empty_and_single_samples(self) -> None:
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(percentile([7.0], 50), 7.0)
+
+class TestBatchGeneration(TestCase):
+    def setUp(self) -> None:
+        for i in range(5):
+            user = User.objects.create_user(username=f'batch{i}@example.com', email=f'batch{i}@example.com', password='testpass123')
+            goal = 'strength' if i < 3 else 'endurance'
+            UserProfile.objects.create(user=user, goal=goal, available_equipment=['bodyweight'])
+        self.profiles = list(UserProfile.objects.select_related('user').order_by('pk'))
+
+    def test_caps_requests_in_flight(self) -> None:
+        provider = ConcurrentProvider()
+
+        summary = run_batch(WorkoutPlanGenerator(provider), self.profiles, concurrency=2)
+
+        self.assertEqual(provider.calls, 5)
+        self.assertEqual(provider.max_in_flight, 2)
+        self.assertEqual(summary.succeeded, 5)
+
+    def test_persists_each_plan_as_it_lands_and_records_failures(self) -> None:
+        provider = ConcurrentProvider(fail_calls={2})
+        saved_when_reported = []
+
+        def on_result(result: GenerationResult) -> None:
+            saved_when_reported.append(WorkoutPlan.objects.filter(user=result.profile.user).exists())
+
+        summary = run_batch(WorkoutPlanGenerator(provider), self.profiles, concurrency=1, on_result=on_result)
+
+        self.assertEqual(saved_when_reported, [True, False, True, True, True])
+        self.assertEqual((summary.succeeded, summary.failed), (4, 1))
+        failed = next(result for result in summary.results if not result.succeeded)
+        self.assertEqual(failed.profile, self.profiles[1])
+        self.assertEqual(str(failed.error), 'Provider unavailable')
+        self.assertIsNone(failed.plan)
+
+    def test_summary_figures(self) -> None:
+        results = [GenerationResult(profile=profile, latency=latency) for profile, latency in zip(self.profiles, [1.0, 2.0, 3.0, 4.0])]
+        results.append(GenerationResult(profile=self.profiles[4], latency=5.0, error=ValueError('failed')))
+
+        summary = BatchSummary(elapsed=30.0, results=results)
+
+        self.assertEqual((summary.succeeded, summary.failed), (4, 1))
+        self.assertEqual(summary.plans_per_minute, 8.0)
+        self.assertEqual(summary.latency_percentile(50), 3.0)
+        self.assertEqual(summary.latency_percentile(100), 5.0)
+        self.assertEqual(BatchSummary(elapsed=0.0).plans_per_minute, 0.0)
+
+    def test_command_selects_users_by_goal_and_id(self) -> None:
+        provider = ConcurrentProvider()
+
+        with patch('fitness.management.commands.generate_workout_plan.get_ai_provider', return_value=provider):
+            out = StringIO()
+            call_command('generate_workout_plan', '--goal', 'endurance', '--concurrency', '3', stdout=out, stderr=StringIO())
+            self.assertIn('Generated 2/2 plans', out.getvalue())
+            self.assertIn('Latency p50', out.getvalue())
+
+            out = StringIO()
+            call_command('generate_workout_plan', '--user-ids', str(self.profiles[0].user_id), stdout=out, stderr=StringIO())
+            self.assertIn('Generated 1/1 plans', out.getvalue())
+
+        self.assertEqual(
+            set(WorkoutPlan.objects.values_list('user_id', flat=True)),
+            {self.profiles[0].user_id, self.profiles[3].user_id, self.profiles[4].user_id}
+        )
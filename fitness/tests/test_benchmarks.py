@@ -0,0 +1,65 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from io import StringIO
+from pathlib import Path
+import json
+import tempfile
+from ..benchmarks.fake_provider import FakeAIProvider
+from ..benchmarks.harness import BenchmarkResult, find_regressions, load_baseline, save_baseline
+from ..models import WorkoutPlan
+
+class TestBenchmarkHarness(TestCase):
+    def test_regressions_respect_direction_and_tolerance(self) -> None:
+        results = [
+            BenchmarkResult('render', 's', [0.13]),
+            BenchmarkResult('persist', 's', [0.11]),
+            BenchmarkResult('dispatch', 'messages/s', [70.0], higher_is_better=True),
+            BenchmarkResult('new', 's', [5.0]),
+        ]
+        baseline = {'render': 0.1, 'persist': 0.1, 'dispatch': 100.0}
+
+        regressions = find_regressions(results, baseline, tolerance=0.2)
+
+        self.assertEqual([regression.name for regression in regressions], ['render', 'dispatch'])
+        self.assertAlmostEqual(regressions[1].change, -0.3)
+
+    def test_baseline_round_trip_keeps_other_entries(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'baseline.json'
+            save_baseline(path, [BenchmarkResult('render', 's', [0.1, 0.3, 0.2])])
+            save_baseline(path, [BenchmarkResult('persist', 's', [0.5])])
+
+            self.assertEqual(load_baseline(path), {'render': 0.2, 'persist': 0.5})
+        self.assertEqual(load_baseline(Path(tmp) / 'missing.json'), {})
+
+    def test_fake_provider_returns_full_week(self) -> None:
+        plan = FakeAIProvider(exercises_per_day=4).generate_completion([])
+        self.assertEqual(len(plan['weekly_plan']), 7)
+        self.assertTrue(all(len(day['exercises']) == 4 for day in plan['weekly_plan']))
+
+class TestRunBenchmarksCommand(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.baseline = Path(tmp.name) / 'baseline.json'
+
+    def run_benchmarks(self, *args: str) -> str:
+        out = StringIO()
+        call_command('run_benchmarks', '--users', '3', '--repeat', '1', '--baseline', str(self.baseline), *args, stdout=out)
+        return out.getvalue()
+
+    def test_records_baseline_and_rolls_back_seeded_data(self) -> None:
+        output = self.run_benchmarks('--update-baseline')
+
+        self.assertIn('Recorded 7 benchmarks', output)
+        recorded = json.loads(self.baseline.read_text())['benchmarks']
+        self.assertEqual(recorded['send_workout']['unit'], 'messages/s')
+        self.assertTrue(recorded['send_workout']['higher_is_better'])
+        self.assertFalse(WorkoutPlan.objects.exists())
+
+    def test_fails_on_regression(self) -> None:
+        self.baseline.write_text(json.dumps({'benchmarks': {'plan_persistence': {'value': 1e-9}}}))
+
+        with self.assertRaisesMessage(CommandError, '1 benchmarks regressed'):
+            self.run_benchmarks('--only', 'plan_persistence')
@@ -0,0 +1,71 @@
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import Mock
+from ..models import CachedCompletion
+from ..services.ai_providers import AIProvider
+from ..services.completion_cache import CachedAIProvider, DatabaseCompletionStore, InMemoryCompletionStore
+
+MESSAGES = [{"role": "user", "content": "Generate a plan"}]
+
+class TestCachedAIProvider(TestCase):
+    def setUp(self) -> None:
+        self.provider = Mock(spec=AIProvider)
+        self.provider.model = "test-model"
+        self.provider.generate_completion.side_effect = lambda messages, response_schema=None: {"call": self.provider.generate_completion.call_count}
+
+    def test_collects_variants_before_serving_hits(self) -> None:
+        cached = CachedAIProvider(self.provider, store=DatabaseCompletionStore(), variants=2)
+
+        responses = [cached.generate_completion(MESSAGES) for _ in range(5)]
+
+        self.assertEqual(self.provider.generate_completion.call_count, 2)
+        self.assertTrue(all(response in [{"call": 1}, {"call": 2}] for response in responses))
+        self.assertEqual(cached.stats()["hits"], 3)
+        self.assertEqual(cached.stats()["misses"], 2)
+        self.assertEqual(CachedCompletion.objects.count(), 2)
+
+    def test_expired_entries_are_refreshed(self) -> None:
+        cached = CachedAIProvider(self.provider, store=DatabaseCompletionStore(), ttl=60)
+        cached.generate_completion(MESSAGES)
+        CachedCompletion.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(cached.generate_completion(MESSAGES), {"call": 2})
+
+    def test_least_recently_used_keys_are_evicted(self) -> None:
+        for store in [InMemoryCompletionStore(), DatabaseCompletionStore(touch_fraction=0, eviction_interval=0)]:
+            store.add("a", "test-model", {"key": "a"}, max_entries=2)
+            store.add("b", "test-model", {"key": "b"}, max_entries=2)
+            store.get("a", ttl=60)
+            store.add("c", "test-model", {"key": "c"}, max_entries=2)
+
+            self.assertEqual(store.get("b", ttl=60), [])
+            self.assertEqual(store.get("a", ttl=60), [{"key": "a"}])
+            self.assertEqual(store.get("c", ttl=60), [{"key": "c"}])
+
+    def test_database_hits_only_touch_stale_keys(self) -> None:
+        store = DatabaseCompletionStore(touch_fraction=0.1)
+        store.add("a", "test-model", {"key": "a"}, max_entries=10)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(store.get("a", ttl=600), [{"key": "a"}])
+
+        used = timezone.now() - timedelta(seconds=120)
+        CachedCompletion.objects.update(last_used_at=used)
+        with self.assertNumQueries(2):
+            store.get("a", ttl=600)
+        self.assertGreater(CachedCompletion.objects.get().last_used_at, used)
+
+    def test_database_eviction_runs_only_over_the_bound(self) -> None:
+        store = DatabaseCompletionStore(eviction_interval=3600)
+        with self.assertNumQueries(2):
+            store.add("a", "test-model", {"key": "a"}, max_entries=2)
+        store.add("b", "test-model", {"key": "b"}, max_entries=2)
+
+        store.add("c", "test-model", {"key": "c"}, max_entries=2)
+        self.assertEqual(CachedCompletion.objects.values('key').distinct().count(), 2)
+
+        # Within the interval the scan is skipped until evict() is called
+        store.add("d", "test-model", {"key": "d"}, max_entries=2)
+        self.assertEqual(CachedCompletion.objects.count(), 3)
+        self.assertEqual(store.evict(max_entries=2), 1)
@@ -0,0 +1,164 @@
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from ..models import DailyWorkout, Exercise, ExerciseSet, WorkoutPlan
+from ..services.email_dispatch import OutgoingEmail, dispatch_emails
+
+class RecordingBackend(EmailBackend):
+    """locmem backend that counts connections and refuses one recipient."""
+    opened = 0
+
+    def open(self):
+        if not getattr(self, 'is_open', False):
+            RecordingBackend.opened += 1
+            self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if any('refused@example.com' in message.to for message in messages):
+            raise ValueError('Recipient refused')
+        return super().send_messages(messages)
+
+class ProcessKilled(BaseException):
+    """Stands in for the process dying mid-run; not caught like a per-message failure."""
+
+class CrashingBackend(EmailBackend):
+    """locmem backend whose process dies when sending the third message."""
+    attempts = 0
+
+    def send_messages(self, messages):
+        CrashingBackend.attempts += 1
+        if CrashingBackend.attempts == 3:
+            raise ProcessKilled()
+        return super().send_messages(messages)
+
+BACKEND = 'fitness.tests.test_email_dispatch.RecordingBackend'
+
+class TestDispatchEmails(TestCase):
+    def setUp(self) -> None:
+        RecordingBackend.opened = 0
+
+    def _emails(self, count, refused=()):
+        return [
+            OutgoingEmail(
+                key=i,
+                recipient='refused@example.com' if i in refused else f'user{i}@example.com',
+                subject='Workout',
+                body='Body'
+            )
+            for i in range(count)
+        ]
+
+    def test_reuses_one_connection_per_chunk(self) -> None:
+        result = dispatch_emails(self._emails(25), chunk_size=10, backend=BACKEND)
+
+        self.assertEqual(len(result.sent), 25)
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(RecordingBackend.opened, 3)
+
+    def test_records_failures_without_aborting(self) -> None:
+        result = dispatch_emails(self._emails(10, refused={3}), chunk_size=10, workers=2, backend=BACKEND)
+
+        self.assertEqual([failure.key for failure in result.failures], [3])
+        self.assertEqual(result.failures[0].error, 'Recipient refused')
+        self.assertEqual(len(result.sent), 9)
+        self.assertEqual(len(mail.outbox), 9)
+
+    def test_workers_read_a_bounded_window_of_the_queue(self) -> None:
+        taken = []
+
+        def emails():
+            for email in self._emails(100):
+                taken.append(email)
+                yield email
+
+        sent = []
+        ahead = []
+
+        def on_chunk(chunk_result):
+            sent.extend(chunk_result.sent)
+            ahead.append(len(taken) - len(sent))
+
+        result = dispatch_emails(emails(), chunk_size=5, workers=2, backend=BACKEND, on_chunk=on_chunk)
+
+        self.assertEqual(len(result.sent), 100)
+        self.assertEqual(len(ahead), 20)
+        # At most the window of four chunks, plus the one being cut, is read ahead of what was sent
+        self.assertLessEqual(max(ahead), 25)
+
+class TestSendWorkoutCommand(TestCase):
+    def test_dry_run_sends_rendered_plans(self) -> None:
+        week_start = timezone.now().date() + timedelta(days=1)
+        exercise = Exercise.objects.create(name='Push-ups', description='Push', muscle_groups=['chest'], difficulty_level=1, instructions='Push')
+        for i in range(3):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            plan = WorkoutPlan.objects.create(user=user, week_start_date=week_start, general_guidelines=['Warm up'])
+            workout = DailyWorkout.objects.create(workout_plan=plan, day='Monday', focus='Upper Body', duration='45 minutes', intensity=6)
+            ExerciseSet.objects.create(exercise=exercise, daily_workout=workout, sets=3, reps='12')
+
+        out = StringIO()
+        with self.assertNumQueries(4):
+            call_command('send_workout', '--dry-run', stdout=out)
+
+        self.assertIn('Sent 3 weekly plans', out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
+        body = mail.outbox[0].body
+        self.assertIn('Monday: Upper Body (45 minutes, intensity 6/10)', body)
+        self.assertIn('  - Push-ups: 3 x 12, rest 60 seconds', body)
+        self.assertIn('  - Warm up', body)
+
+class TestSendDailyWorkoutCommand(TestCase):
+    def setUp(self) -> None:
+        self.today = timezone.now().date()
+        week_start = self.today - timedelta(days=(self.today.weekday() + 1) % 7)
+        self.day_name = self.today.strftime('%A')
+        exercise = Exercise.objects.create(name='Squat', description='Squat', muscle_groups=['legs'], difficulty_level=1, instructions='Squat')
+        for i in range(5):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            plan = WorkoutPlan.objects.create(user=user, week_start_date=week_start)
+            workout = DailyWorkout.objects.create(workout_plan=plan, day=self.day_name, focus='Legs')
+            ExerciseSet.objects.create(exercise=exercise, daily_workout=workout, sets=3, reps='10')
+
+    def test_sends_queue_and_marks_batch_sent(self) -> None:
+        self.assertEqual(DailyWorkout.objects.filter(date=self.today).count(), 5)
+
+        out = StringIO()
+        with self.assertNumQueries(5):
+            call_command('send_daily_workout', stdout=out)
+
+        self.assertIn('Sent 5 daily workouts', out.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn('  - Squat: 3 x 10, rest 60 seconds', mail.outbox[0].body)
+        self.assertFalse(DailyWorkout.objects.filter(sent=False).exists())
+        self.assertFalse(DailyWorkout.objects.filter(sent_at__isnull=True).exists())
+
+        call_command('send_daily_workout', stdout=out)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_chunks_are_marked_sent_as_they_go(self) -> None:
+        CrashingBackend.attempts = 0
+
+        with self.assertRaises(ProcessKilled):
+            call_command(
+                'send_daily_workout', '--chunk-size', '2', '--backend', 'fitness.tests.test_email_dispatch.CrashingBackend',
+                stdout=StringIO()
+            )
+
+        # The first chunk went out before the crash and is not sent again
+        self.assertEqual(DailyWorkout.objects.filter(sent=True).count(), 2)
+        call_command('send_daily_workout', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_dry_run_leaves_workouts_unsent(self) -> None:
+        call_command('send_daily_workout', '--dry-run', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(DailyWorkout.objects.filter(sent=False).count(), 5)
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from datetime import date
+from unittest.mock import Mock
+from ..models import DailyWorkout, Exercise, ExerciseSet, UserProfile, WorkoutPlan
+from ..services.ai_providers import AIProvider
+from ..services.exercise_catalog import catalog_candidates, has_equipment_for
+from ..services.plan_prompt import PlanPromptBuilder
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+def make_exercise(name: str, equipment: list) -> Exercise:
+    return Exercise.objects.create(
+        name=name, description=f'{name} description', muscle_groups=['legs'], equipment_needed=equipment,
+        difficulty_level=2, instructions=f'{name} instructions', tips=f'{name} tips'
+    )
+
+class TestCatalogCandidates(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user(username='catalog@example.com', email='catalog@example.com', password='testpass123')
+        self.user_profile = UserProfile.objects.create(user=user, goal='strength', available_equipment=['dumbbells'])
+
+    def test_equipment_matching(self) -> None:
+        self.assertTrue(has_equipment_for(['Dumbbells', 'bodyweight'], ['dumbbells']))
+        self.assertFalse(has_equipment_for(['barbell'], ['dumbbells']))
+        self.assertTrue(has_equipment_for(['barbell'], ['full_gym_access']))
+
+    def test_equipment_display_labels_match_their_keys(self) -> None:
+        self.assertTrue(has_equipment_for(['Pull-up Bar'], ['pull_up_bar']))
+        self.assertTrue(has_equipment_for(['Resistance Bands', 'Yoga Mat'], ['resistance_bands', 'yoga_mat']))
+        self.assertTrue(has_equipment_for(['Bodyweight Only'], []))
+        self.assertTrue(has_equipment_for(['bodyweight only'], ['dumbbells']))
+        self.assertFalse(has_equipment_for(['Squat Rack'], ['pull_up_bar']))
+
+    def test_candidates_fit_equipment_and_rank_by_goal_use(self) -> None:
+        lunge = make_exercise('Lunge', ['bodyweight'])
+        goblet_squat = make_exercise('Goblet Squat', ['dumbbells'])
+        make_exercise('Back Squat', ['barbell', 'squat_rack'])
+        # The goblet squat appears in a plan of another strength user
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='testpass123')
+        UserProfile.objects.create(user=other, goal='strength', available_equipment=['dumbbells'])
+        plan = WorkoutPlan.objects.create(user=other, week_start_date=date(2026, 10, 11))
+        day = DailyWorkout.objects.create(workout_plan=plan, day='Monday')
+        ExerciseSet.objects.create(exercise=goblet_squat, daily_workout=day, sets=3, reps='10')
+
+        candidates = catalog_candidates(self.user_profile, limit=5)
+
+        self.assertEqual([entry.id for entry in candidates], [goblet_squat.pk, lunge.pk])
+        prompt = PlanPromptBuilder('catalog').build_messages(self.user_profile)[1]['content']
+        self.assertIn(f'{goblet_squat.pk}: Goblet Squat\n{lunge.pk}: Lunge', prompt)
+
+    def test_candidates_are_cached_per_goal_and_equipment(self) -> None:
+        pull_up = make_exercise('Pull-up', ['Pull-up Bar'])
+        self.user_profile.available_equipment = ['pull_up_bar', 'dumbbells']
+        catalog_candidates(self.user_profile)
+        make_exercise('Chin-up', ['Pull-up Bar'])
+
+        with self.assertNumQueries(0):
+            candidates = catalog_candidates(self.user_profile)
+
+        self.assertEqual([entry.id for entry in candidates], [pull_up.pk])
+
+
+class TestCatalogResponses(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user(username='plans@example.com', email='plans@example.com', password='testpass123')
+        self.user_profile = UserProfile.objects.create(user=user, goal='strength', available_equipment=['dumbbells'])
+        self.provider = Mock(spec=AIProvider)
+        self.generator = WorkoutPlanGenerator(self.provider, prompt_builder=PlanPromptBuilder('catalog'))
+
+    def test_references_resolve_to_catalog_rows_and_new_definitions(self) -> None:
+        lunge = make_exercise('Lunge', ['bodyweight'])
+        self.provider.generate_completion.return_value = {
+            "weekly_plan": [{
+                "day": "Monday", "focus": "Legs", "description": "", "duration": "30 minutes", "intensity": 5, "notes": "",
+                "exercises": [
+                    {"exercise_id": lunge.pk, "sets": 3, "reps": "12", "rest": "45 seconds", "weight": "", "notes": ""},
+                    {"exercise_id": 0, "sets": 4, "reps": "8", "rest": "90 seconds", "weight": "heavy", "notes": ""},
+                    {"exercise_id": 999999, "sets": 2, "reps": "10", "rest": "60 seconds", "weight": "", "notes": ""},
+                ],
+                "new_exercises": [{
+                    "name": "Step-up", "description": "Step onto a box", "muscle_groups": ["legs"],
+                    "equipment_needed": ["bench"], "difficulty_level": 2, "instructions": "Drive through the heel", "tips": "",
+                }],
+            }],
+            "equipment_needed": ["bench"],
+            "general_guidelines": [],
+        }
+
+        with self.assertLogs('fitness.services.workout_plan_generator', 'WARNING'):
+            workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+
+        sets = list(ExerciseSet.objects.filter(daily_workout__workout_plan=workout_plan).order_by('pk'))
+        self.assertEqual([(s.exercise.name, s.sets, s.rest_time) for s in sets], [
+            ('Lunge', 3, '45 seconds'),
+            ('Step-up', 4, '90 seconds'),
+        ])
+        self.assertEqual(sets[0].exercise, lunge)
+        self.assertEqual(Exercise.objects.get(name='Step-up').instructions, 'Drive through the heel')
+        schema = self.provider.generate_completion.call_args.kwargs['response_schema']['schema']
+        workout_schema = schema['properties']['weekly_plan']['items']
+        self.assertIn('exercise_id', workout_schema['properties']['exercises']['items']['properties'])
@@ -1,9 +1,13 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.utils import timezone
 from unittest.mock import Mock, patch
+from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, cast
 from ..models import UserProfile, WorkoutPlan, DailyWorkout, Exercise, ExerciseSet
+from ..benchmarks.fake_provider import FakeAIProvider
 from ..services.workout_plan_generator import WorkoutPlanGenerator
 from ..services.ai_providers import AIProvider
 from ..constants import GOAL_CHOICES, EQUIPMENT_CHOICES, DIFFICULTY_CHOICES
@@ -82,6 +86,8 @@ class TestWorkoutPlanGenerator(TestCase):
         self.assertEqual(daily_workout.duration, "45-60 minutes")
         self.assertEqual(daily_workout.intensity, 4)
         self.assertEqual(daily_workout.notes, "Focus on form")
+        self.assertEqual(daily_workout.date, workout_plan.week_start_date + timedelta(days=1))
+        self.assertFalse(daily_workout.sent)
 
         # Verify Exercise was created
         exercise = Exercise.objects.first()
@@ -192,3 +198,207 @@ class TestWorkoutPlanGenerator(TestCase):
         # Verify that no new exercise was created
         self.assertEqual(Exercise.objects.count(), 1)
         self.assertEqual(Exercise.objects.first(), existing_exercise)
+
+    def _build_plan_response(self, days: int, exercises_per_day: int) -> Dict[str, Any]:
+        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        return {
+            "weekly_plan": [
+                {
+                    "day": day_names[day],
+                    "focus": "Full Body",
+                    "description": "Full body workout",
+                    "duration": "45 minutes",
+                    "intensity": 5,
+                    "notes": "",
+                    "exercises": [
+                        {
+                            "name": f"Exercise {day}-{index}",
+                            "description": "Description",
+                            "muscle_groups": ["legs"],
+                            "equipment_needed": ["bodyweight"],
+                            "difficulty_level": 1,
+                            "instructions": "Instructions",
+                            "tips": "",
+                            "sets": 3,
+                            "reps": "10",
+                            "rest": "60 seconds",
+                            "weight": "",
+                            "notes": ""
+                        }
+                        for index in range(exercises_per_day)
+                    ]
+                }
+                for day in range(days)
+            ],
+            "equipment_needed": ["bodyweight"],
+            "general_guidelines": ["Stay hydrated"]
+        }
+
+    def test_persistence_query_count_is_constant(self) -> None:
+        """Test that persisting a plan costs the same number of queries regardless of its size."""
+        query_counts = []
+        for days, exercises_per_day in [(1, 1), (7, 6)]:
+            WorkoutPlan.objects.all().delete()
+            self.mock_ai_provider.generate_completion.return_value = self._build_plan_response(days, exercises_per_day)
+            with CaptureQueriesContext(connection) as queries:
+                workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+            query_counts.append(len(queries))
+            self.assertEqual(workout_plan.daily_workouts.count(), days)
+            self.assertEqual(ExerciseSet.objects.filter(daily_workout__workout_plan=workout_plan).count(), days * exercises_per_day)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_failed_persistence_keeps_existing_plan(self) -> None:
+        """Test that an invalid response rolls back without deleting the current plan."""
+        self.mock_ai_provider.generate_completion.return_value = self._build_plan_response(2, 2)
+        existing_plan = self.generator.generate_weekly_plan(self.user_profile)
+
+        broken_response = self._build_plan_response(2, 2)
+        del broken_response["weekly_plan"][1]["exercises"][0]["sets"]
+        self.mock_ai_provider.generate_completion.return_value = broken_response
+        with self.assertRaises(KeyError):
+            self.generator.generate_weekly_plan(self.user_profile)
+
+        self.assertEqual(list(WorkoutPlan.objects.filter(user=self.user)), [existing_plan])
+        self.assertEqual(existing_plan.daily_workouts.count(), 2)
+
+    def test_exercise_reuse_ignores_muscle_group_order_and_case(self) -> None:
+        """Test that near-duplicate exercises resolve to the existing catalog row."""
+        existing_exercise = Exercise.objects.create(
+            name="Push-ups",
+            description="Classic push-up exercise",
+            muscle_groups=["chest", "triceps"],
+            equipment_needed=["bodyweight"],
+            difficulty_level=2,
+            instructions="Keep back straight"
+        )
+        response = self._build_plan_response(1, 1)
+        response["weekly_plan"][0]["exercises"][0].update(name="push-ups", muscle_groups=["Triceps", "chest"])
+        self.mock_ai_provider.generate_completion.return_value = response
+
+        workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+
+        self.assertEqual(Exercise.objects.count(), 1)
+        exercise_set = ExerciseSet.objects.get(daily_workout__workout_plan=workout_plan)
+        self.assertEqual(exercise_set.exercise, existing_exercise)
+
+    def test_days_are_normalized_and_ordered_by_day_index(self) -> None:
+        """Test that day names are stored canonically with their position in the week."""
+        response = self._build_plan_response(3, 1)
+        for workout, day in zip(response["weekly_plan"], ["saturday", " Sunday", "MONDAY"]):
+            workout["day"] = day
+        self.mock_ai_provider.generate_completion.return_value = response
+
+        workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+
+        days = list(workout_plan.daily_workouts.values_list('day', 'day_index', 'date'))
+        week_start = workout_plan.week_start_date
+        self.assertEqual(days, [
+            ("Sunday", 0, week_start),
+            ("Monday", 1, week_start + timedelta(days=1)),
+            ("Saturday", 6, week_start + timedelta(days=6)),
+        ])
+
+    @patch('fitness.services.workout_plan_generator.datetime')
+    def test_remaining_only_regenerates_days_still_ahead(self, mock_datetime: Mock) -> None:
+        """Test that a mid-week regeneration replaces only today's unsent and later days."""
+        # Thursday 15 October 2026, in the week starting Sunday the 11th
+        mock_datetime.now.return_value = datetime(2026, 10, 15, 9, 0)
+        self.mock_ai_provider.generate_completion.return_value = self._build_plan_response(7, 1)
+        workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+        kept = dict(workout_plan.daily_workouts.exclude(day__in=['Friday', 'Saturday']).values_list('day', 'pk'))
+        workout_plan.daily_workouts.filter(day='Thursday').update(sent=True)
+
+        response = self._build_plan_response(7, 1)
+        response["weekly_plan"] = [
+            dict(workout, focus="Mobility") for workout in response["weekly_plan"] if workout["day"] in ("Monday", "Friday", "Saturday")
+        ]
+        self.mock_ai_provider.generate_completion.return_value = response
+        regenerated = self.generator.generate_weekly_plan(self.user_profile, remaining_only=True)
+
+        prompt = self.mock_ai_provider.generate_completion.call_args.args[0][1]["content"]
+        self.assertIn("one each for: Friday, Saturday.", prompt)
+        self.assertIn("Thursday: Full Body (Exercise 3-0)", prompt)
+        self.assertEqual(regenerated.pk, workout_plan.pk)
+        # The Monday the model returned anyway is ignored, and earlier rows are untouched
+        self.assertEqual(dict(regenerated.daily_workouts.exclude(day__in=['Friday', 'Saturday']).values_list('day', 'pk')), kept)
+        self.assertEqual(
+            list(regenerated.daily_workouts.values_list('day', 'focus')),
+            [(day, "Full Body") for day in ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday"]]
+            + [("Friday", "Mobility"), ("Saturday", "Mobility")]
+        )
+        regenerated.refresh_from_db()
+        self.assertEqual([day["focus"] for day in regenerated.snapshot["days"]][-2:], ["Mobility", "Mobility"])
+
+    @patch('fitness.services.workout_plan_generator.datetime')
+    def test_remaining_only_on_sunday_keeps_the_current_week(self, mock_datetime: Mock) -> None:
+        """Test that on a Sunday the current week starts today, so the rest of it is regenerated."""
+        mock_datetime.now.return_value = datetime(2026, 10, 18, 9, 0)
+        self.mock_ai_provider.generate_completion.return_value = self._build_plan_response(7, 1)
+        workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+        self.assertEqual(workout_plan.week_start_date, date(2026, 10, 18))
+        workout_plan.daily_workouts.filter(day='Sunday').update(sent=True)
+
+        response = self._build_plan_response(7, 1)
+        response["weekly_plan"] = [dict(workout, focus="Mobility") for workout in response["weekly_plan"]]
+        self.mock_ai_provider.generate_completion.return_value = response
+        regenerated = self.generator.generate_weekly_plan(self.user_profile, remaining_only=True)
+
+        prompt = self.mock_ai_provider.generate_completion.call_args.args[0][1]["content"]
+        self.assertIn("one each for: Monday, Tuesday, Wednesday, Thursday, Friday, Saturday.", prompt)
+        self.assertEqual(regenerated.pk, workout_plan.pk)
+        self.assertEqual(
+            list(regenerated.daily_workouts.values_list('focus', flat=True)),
+            ["Full Body"] + ["Mobility"] * 6
+        )
+
+    @patch('fitness.services.workout_plan_generator.datetime')
+    def test_remaining_only_rejects_a_response_missing_days(self, mock_datetime: Mock) -> None:
+        """Test that a response leaving out a requested day fails before any day is deleted."""
+        mock_datetime.now.return_value = datetime(2026, 10, 15, 9, 0)
+        self.mock_ai_provider.generate_completion.return_value = self._build_plan_response(7, 1)
+        workout_plan = self.generator.generate_weekly_plan(self.user_profile)
+        before = list(workout_plan.daily_workouts.values_list('pk', flat=True))
+
+        response = self._build_plan_response(7, 1)
+        response["weekly_plan"] = [workout for workout in response["weekly_plan"] if workout["day"] != "Saturday"]
+        self.mock_ai_provider.generate_completion.return_value = response
+        with self.assertRaisesMessage(ValueError, "Plan response does not cover Saturday"):
+            self.generator.generate_weekly_plan(self.user_profile, remaining_only=True)
+
+        self.assertEqual(list(workout_plan.daily_workouts.values_list('pk', flat=True)), before)
+
+        # Once every remaining day has been sent there is nothing left to regenerate
+        workout_plan.daily_workouts.filter(day__in=['Thursday', 'Friday', 'Saturday']).update(sent=True)
+        with self.assertRaises(ValueError):
+            self.generator.generate_weekly_plan(self.user_profile, remaining_only=True)
+
+    def test_fan_out_generates_every_day_of_the_split(self) -> None:
+        """Test that fan-out makes one split call and one call per day, merged into a full plan."""
+        provider = FakeAIProvider(exercises_per_day=2)
+        provider.agenerate_completion = Mock(wraps=provider.agenerate_completion)
+        generator = WorkoutPlanGenerator(provider, strategy='fan_out', fan_out_concurrency=3)
+
+        workout_plan = generator.generate_weekly_plan(self.user_profile)
+
+        schemas = [call.kwargs['response_schema']['name'] for call in provider.agenerate_completion.call_args_list]
+        self.assertEqual(schemas, ['weekly_split'] + ['daily_workout'] * 7)
+        self.assertEqual(
+            list(workout_plan.daily_workouts.values_list('day', flat=True)),
+            ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+        )
+        self.assertEqual(ExerciseSet.objects.filter(daily_workout__workout_plan=workout_plan).count(), 14)
+        self.assertEqual(workout_plan.equipment_needed, ["dumbbells", "bench"])
+
+    def test_fan_out_rejects_a_split_missing_days(self) -> None:
+        """Test that an incomplete split fails before any day is generated or the plan is replaced."""
+        provider = FakeAIProvider(exercises_per_day=1)
+        existing_plan = WorkoutPlanGenerator(provider).generate_weekly_plan(self.user_profile)
+        split = provider.split()
+        split["weekly_split"] = split["weekly_split"][:5]
+        provider.split = Mock(return_value=split)
+
+        with self.assertRaisesMessage(ValueError, "Weekly split does not cover Friday, Saturday"):
+            WorkoutPlanGenerator(provider, strategy='fan_out').generate_weekly_plan(self.user_profile)
+
+        self.assertEqual(list(WorkoutPlan.objects.filter(user=self.user)), [existing_plan])
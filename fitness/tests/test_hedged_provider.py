@@ -0,0 +1,138 @@
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from ..benchmarks.fake_provider import FakeAIProvider
+from ..services.ai_metrics import InstrumentedProvider
+from ..services.ai_providers import AIProviderError, get_ai_provider, reset_ai_providers
+from ..services.hedged_provider import HedgedProvider, find_hedged_provider
+from ..services.plan_prompt import PlanPromptBuilder
+from ..services.resilience import CircuitBreaker, RetryPolicy
+
+MESSAGES = [{"role": "user", "content": "Plan my week"}]
+SCHEMA = PlanPromptBuilder('compact').response_schema()
+
+class ScriptedProvider:
+    """Answers after a delay with a fixed response, or raises; notes whether it was cancelled."""
+
+    def __init__(self, response: Any = None, latency: float = 0.0, error: Optional[Exception] = None):
+        self.response = response if response is not None else FakeAIProvider(exercises_per_day=1).plan()
+        self.latency = latency
+        self.error = error
+        self.cancelled = False
+
+    async def agenerate_completion(self, messages: List[Any], response_schema: Optional[Dict[str, Any]] = None) -> Any:
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+class BreakerProvider(ScriptedProvider):
+    """ScriptedProvider whose calls go through a retry policy with a circuit breaker, like the real providers."""
+
+    def __init__(self, latency: float, reset_timeout: float):
+        super().__init__(latency=latency)
+        self.calls = 0
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+        self.retry_policy = RetryPolicy(max_retries=0, is_retryable=lambda exc: True, breaker=self.breaker)
+
+    async def agenerate_completion(self, messages: List[Any], response_schema: Optional[Dict[str, Any]] = None) -> Any:
+        async def attempt() -> Any:
+            self.calls += 1
+            return await super(BreakerProvider, self).agenerate_completion(messages, response_schema)
+        return await self.retry_policy.acall(attempt)
+
+class TestHedgedProvider(SimpleTestCase):
+    def test_fast_primary_is_not_hedged(self) -> None:
+        backup = ScriptedProvider()
+        provider = HedgedProvider(ScriptedProvider(), backup, delay=0.5)
+
+        provider.generate_completion(MESSAGES, response_schema=SCHEMA)
+
+        self.assertEqual(provider.stats()['hedged'], 0)
+        self.assertEqual(provider.stats()['primary_wins'], 1)
+
+    def test_slow_primary_is_hedged_and_cancelled(self) -> None:
+        primary = ScriptedProvider(latency=5.0)
+        backup_response = FakeAIProvider(exercises_per_day=2).plan()
+        provider = HedgedProvider(primary, ScriptedProvider(backup_response, latency=0.01), delay=0.05)
+
+        started = time.perf_counter()
+        response = provider.generate_completion(MESSAGES, response_schema=SCHEMA)
+
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(response, backup_response)
+        self.assertTrue(primary.cancelled)
+        stats = provider.stats()
+        self.assertEqual((stats['hedged'], stats['backup_wins'], stats['backup_win_rate']), (1, 1, 1.0))
+
+    def test_cancelled_half_open_trial_does_not_disable_the_loser(self) -> None:
+        primary = BreakerProvider(latency=5.0, reset_timeout=0.05)
+        primary.breaker.record_failure()
+        time.sleep(0.06)
+        provider = HedgedProvider(primary, ScriptedProvider(latency=0.01), delay=0.02)
+
+        # The primary's call is the breaker's half-open trial, and loses the hedge
+        provider.generate_completion(MESSAGES, response_schema=SCHEMA)
+        self.assertTrue(primary.cancelled)
+        self.assertEqual(primary.calls, 1)
+
+        time.sleep(0.06)
+        primary.latency = 0.0
+        async_to_sync(primary.agenerate_completion)(MESSAGES, SCHEMA)
+        self.assertEqual(primary.calls, 2)
+        self.assertFalse(primary.breaker.is_open)
+
+    def test_invalid_primary_response_hedges_immediately(self) -> None:
+        provider = HedgedProvider(ScriptedProvider({"weekly_plan": "not a list"}), ScriptedProvider(), delay=30.0)
+
+        response = provider.generate_completion(MESSAGES, response_schema=SCHEMA)
+
+        self.assertIsInstance(response['weekly_plan'], list)
+        self.assertEqual(provider.stats()['backup_wins'], 1)
+
+    def test_fails_when_both_providers_fail(self) -> None:
+        provider = HedgedProvider(
+            ScriptedProvider(error=AIProviderError("primary down")),
+            ScriptedProvider(error=AIProviderError("backup down")),
+            delay=0.01,
+        )
+
+        with self.assertRaisesMessage(AIProviderError, "primary: primary down; backup: backup down"):
+            async_to_sync(provider.agenerate_completion)(MESSAGES, SCHEMA)
+        self.assertEqual(provider.stats()['failures'], 1)
+
+    def test_delay_follows_primary_latency_percentile(self) -> None:
+        provider = HedgedProvider(ScriptedProvider(), ScriptedProvider(), delay=9.0, latency_percentile=90, min_samples=10)
+        for latency in range(1, 10):
+            provider._record_primary_latency(latency)
+        self.assertEqual(provider.hedge_delay(), 9.0)
+
+        provider._record_primary_latency(10)
+        self.assertAlmostEqual(provider.hedge_delay(), 9.1)
+
+
+@override_settings(
+    OPENAI_API_KEY='test-key',
+    ANTHROPIC_API_KEY='test-key',
+    AI_METRICS_ENABLED=True,
+    AI_HEDGING={'PRIMARY': 'openai', 'BACKUP': 'anthropic', 'DELAY': 5.0, 'LATENCY_PERCENTILE': None, 'MIN_SAMPLES': 20, 'WINDOW': 200},
+)
+class TestHedgedProviderRegistry(SimpleTestCase):
+    def setUp(self) -> None:
+        reset_ai_providers()
+        self.addCleanup(reset_ai_providers)
+
+    def test_hedged_provider_wraps_registered_providers(self) -> None:
+        provider = get_ai_provider('hedged', cache=True)
+
+        hedged = find_hedged_provider(provider)
+        self.assertIsNotNone(hedged)
+        self.assertIs(hedged.primary, get_ai_provider('openai', cache=False))
+        self.assertIsInstance(hedged.backup, InstrumentedProvider)
+        self.assertEqual(hedged.delay, 5.0)
@@ -0,0 +1,32 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import LiveServerTestCase, SimpleTestCase
+from ..benchmarks.load_test import delete_load_test_users, parse_mix, run_step, seed_load_test_users
+
+class TestParseMix(SimpleTestCase):
+    def test_parses_weights(self) -> None:
+        self.assertEqual(parse_mix('workout_plan=3, login=1,signup=0'), {'workout_plan': 3, 'login': 1, 'signup': 0})
+
+    def test_rejects_unknown_names_and_empty_mixes(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_mix('profile=1')
+        with self.assertRaises(ValueError):
+            parse_mix('login=0')
+
+
+class TestLoadTest(LiveServerTestCase):
+    def test_step_logs_in_and_reports_per_url_stats(self) -> None:
+        accounts = seed_load_test_users(2, 'load-test-Passw0rd!', 'loadtest-case-', exercises_per_day=2)
+        mix = {'signup': 1, 'login': 1, 'workout_plan': 2, 'daily_workout': 2}
+
+        step = async_to_sync(run_step)(self.live_server_url, accounts, 2, 1.0, mix, 'loadtest-case-', seed=1)
+
+        report = step.to_dict()
+        self.assertEqual(report['concurrency'], 2)
+        self.assertEqual(report['total']['errors'], 0, report['total']['errors_by_kind'])
+        # Both virtual users log in before following the mix
+        self.assertGreaterEqual(report['urls']['login']['requests'], 2)
+        self.assertIn('p99', report['urls']['login']['latency_ms'])
+
+        delete_load_test_users('loadtest-case-')
+        self.assertFalse(User.objects.filter(username__startswith='loadtest-case-').exists())
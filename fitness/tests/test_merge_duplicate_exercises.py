@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+from io import StringIO
+from ..models import Exercise, ExerciseSet, WorkoutPlan, DailyWorkout
+
+class TestMergeDuplicateExercises(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        workout_plan = WorkoutPlan.objects.create(user=user, week_start_date=timezone.now().date())
+        self.daily_workout = DailyWorkout.objects.create(workout_plan=workout_plan, day='Monday')
+
+    def _create_exercise(self, name: str, muscle_groups: list, canonical_key: str = '') -> Exercise:
+        exercise = Exercise.objects.create(
+            name=name,
+            description='',
+            muscle_groups=muscle_groups,
+            difficulty_level=1,
+            instructions=''
+        )
+        if canonical_key:
+            # A row keyed before the key normalization last changed
+            Exercise.objects.filter(pk=exercise.pk).update(canonical_key=canonical_key)
+        return exercise
+
+    def test_merges_duplicates_and_repoints_sets(self) -> None:
+        keeper = self._create_exercise('Push-ups', ['chest', 'triceps'], canonical_key='old-push-ups')
+        duplicate = self._create_exercise('push-ups', ['triceps', 'chest'], canonical_key='old-push-ups-2')
+        other = self._create_exercise('Squats', ['legs'])
+        exercise_set = ExerciseSet.objects.create(exercise=duplicate, daily_workout=self.daily_workout, sets=3, reps='10')
+
+        call_command('merge_duplicate_exercises', stdout=StringIO())
+
+        self.assertEqual(set(Exercise.objects.all()), {keeper, other})
+        exercise_set.refresh_from_db()
+        self.assertEqual(exercise_set.exercise, keeper)
+        keeper.refresh_from_db()
+        self.assertEqual(keeper.canonical_key, Exercise.make_canonical_key('Push-ups', ['chest', 'triceps']))
+
+    def test_dry_run_changes_nothing(self) -> None:
+        self._create_exercise('Push-ups', ['chest', 'triceps'], canonical_key='old-push-ups')
+        self._create_exercise('push-ups', ['triceps', 'chest'], canonical_key='old-push-ups-2')
+
+        call_command('merge_duplicate_exercises', dry_run=True, stdout=StringIO())
+
+        self.assertEqual(Exercise.objects.count(), 2)
+
+    def test_canonical_key_rejects_near_duplicates(self) -> None:
+        self._create_exercise('Bench Press', ['chest', 'triceps'])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._create_exercise('bench  press', ['triceps', 'chest'])
+        # What two concurrent plans inserting the same exercise rely on
+        Exercise.objects.bulk_create([
+            Exercise(
+                name='bench press', description='', muscle_groups=['triceps', 'chest'], difficulty_level=1, instructions='',
+                canonical_key=Exercise.make_canonical_key('bench press', ['triceps', 'chest'])
+            )
+        ], ignore_conflicts=True)
+        self.assertEqual(Exercise.objects.count(), 1)
@@ -0,0 +1,204 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, patch
+from ..constants import JOB_STATUS_FAILED, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_SUCCEEDED
+from ..models import PlanGenerationJob, UserProfile, WorkoutPlan
+from ..services.ai_providers import AIProvider
+from ..services.plan_jobs import PlanGenerationInProgress, claim_jobs, generate_single_flight, process_jobs
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+PLAN_RESPONSE = {
+    "weekly_plan": [
+        {
+            "day": "Monday",
+            "focus": "Upper Body",
+            "description": "Upper body workout",
+            "duration": "45 minutes",
+            "intensity": 4,
+            "notes": "",
+            "exercises": [{"name": "Push-ups", "muscle_groups": ["chest"], "sets": 3, "reps": "12"}]
+        }
+    ],
+    "equipment_needed": ["bodyweight"],
+    "general_guidelines": ["Stay hydrated"]
+}
+
+class TestPlanGenerationJobs(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test@example.com', email='test@example.com', password='testpass123')
+        UserProfile.objects.create(user=self.user, available_equipment=['bodyweight'])
+        self.client.force_login(self.user)
+
+    def test_generate_enqueues_and_redirects_immediately(self) -> None:
+        with patch('fitness.services.workout_plan_generator.WorkoutPlanGenerator.generate_weekly_plan') as generate:
+            response = self.client.get(reverse('workout_plan'), {'generate': 'true'})
+
+        job = PlanGenerationJob.objects.get()
+        generate.assert_not_called()
+        self.assertRedirects(response, f"{reverse('workout_plan')}?job={job.pk}", fetch_redirect_response=False)
+        self.assertEqual(job.status, JOB_STATUS_PENDING)
+
+    def test_repeated_generate_reuses_active_job(self) -> None:
+        self.client.get(reverse('workout_plan'), {'generate': 'true'})
+        self.client.get(reverse('workout_plan'), {'generate': 'true'})
+
+        self.assertEqual(PlanGenerationJob.objects.count(), 1)
+
+    def test_status_endpoint(self) -> None:
+        job = PlanGenerationJob.enqueue(self.user)
+        other_user = User.objects.create_user(username='other@example.com', email='other@example.com', password='testpass123')
+        other_job = PlanGenerationJob.enqueue(other_user)
+
+        response = self.client.get(reverse('plan_generation_job_status', args=[job.pk]))
+        self.assertEqual(response.json()['status'], JOB_STATUS_PENDING)
+        self.assertTrue(response.json()['is_active'])
+
+        response = self.client.get(reverse('plan_generation_job_status', args=[other_job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_worker_claims_and_completes_jobs(self) -> None:
+        job = PlanGenerationJob.enqueue(self.user)
+        orphan = User.objects.create_user(username='orphan@example.com', email='orphan@example.com', password='testpass123')
+        orphan_job = PlanGenerationJob.enqueue(orphan)
+
+        jobs = claim_jobs(batch_size=10)
+        self.assertEqual({claimed.pk for claimed in jobs}, {job.pk, orphan_job.pk})
+        self.assertEqual(PlanGenerationJob.objects.filter(status=JOB_STATUS_RUNNING).count(), 2)
+        self.assertEqual(claim_jobs(batch_size=10), [])
+
+        ai_provider = Mock(spec=AIProvider)
+        ai_provider.agenerate_completion.return_value = PLAN_RESPONSE
+        process_jobs(jobs, WorkoutPlanGenerator(ai_provider))
+
+        job.refresh_from_db()
+        orphan_job.refresh_from_db()
+        self.assertEqual(job.status, JOB_STATUS_SUCCEEDED)
+        self.assertEqual(job.workout_plan, WorkoutPlan.objects.get(user=self.user))
+        self.assertEqual(orphan_job.status, JOB_STATUS_FAILED)
+
+    def test_finished_job_reports_outcome(self) -> None:
+        job, _ = PlanGenerationJob.acquire(self.user)
+        job.mark_failed('Provider unavailable')
+
+        response = self.client.get(reverse('workout_plan'), {'job': job.pk}, follow=True)
+
+        self.assertRedirects(response, reverse('workout_plan'))
+        self.assertContains(response, 'Provider unavailable')
+
+class TestSingleFlightGeneration(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test@example.com', email='test@example.com', password='testpass123')
+        self.profile = UserProfile.objects.create(user=self.user, available_equipment=['bodyweight'])
+        self.ai_provider = Mock(spec=AIProvider)
+        self.ai_provider.generate_completion.return_value = PLAN_RESPONSE
+        self.generator = WorkoutPlanGenerator(self.ai_provider)
+
+    def start_running_job(self, started_ago: timedelta = timedelta()) -> PlanGenerationJob:
+        return PlanGenerationJob.objects.create(
+            user=self.user, status=JOB_STATUS_RUNNING, started_at=timezone.now() - started_ago
+        )
+
+    def test_only_one_active_job_per_user(self) -> None:
+        PlanGenerationJob.enqueue(self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PlanGenerationJob.objects.create(user=self.user)
+
+        # Finished jobs do not hold the lock
+        PlanGenerationJob.objects.update(status=JOB_STATUS_SUCCEEDED)
+        self.assertEqual(PlanGenerationJob.enqueue(self.user).status, JOB_STATUS_PENDING)
+
+    def test_owner_generates_and_completes_queued_job(self) -> None:
+        queued = PlanGenerationJob.enqueue(self.user)
+
+        plan = generate_single_flight(self.generator, self.profile)
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, JOB_STATUS_SUCCEEDED)
+        self.assertEqual(queued.workout_plan, plan)
+        self.ai_provider.generate_completion.assert_called_once()
+
+    def test_attached_caller_reuses_in_flight_result(self) -> None:
+        running = self.start_running_job()
+        plan = WorkoutPlan.objects.create(user=self.user, week_start_date=timezone.now().date())
+
+        with self.assertRaises(PlanGenerationInProgress):
+            generate_single_flight(self.generator, self.profile, timeout=0)
+
+        # The other process finishes while this caller is waiting
+        with patch('fitness.services.plan_jobs.time.sleep', side_effect=lambda seconds: running.mark_succeeded(plan)):
+            self.assertEqual(generate_single_flight(self.generator, self.profile), plan)
+
+        self.ai_provider.generate_completion.assert_not_called()
+        self.assertEqual(PlanGenerationJob.objects.count(), 1)
+
+    def test_stale_running_job_is_expired(self) -> None:
+        stale = self.start_running_job(started_ago=timedelta(hours=1))
+
+        generate_single_flight(self.generator, self.profile)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, JOB_STATUS_FAILED)
+        self.assertEqual(stale.error, 'Generation timed out')
+        self.ai_provider.generate_completion.assert_called_once()
+
+    def test_failed_generation_releases_lock(self) -> None:
+        self.ai_provider.generate_completion.side_effect = ValueError('Provider unavailable')
+
+        with self.assertRaises(ValueError):
+            generate_single_flight(self.generator, self.profile)
+
+        self.assertEqual(PlanGenerationJob.objects.get().status, JOB_STATUS_FAILED)
+        self.assertIsNone(PlanGenerationJob._active_for(self.user))
+
+    def test_batch_skips_job_expired_while_waiting_its_turn(self) -> None:
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='testpass123')
+        UserProfile.objects.create(user=other, available_equipment=['bodyweight'])
+        PlanGenerationJob.enqueue(self.user)
+        PlanGenerationJob.enqueue(other)
+        jobs = claim_jobs(batch_size=10)
+        # Both were claimed long ago; the first user's lock expired and a new request queued a job
+        PlanGenerationJob.objects.update(started_at=timezone.now() - timedelta(hours=1))
+        PlanGenerationJob.enqueue(self.user)
+        self.ai_provider.agenerate_completion.return_value = PLAN_RESPONSE
+
+        summary = process_jobs(jobs, self.generator, concurrency=1)
+
+        self.assertEqual(self.ai_provider.agenerate_completion.call_count, 1)
+        self.assertEqual(summary.succeeded, 1)
+        expired, requeued = PlanGenerationJob.objects.filter(user=self.user).order_by('pk')
+        self.assertEqual((expired.status, expired.error), (JOB_STATUS_FAILED, 'Generation timed out'))
+        self.assertEqual(requeued.status, JOB_STATUS_PENDING)
+        self.assertEqual(PlanGenerationJob.objects.get(user=other).status, JOB_STATUS_SUCCEEDED)
+
+    def test_completion_does_not_overwrite_expired_job(self) -> None:
+        job, _ = PlanGenerationJob.acquire(self.user)
+        PlanGenerationJob.objects.update(started_at=timezone.now() - timedelta(hours=1))
+        PlanGenerationJob.expire_stale()
+        plan = WorkoutPlan.objects.create(user=self.user, week_start_date=timezone.now().date())
+
+        self.assertFalse(job.mark_succeeded(plan))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.workout_plan), (JOB_STATUS_FAILED, None))
+
+    def test_batch_command_skips_users_already_generating(self) -> None:
+        other = User.objects.create_user(username='other@example.com', email='other@example.com', password='testpass123')
+        UserProfile.objects.create(user=other, available_equipment=['bodyweight'])
+        self.start_running_job()
+        self.ai_provider.agenerate_completion.return_value = PLAN_RESPONSE
+
+        out = StringIO()
+        with patch('fitness.management.commands.generate_workout_plan.get_ai_provider', return_value=self.ai_provider):
+            call_command('generate_workout_plan', '--all', stdout=out, stderr=StringIO())
+
+        self.assertIn('Skipping test@example.com', out.getvalue())
+        self.assertEqual(self.ai_provider.agenerate_completion.call_count, 1)
+        self.assertTrue(WorkoutPlan.objects.filter(user=other).exists())
+        self.assertFalse(WorkoutPlan.objects.filter(user=self.user).exists())
+
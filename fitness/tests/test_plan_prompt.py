@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from io import StringIO
+from unittest.mock import Mock, patch
+import httpx
+import json
+from ..models import AICallMetric, UserProfile
+from ..services import ai_providers
+from ..services.ai_metrics import InstrumentedProvider
+from ..services.ai_providers import AIProvider, OpenAIProvider
+from ..services.plan_prompt import PlanPromptBuilder, WeeklyPlanResponse, compact_shape, json_schema_for, missing_fields
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+from .test_ai_providers import chat_completion
+
+class TestPlanPromptBuilder(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.user_profile = UserProfile.objects.create(
+            user=user,
+            goal='strength',
+            workouts_per_week=3,
+            available_equipment=['dumbbells', 'bodyweight'],
+            fitness_level=2
+        )
+
+    def test_schema_is_derived_from_response_types(self) -> None:
+        schema = json_schema_for(WeeklyPlanResponse)
+        workout = schema['properties']['weekly_plan']['items']
+        exercise = workout['properties']['exercises']['items']
+
+        self.assertEqual(schema['required'], ['weekly_plan', 'equipment_needed', 'general_guidelines'])
+        self.assertFalse(exercise['additionalProperties'])
+        self.assertEqual(exercise['properties']['sets'], {"type": "integer"})
+        self.assertEqual(exercise['properties']['muscle_groups'], {"type": "array", "items": {"type": "string"}})
+        self.assertIn('"intensity":int 1-10', compact_shape(WeeklyPlanResponse))
+
+    def test_missing_fields_reports_nested_paths(self) -> None:
+        response = {
+            'weekly_plan': [{'day': 'Monday', 'exercises': [{'name': 'Squat'}]}],
+            'equipment_needed': [],
+        }
+
+        missing = missing_fields(WeeklyPlanResponse, response)
+
+        self.assertIn('weekly_plan[0].focus', missing)
+        self.assertIn('weekly_plan[0].exercises[0].sets', missing)
+        self.assertIn('general_guidelines', missing)
+        self.assertNotIn('weekly_plan[0].day', missing)
+
+    def test_compact_prompt_uses_fewer_tokens(self) -> None:
+        compact = PlanPromptBuilder('compact')
+        legacy = PlanPromptBuilder('legacy')
+
+        self.assertIn('Goal: strength', compact.build_messages(self.user_profile)[1]['content'])
+        self.assertLess(
+            compact.token_counts(self.user_profile)['messages'],
+            legacy.token_counts(self.user_profile)['messages'] / 2
+        )
+        self.assertIsNone(legacy.response_schema())
+        self.assertEqual(compact.response_schema()['name'], 'weekly_plan')
+
+    def test_benchmark_command(self) -> None:
+        AICallMetric.objects.create(
+            provider='openai', model='gpt-4', operation='completion', prompt_variant='compact',
+            wall_time=2.0, prompt_tokens=900, completion_tokens=100
+        )
+        AICallMetric.objects.create(
+            provider='openai', model='gpt-4', operation='completion', prompt_variant='compact',
+            wall_time=4.0, prompt_tokens=1100, completion_tokens=300
+        )
+        # Untagged calls, e.g. fan-out days, are not attributed to any variant
+        AICallMetric.objects.create(provider='openai', model='gpt-4', operation='completion', wall_time=9.0, completion_tokens=50)
+
+        out = StringIO()
+        call_command('benchmark_plan_prompts', stdout=out)
+        output = out.getvalue()
+        compact, legacy = output.split('compact:')[1].split('legacy:')
+        self.assertIn('Measured over 2 recorded calls', compact)
+        self.assertIn('Tokens: 1000 input, 200 output', compact)
+        self.assertIn('Latency: p50 3.0s  p95 3.9s', compact)
+        self.assertIn('No recorded calls', legacy)
+
+    def test_whole_week_calls_are_tagged_with_their_variant(self) -> None:
+        provider = Mock(spec=AIProvider)
+        provider.generate_completion.return_value = {"weekly_plan": [], "equipment_needed": [], "general_guidelines": []}
+        generator = WorkoutPlanGenerator(InstrumentedProvider(provider, 'mock'), prompt_builder=PlanPromptBuilder('legacy'))
+
+        generator.generate_weekly_plan(self.user_profile)
+
+        self.assertEqual(AICallMetric.objects.get().prompt_variant, 'legacy')
+
+@override_settings(OPENAI_API_KEY='test-key')
+class TestStructuredOutput(TestCase):
+    def setUp(self) -> None:
+        self.requests = []
+        transport = httpx.MockTransport(self._handle)
+        patcher = patch.object(ai_providers, '_http_client', httpx.Client(transport=transport))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(json.loads(request.content))
+        return httpx.Response(200, json=chat_completion({"ok": True}))
+
+    def test_json_schema_mode_where_supported(self) -> None:
+        schema = PlanPromptBuilder('compact').response_schema()
+
+        OpenAIProvider(model='gpt-4o-mini').generate_completion([{"role": "user", "content": "hi"}], response_schema=schema)
+        OpenAIProvider(model='gpt-4-turbo-preview').generate_completion([{"role": "user", "content": "hi"}], response_schema=schema)
+
+        structured, fallback = (request['response_format'] for request in self.requests)
+        self.assertEqual(structured['type'], 'json_schema')
+        self.assertTrue(structured['json_schema']['strict'])
+        self.assertEqual(structured['json_schema']['name'], 'weekly_plan')
+        self.assertEqual(fallback, {"type": "json_object"})
+
+    def test_default_model_uses_json_schema_mode(self) -> None:
+        OpenAIProvider().generate_completion([{"role": "user", "content": "hi"}], response_schema=PlanPromptBuilder('compact').response_schema())
+
+        self.assertEqual(self.requests[0]['model'], settings.OPENAI_MODEL_NAME)
+        self.assertEqual(self.requests[0]['response_format']['type'], 'json_schema')
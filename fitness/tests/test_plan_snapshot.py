@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from io import StringIO
+from ..benchmarks.fake_provider import FakeAIProvider
+from ..constants import PLAN_SNAPSHOT_VERSION
+from ..models import UserProfile, WorkoutPlan
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+class TestPlanSnapshot(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.profile = UserProfile.objects.create(user=self.user, goal='strength', available_equipment=['dumbbells'])
+        self.generator = WorkoutPlanGenerator(FakeAIProvider(exercises_per_day=3))
+        self.plan = self.generator.generate_weekly_plan(self.profile)
+        self.client.force_login(self.user)
+
+    def fitness_queries(self, captured) -> list:
+        return [query['sql'] for query in captured if 'fitness_' in query['sql']]
+
+    def test_generation_stores_snapshot_matching_tables(self) -> None:
+        self.plan.refresh_from_db()
+        snapshot = self.plan.snapshot
+
+        self.assertEqual(snapshot['version'], PLAN_SNAPSHOT_VERSION)
+        self.assertEqual([day['id'] for day in snapshot['days']], list(self.plan.daily_workouts.values_list('pk', flat=True)))
+        first_set = self.plan.daily_workouts.first().exercise_sets.first()
+        self.assertEqual(snapshot['days'][0]['sets'][0]['exercise']['name'], first_set.exercise.name)
+        self.assertEqual(snapshot, self.plan.build_snapshot())
+
+    def test_streamed_plan_gets_snapshot(self) -> None:
+        plan = self.generator.generate_weekly_plan(self.profile, stream=True)
+        plan.refresh_from_db()
+        self.assertEqual(len(plan.snapshot['days']), 7)
+
+    def test_pages_render_from_plan_row(self) -> None:
+        daily_workout = self.plan.daily_workouts.get(day='Tuesday')
+        exercise_name = daily_workout.exercise_sets.first().exercise.name
+
+        for url in (reverse('workout_plan'), reverse('daily_workout', args=[daily_workout.pk])):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url)
+            self.assertContains(response, exercise_name)
+            queries = self.fitness_queries(captured)
+            self.assertEqual(len(queries), 1, url)
+            self.assertNotIn('fitness_exerciseset', queries[0])
+
+        self.assertContains(self.client.get(reverse('daily_workout', args=[daily_workout.pk])), 'Tuesday: Full Body')
+
+    def test_daily_workout_of_another_user_is_not_found(self) -> None:
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_login(other)
+        response = self.client.get(reverse('daily_workout', args=[self.plan.daily_workouts.first().pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_snapshot_falls_back_to_tables_until_rebuilt(self) -> None:
+        WorkoutPlan.objects.filter(pk=self.plan.pk).update(snapshot=None)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('workout_plan'))
+        self.assertContains(response, 'Sunday: Full Body')
+        self.assertGreater(len(self.fitness_queries(captured)), 1)
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        outdated = WorkoutPlan.objects.create(user=other, week_start_date=self.plan.week_start_date, snapshot={'days': []})
+        current = WorkoutPlan.objects.create(user=other, week_start_date=self.plan.week_start_date, snapshot={'version': PLAN_SNAPSHOT_VERSION, 'days': []})
+
+        out = StringIO()
+        call_command('rebuild_plan_snapshots', stdout=out)
+
+        self.assertIn('Rebuilt 2 plan snapshots', out.getvalue())
+        self.plan.refresh_from_db()
+        outdated.refresh_from_db()
+        self.assertEqual(len(self.plan.snapshot['days']), 7)
+        self.assertEqual(outdated.snapshot['version'], PLAN_SNAPSHOT_VERSION)
+        self.assertEqual(WorkoutPlan.objects.get(pk=current.pk).snapshot['days'], [])
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from io import StringIO
+from ..models import WorkoutPlan, users_with_email
+from ..services.query_audit import full_table_scans
+
+class TestEmailIndex(TestCase):
+    def test_lookup_and_uniqueness_ignore_case(self) -> None:
+        user = User.objects.create_user(username='a', email='Jane@Example.com', password='testpass123')
+
+        self.assertEqual(list(users_with_email(' jane@example.COM')), [user])
+        with transaction.atomic(), self.assertRaises(IntegrityError):
+            User.objects.create_user(username='b', email='jane@example.com', password='testpass123')
+
+        # Accounts without an email do not collide
+        User.objects.create_user(username='c', email='', password='testpass123')
+        User.objects.create_user(username='d', email='', password='testpass123')
+
+    def test_email_login_is_case_insensitive(self) -> None:
+        User.objects.create_user(username='jane@example.com', email='jane@example.com', password='testpass123')
+
+        self.assertTrue(self.client.login(username='JANE@example.com', password='testpass123'))
+
+class TestQueryAudit(TestCase):
+    def test_detects_full_scans(self) -> None:
+        self.assertEqual(full_table_scans('3 0 0 SCAN fitness_exercise', 'sqlite'), ['fitness_exercise'])
+        self.assertEqual(full_table_scans('2 0 0 SCAN auth_user USING INDEX auth_user_pk', 'sqlite'), ['auth_user'])
+        self.assertEqual(full_table_scans('3 0 0 SEARCH auth_user USING INDEX auth_user_email_lower_uniq (<expr>=?)', 'sqlite'), [])
+        self.assertEqual(full_table_scans('Seq Scan on fitness_workoutplan  (cost=0.00..1.01 rows=1)', 'postgresql'), ['fitness_workoutplan'])
+
+    def test_hot_queries_use_indexes_and_seed_is_rolled_back(self) -> None:
+        out = StringIO()
+        call_command('query_audit', '--users', '20', '--weeks', '2', '--exercises', '200', stdout=out)
+
+        self.assertIn('All 7 hot queries use an index', out.getvalue())
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(WorkoutPlan.objects.exists())
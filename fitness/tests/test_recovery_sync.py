@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+import json
+import threading
+import time
+from ..models import RecoveryScore, WhoopAccount
+from ..services.recovery import suggest_workout
+from ..services.whoop import sync_recovery
+
+def recovery(created_at, score, state='SCORED'):
+    return {
+        "cycle_id": 1,
+        "created_at": created_at.isoformat().replace('+00:00', 'Z'),
+        "score_state": state,
+        "score": {"recovery_score": score, "resting_heart_rate": 52, "hrv_rmssd_milli": 41.5} if state == 'SCORED' else None,
+    }
+
+class StubWhoopHandler(BaseHTTPRequestHandler):
+    """Serves /recovery pages per access token, recording concurrency and queries."""
+    server: 'StubWhoopServer'
+
+    def do_GET(self) -> None:
+        stub = self.server
+        with stub.lock:
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        try:
+            time.sleep(0.02)
+            token = self.headers['Authorization'].removeprefix('Bearer ')
+            query = parse_qs(urlparse(self.path).query)
+            stub.queries.append((token, query))
+            failures = stub.failures.get(token, [])
+            if failures:
+                self._respond(failures.pop(0), {"error": "unavailable"})
+                return
+            pages = stub.pages.get(token, [[]])
+            page_index = int(query.get('nextToken', ['0'])[0])
+            body = {"records": pages[page_index], "next_token": str(page_index + 1) if page_index + 1 < len(pages) else None}
+            self._respond(200, body)
+        finally:
+            with stub.lock:
+                stub.in_flight -= 1
+
+    def _respond(self, status, body) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args) -> None:
+        pass
+
+class StubWhoopServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubWhoopHandler)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queries = []
+        self.pages = {}
+        self.failures = {}
+
+class TestRecoverySync(TestCase):
+    def setUp(self) -> None:
+        self.server = StubWhoopServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        api_settings = {
+            **settings.WHOOP_API,
+            'BASE_URL': f'http://127.0.0.1:{self.server.server_port}/developer/v1',
+            'BACKOFF_BASE': 0,
+            'MAX_RETRIES': 1,
+        }
+        override = override_settings(WHOOP_API=api_settings)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.accounts = []
+        for i in range(6):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            self.accounts.append(WhoopAccount.objects.create(user=user, access_token=f'token-{i}'))
+
+    def test_syncs_accounts_concurrently_with_cursors(self) -> None:
+        now = timezone.now()
+        yesterday, today = now - timedelta(days=1), now - timedelta(minutes=5)
+        for i in range(6):
+            self.server.pages[f'token-{i}'] = [[recovery(yesterday, 40 + i)], [recovery(today, 80)]]
+        self.server.pages['token-1'] = [[recovery(yesterday, 55), recovery(today, 0, state='PENDING_SCORE')]]
+        self.server.failures['token-2'] = [503]
+        self.server.failures['token-3'] = [401]
+
+        summary = sync_recovery(self.accounts, concurrency=3)
+
+        self.assertEqual(self.server.max_in_flight, 3)
+        self.assertEqual((summary.succeeded, summary.failed), (5, 1))
+        self.assertEqual(RecoveryScore.objects.filter(user=self.accounts[0].user).count(), 2)
+        self.assertEqual(RecoveryScore.latest_for(self.accounts[0].user).score, 80)
+
+        self.accounts[3].refresh_from_db()
+        self.assertIn('401', self.accounts[3].last_error)
+        self.assertIsNone(self.accounts[3].synced_through)
+
+        # The cursor stops at a recovery that is still being scored
+        self.accounts[1].refresh_from_db()
+        self.assertEqual(self.accounts[1].synced_through, today)
+
+        # The next run starts from each account's cursor instead of re-downloading history
+        self.server.queries.clear()
+        self.accounts[0].refresh_from_db()
+        sync_recovery([self.accounts[0]])
+        start = parse_datetime(self.server.queries[0][1]['start'][0])
+        self.assertEqual(start, self.accounts[0].synced_through)
+
+    def test_command_and_suggestion_read_stored_scores(self) -> None:
+        self.server.pages['token-0'] = [[recovery(timezone.now() - timedelta(hours=2), 85)]]
+
+        out = StringIO()
+        call_command('sync_recovery', '--user-ids', str(self.accounts[0].user_id), stdout=out)
+        self.assertIn('Synced 1/1 accounts', out.getvalue())
+
+        self.server.queries.clear()
+        self.assertEqual(suggest_workout(self.accounts[0].user, 'cardio'), 'HIIT run, 5x800m intervals')
+        self.assertEqual(suggest_workout(self.accounts[1].user, 'cardio'), '20 min walk or light cycling')
+        self.assertEqual(self.server.queries, [])
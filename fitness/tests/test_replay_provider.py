@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.conf import settings
+from unittest.mock import patch
+import asyncio
+import json
+import tempfile
+from ..benchmarks.fake_provider import FakeAIProvider
+from ..models import UserProfile
+from ..services.ai_providers import AIProviderError, get_ai_provider, reset_ai_providers
+from ..services.replay_provider import Cassette, RecordingProvider, Recording, ReplayProvider, cassette_key
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+MESSAGES = [{"role": "user", "content": "Plan my week"}]
+
+class TestReplayProvider(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cassette_dir = tmp.name
+
+    def record(self, messages=MESSAGES, response_schema=None) -> dict:
+        recorder = RecordingProvider(FakeAIProvider(exercises_per_day=1), Cassette(self.cassette_dir))
+        return recorder.generate_completion(messages, response_schema=response_schema)
+
+    def test_replays_recorded_response_by_request(self) -> None:
+        schema = {"name": "weekly_plan", "schema": {"type": "object"}}
+        recorded = self.record(response_schema=schema)
+
+        replay = ReplayProvider(cassette_dir=self.cassette_dir, latency='none')
+
+        self.assertEqual(replay.generate_completion(MESSAGES, response_schema=schema), recorded)
+        self.assertEqual(asyncio.run(replay.agenerate_completion(MESSAGES, response_schema=schema)), recorded)
+        self.assertEqual(json.loads(''.join(replay.stream_completion(MESSAGES, response_schema=schema))), recorded)
+        with self.assertRaises(AIProviderError):
+            replay.generate_completion(MESSAGES)
+
+    def test_cassette_files_accumulate_variants(self) -> None:
+        self.record()
+        self.record()
+
+        with open(f'{self.cassette_dir}/{cassette_key(MESSAGES)}.json') as f:
+            entry = json.load(f)
+        self.assertEqual(entry['messages'], MESSAGES)
+        self.assertEqual(len(entry['recordings']), 2)
+        self.assertEqual(len(Cassette(self.cassette_dir)), 2)
+
+    def test_random_miss_policy_answers_unrecorded_requests(self) -> None:
+        recorded = self.record()
+        replay = ReplayProvider(cassette_dir=self.cassette_dir, latency='none', on_miss='random')
+
+        self.assertEqual(replay.generate_completion([{"role": "user", "content": "Something else"}]), recorded)
+
+    def test_latency_distributions(self) -> None:
+        recording = Recording(response={}, latency=4.0)
+
+        def provider(**options) -> ReplayProvider:
+            return ReplayProvider(cassette_dir=self.cassette_dir, latency_mean=2.0, latency_stddev=0.5, **options)
+
+        self.assertEqual(provider(latency='none').sample_latency(recording), 0.0)
+        self.assertEqual(provider(latency='fixed').sample_latency(recording), 2.0)
+        self.assertEqual(provider(latency='recorded', latency_scale=0.5).sample_latency(recording), 2.0)
+        normal = provider(latency='normal', seed=1)
+        samples = [normal.sample_latency(recording) for _ in range(500)]
+        self.assertAlmostEqual(sum(samples) / len(samples), 2.0, delta=0.1)
+        with self.assertRaises(ValueError):
+            provider(latency='uniform')
+
+    def test_registered_provider_drives_generator_offline(self) -> None:
+        user = User.objects.create_user(username='test@example.com', email='test@example.com', password='testpass123')
+        profile = UserProfile.objects.create(user=user, available_equipment=['bodyweight'])
+        replay_settings = {**settings.AI_REPLAY, 'CASSETTE_DIR': self.cassette_dir, 'LATENCY': 'none'}
+        self.addCleanup(reset_ai_providers)
+
+        # Record through the registry, then replay the same prompt
+        with override_settings(AI_REPLAY={**replay_settings, 'RECORD': True}):
+            reset_ai_providers()
+            with patch('fitness.services.ai_providers.OpenAIProvider', return_value=FakeAIProvider(exercises_per_day=2)):
+                recorded = WorkoutPlanGenerator(get_ai_provider('openai', cache=False)).generate_weekly_plan(profile)
+
+        with override_settings(AI_REPLAY=replay_settings):
+            reset_ai_providers()
+            replayed = WorkoutPlanGenerator(get_ai_provider('replay')).generate_weekly_plan(profile)
+
+        self.assertEqual(replayed.snapshot['days'][0]['sets'][1]['exercise']['name'], recorded.snapshot['days'][0]['sets'][1]['exercise']['name'])
+        self.assertEqual(len(replayed.snapshot['days']), 7)
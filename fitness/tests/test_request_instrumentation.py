@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..benchmarks.fake_provider import FakeAIProvider
+from ..middleware import QueryBudgetExceeded, fingerprint
+from ..models import UserProfile
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+def instrumentation(**overrides):
+    return override_settings(REQUEST_INSTRUMENTATION={
+        **settings.REQUEST_INSTRUMENTATION, 'ENABLED': True, 'ENFORCE_BUDGETS': True, **overrides
+    })
+
+class TestQueryInstrumentation(TestCase):
+    """Renders the hot pages with budgets enforced, so a new N+1 fails here."""
+
+    def setUp(self) -> None:
+        self.users = []
+        generator = WorkoutPlanGenerator(FakeAIProvider(exercises_per_day=5))
+        for i in range(5):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            profile = UserProfile.objects.create(user=user, goal='strength', available_equipment=['dumbbells'])
+            self.plan = generator.generate_weekly_plan(profile)
+            self.users.append(user)
+
+    def test_fingerprint_collapses_parameter_lists(self) -> None:
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s,\n %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (...)',
+        )
+
+    @instrumentation()
+    def test_plan_pages_stay_within_budget(self) -> None:
+        self.client.force_login(self.plan.user)
+        daily_workout = self.plan.daily_workouts.first()
+
+        for url in (reverse('workout_plan'), reverse('daily_workout', args=[daily_workout.pk])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", dup;desc="0 repeated", total;dur=')
+
+    @instrumentation()
+    def test_admin_changelists_do_not_query_per_row(self) -> None:
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='testpass123')
+        self.client.force_login(admin)
+
+        for model in ('dailyworkout', 'workoutplan', 'userprofile'):
+            response = self.client.get(reverse(f'admin:fitness_{model}_changelist'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_budget_overrun_is_raised_with_the_repeated_query(self) -> None:
+        budgets = {'workout_plan': {'queries': 1}}
+        self.client.force_login(self.plan.user)
+
+        with instrumentation(BUDGETS=budgets), self.assertRaisesMessage(QueryBudgetExceeded, 'workout_plan exceeded its query budget: queries'):
+            self.client.get(reverse('workout_plan'))
+
+        with instrumentation(BUDGETS=budgets, ENFORCE_BUDGETS=False), self.assertLogs('fitness.middleware', 'WARNING') as logs:
+            self.client.get(reverse('workout_plan'))
+        self.assertIn('exceeded its query budget', logs.output[0])
+
+    def test_disabled_by_default(self) -> None:
+        self.client.force_login(self.plan.user)
+        response = self.client.get(reverse('workout_plan'))
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from unittest.mock import Mock
+from typing import Any, Dict, Iterator, List
+import json
+from ..models import UserProfile, WorkoutPlan, DailyWorkout
+from ..services.ai_providers import AIProvider
+from ..services.json_stream import JSONArrayStreamParser
+from ..services.workout_plan_generator import WorkoutPlanGenerator
+
+def build_plan(days: List[str]) -> Dict[str, Any]:
+    return {
+        "weekly_plan": [
+            {
+                "day": day,
+                "focus": "Legs",
+                "description": "Leg day with \"quoted\" text, braces {} and brackets []",
+                "duration": "30 minutes",
+                "intensity": 5,
+                "notes": "",
+                "exercises": [
+                    {"name": "Squats", "muscle_groups": ["legs"], "sets": 3, "reps": "10"}
+                ]
+            }
+            for day in days
+        ],
+        "equipment_needed": ["bodyweight"],
+        "general_guidelines": ["Stay hydrated"]
+    }
+
+def chunked(text: str, size: int) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+class TestJSONArrayStreamParser(TestCase):
+    def test_yields_each_item_once_complete(self) -> None:
+        plan = build_plan(["Monday", "Tuesday", "Wednesday"])
+        text = json.dumps(plan, indent=2)
+        first_item_end = text.index('"Tuesday"')
+
+        parser = JSONArrayStreamParser('weekly_plan')
+        items = parser.feed(text[:first_item_end])
+        self.assertEqual(items, [plan["weekly_plan"][0]])
+
+        items += parser.feed(text[first_item_end:])
+        self.assertEqual(items, plan["weekly_plan"])
+        self.assertEqual(parser.document(), plan)
+
+    def test_ignores_arrays_under_other_keys(self) -> None:
+        text = json.dumps({"other": [{"day": "x"}], "weekly_plan": [{"day": "Monday"}]})
+
+        parser = JSONArrayStreamParser('weekly_plan')
+        items = [item for chunk in chunked(text, 3) for item in parser.feed(chunk)]
+
+        self.assertEqual(items, [{"day": "Monday"}])
+
+class TestStreamingGeneration(TestCase):
+    def setUp(self) -> None:
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.user_profile = UserProfile.objects.create(user=user, available_equipment=['bodyweight'])
+        self.mock_ai_provider = Mock(spec=AIProvider)
+        self.generator = WorkoutPlanGenerator(self.mock_ai_provider)
+
+    def test_days_are_persisted_as_they_arrive(self) -> None:
+        plan = build_plan(["Monday", "Tuesday", "Wednesday"])
+        self.mock_ai_provider.stream_completion.return_value = chunked(json.dumps(plan), 16)
+        saved_counts = []
+
+        workout_plan = self.generator.generate_weekly_plan(
+            self.user_profile,
+            stream=True,
+            on_workout=lambda workout: saved_counts.append(DailyWorkout.objects.count())
+        )
+
+        self.assertEqual(saved_counts, [1, 2, 3])
+        self.assertEqual(WorkoutPlan.objects.get(), workout_plan)
+        self.assertEqual(workout_plan.equipment_needed, ["bodyweight"])
+        self.assertEqual(workout_plan.general_guidelines, ["Stay hydrated"])
+        self.assertEqual(workout_plan.daily_workouts.get(day="Tuesday").exercise_sets.count(), 1)
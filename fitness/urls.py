@@ -8,4 +8,5 @@ urlpatterns = [
     path('profile/edit/', views.EditProfileView.as_view(), name='edit_profile'),
     path('workout-plan/', views.WeeklyWorkoutPlanView.as_view(), name='workout_plan'),
     path('workout-plan/<int:pk>/', views.DailyWorkoutView.as_view(), name='daily_workout'),
+    path('workout-plan/jobs/<int:pk>/', views.PlanGenerationJobStatusView.as_view(), name='plan_generation_job_status'),
 ]
@@ -1,13 +1,17 @@
 # fitness/views.py
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.views import View
 from django.views.generic import CreateView, TemplateView, UpdateView, ListView, DetailView
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
-from django.http import HttpResponseRedirect, HttpResponse
+from django.urls import reverse, reverse_lazy
+from django.http import Http404, HttpResponseRedirect, HttpResponse, JsonResponse
 from django.contrib.auth import login
-from typing import Any, Dict
+from django.utils.functional import cached_property
+from typing import Any, Dict, Optional
+from .constants import JOB_STATUS_SUCCEEDED
 from .forms import SignUpForm, EditProfileForm
-from .models import UserProfile, WorkoutPlan, DailyWorkout
+from .models import UserProfile, WorkoutPlan, PlanGenerationJob
 from datetime import datetime, timedelta
 import logging
 
@@ -47,45 +51,24 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
     def get_object(self) -> UserProfile:
         return self.request.user.userprofile #type: ignore
 
-class WeeklyWorkoutPlanView(LoginRequiredMixin, ListView):
+class WeeklyWorkoutPlanView(LoginRequiredMixin, TemplateView):
     template_name = 'fitness/weekly_workout_plan.html'
-    context_object_name = 'daily_workouts'
     
-    def get_queryset(self):
-        # Get the most recent workout plan for the user
-        workout_plan = WorkoutPlan.objects.filter(
+    @cached_property
+    def latest_plan(self) -> Optional[WorkoutPlan]:
+        """The user's most recent workout plan, looked up once per request."""
+        return WorkoutPlan.objects.filter(
             user=self.request.user
         ).order_by('-week_start_date').first()
-        
-        if not workout_plan:
-            return DailyWorkout.objects.none()
-            
-        # Get all daily workouts for this plan, ordered by day
-        return DailyWorkout.objects.filter(
-            workout_plan=workout_plan
-        ).prefetch_related(
-            'exercise_sets',
-            'exercise_sets__exercise'
-        ).extra(
-            select={'day_order': "CASE day " +
-                                "WHEN 'Sunday' THEN 0 " +
-                                "WHEN 'Monday' THEN 1 " +
-                                "WHEN 'Tuesday' THEN 2 " +
-                                "WHEN 'Wednesday' THEN 3 " +
-                                "WHEN 'Thursday' THEN 4 " +
-                                "WHEN 'Friday' THEN 5 " +
-                                "WHEN 'Saturday' THEN 6 " +
-                                "END"},
-            order_by=['day_order']
-        )
-    
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        workout_plan = WorkoutPlan.objects.filter(
-            user=self.request.user
-        ).order_by('-week_start_date').first()
+        workout_plan = self.latest_plan
+        context['daily_workouts'] = []
         
         if workout_plan:
+            # Days and sets come from the plan's snapshot, so the plan row is the only read
+            context['daily_workouts'] = workout_plan.get_snapshot()['days']
             context['workout_plan'] = workout_plan
             if workout_plan.week_start_date:
                 context['week_start_date'] = workout_plan.week_start_date
@@ -93,54 +76,68 @@ class WeeklyWorkoutPlanView(LoginRequiredMixin, ListView):
             context['equipment_needed'] = workout_plan.get_equipment_display()
             context['general_guidelines'] = workout_plan.general_guidelines
         
-        # Only set is_generating to True if we're actually generating a new plan
-        context['is_generating'] = self.request.GET.get('generate') == 'true'
+        # Show the generating state while the requested job is still queued or running
+        job = self._get_requested_job()
+        context['is_generating'] = job is not None and job.is_active
+        if context['is_generating']:
+            context['generation_job'] = job
         
         return context
+
+    def _get_requested_job(self) -> Optional[PlanGenerationJob]:
+        job_id = self.request.GET.get('job')
+        if not job_id or not job_id.isdigit():
+            return None
+        return PlanGenerationJob.objects.filter(pk=job_id, user=self.request.user).first()
         
     def get(self, request, *args, **kwargs):
         # Debug logging
         logger = logging.getLogger(__name__)
         logger.debug(f"GET request received. Generate param: {request.GET.get('generate')}")
         
-        # Check if we need to generate a new plan
+        # Queue a new plan instead of generating it inside the request
         if request.GET.get('generate') == 'true':
-            try:
-                # Call the management command
-                from django.core.management import call_command
-                logger.debug("Calling generate_workout_plan command")
-                call_command('generate_workout_plan', email=request.user.email)
-                logger.debug("Command completed successfully")
-                
-                # Add success message
-                from django.contrib import messages
+            job = PlanGenerationJob.enqueue(request.user)
+            logger.debug(f"Queued plan generation job {job.pk}")
+            return HttpResponseRedirect(f"{reverse('workout_plan')}?job={job.pk}")
+
+        # Once the requested job has finished, report the outcome on a clean URL
+        job = self._get_requested_job()
+        if job is not None and not job.is_active:
+            if job.status == JOB_STATUS_SUCCEEDED:
                 messages.success(request, 'Workout plan generated successfully!')
-                
-            except Exception as e:
-                # Log the error and set a message for the user
-                logger.error(f"Error generating workout plan: {str(e)}")
-                from django.contrib import messages
-                messages.error(request, f"Error generating workout plan: {str(e)}")
-            
-            # Redirect to remove the query parameter and force a fresh load
+            else:
+                logger.error(f"Error generating workout plan: {job.error}")
+                messages.error(request, f"Error generating workout plan: {job.error}")
             return HttpResponseRedirect(reverse_lazy('workout_plan'))
             
         return super().get(request, *args, **kwargs)
 
-class DailyWorkoutView(LoginRequiredMixin, DetailView):
+class PlanGenerationJobStatusView(LoginRequiredMixin, View):
+    """Lightweight JSON endpoint the plan page polls while a job is running."""
+
+    def get(self, request, pk: int) -> JsonResponse:
+        job = get_object_or_404(PlanGenerationJob, pk=pk, user=request.user)
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'is_active': job.is_active,
+            'workout_plan_id': job.workout_plan_id,
+            'error': job.error,
+        })
+
+class DailyWorkoutView(LoginRequiredMixin, TemplateView):
     template_name = 'fitness/daily_workout.html'
-    context_object_name = 'workout'
-    
-    def get_queryset(self):
-        return DailyWorkout.objects.filter(
-            workout_plan__user=self.request.user
-        ).prefetch_related(
-            'exercise_sets',
-            'exercise_sets__exercise'
-        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        workout = self.get_object()
-        context['workout_plan'] = workout.workout_plan
+        # One read of the plan row owning the workout; the day itself comes from the snapshot
+        workout_plan = get_object_or_404(
+            WorkoutPlan, user=self.request.user, daily_workouts__pk=kwargs['pk']
+        )
+        workout = next((day for day in workout_plan.get_snapshot()['days'] if day['id'] == kwargs['pk']), None)
+        if workout is None:
+            raise Http404('Workout not found')
+        context['workout'] = workout
+        context['workout_plan'] = workout_plan
         return context